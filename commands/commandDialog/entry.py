@@ -3,8 +3,13 @@ import adsk.core
 import adsk.fusion
 import os
 import math
+import threading
 from ...lib import fusionAddInUtils as futil
 from ... import config
+from ... import crown_geometry
+from ... import recompute_scheduler
+from ... import sketch_backend
+from ... import stent_sketch
 app = adsk.core.Application.get()
 ui = app.userInterface
 
@@ -32,6 +37,13 @@ ICON_FOLDER = os.path.join(os.path.dirname(
 # they are not released and garbage collected.
 local_handlers = []
 
+# Table rebuilds are debounced: a timer thread fires this custom event and the
+# recompute runs on the UI thread (Application.fireCustomEvent is thread-safe)
+RECOMPUTE_EVENT_ID = f'{CMD_ID}_recompute'
+
+# Inputs of the open dialog, for recompute events (None once the dialog is closed)
+dialog_inputs = None
+
 # Global storage for last used values (persists during Fusion session)
 last_used_values = {
     'diameter': 1.8,
@@ -298,117 +310,7 @@ def crown_arc_curvature_from_Rc(Rc_um):
     return 1.0 / (Rc_um / 1000.0)
 
 
-# ---------- Quarter-wave helper (from crown_arc_calc) ----------
-
-def _solve_delta_for_R(H, W, w, R):
-    """Internal: solve tangency equation for delta given H,W,w,R (radians)."""
-    import math
-    p = 0.5*w
-    A = H - p
-
-    def F(d):
-        s = math.sin(d)
-        c = math.cos(d)
-        denom = W - 2.0*R*s
-        if abs(denom) < 1e-14:
-            denom = 1e-14 if denom >= 0 else -1e-14
-        return math.tan(d) - (2.0*(A - R*(1.0 - c))) / denom
-    lo, hi = math.radians(5.0), math.radians(89.9)
-    step = math.radians(0.05)
-    best_d, best_val = lo, abs(F(lo))
-    prev_d, prev_f = lo, F(lo)
-    bracket = None
-    d = lo + step
-    while d <= hi + 1e-12:
-        fd = F(d)
-        if abs(fd) < best_val:
-            best_val, best_d = abs(fd), d
-        if prev_f * fd < 0.0:
-            bracket = (prev_d, d)
-            break
-        prev_d, prev_f = d, fd
-        d += step
-    if bracket is None:
-        span = math.radians(5.0)
-        lo = max(math.radians(1e-6), best_d - 0.5*span)
-        hi = min(math.radians(89.9),   best_d + 0.5*span)
-    else:
-        lo, hi = bracket
-    # bisection
-    flo, fhi = F(lo), F(hi)
-    for _ in range(120):
-        mid = 0.5*(lo+hi)
-        fm = F(mid)
-        if abs(fm) < 1e-14 or (hi - lo) < 1e-12:
-            return mid
-        if flo * fm < 0.0:
-            hi, fhi = mid, fm
-        else:
-            lo, flo = mid, fm
-    return 0.5*(lo+hi)
-
-
-def _solve_delta_for_quarter(H: float, W: float, w: float, R: float) -> float:
-    """
-    Solve for the contact angle δ (radians) for the quarter-rectangle construction:
-
-        tan δ = 2 * (H - w/2 - R*(1 - cos δ)) / (W - 2*R*sin δ)
-
-    Robust bisection on δ ∈ (5°, 89.9°), with coarse bracketing.
-    """
-    p = 0.5 * w
-    A = H - p
-
-    def F(d: float) -> float:
-        s = math.sin(d)
-        c = math.cos(d)
-        denom = W - 2.0 * R * s
-        if abs(denom) < 1e-14:
-            denom = 1e-14 if denom >= 0 else -1e-14
-        return math.tan(d) - (2.0 * (A - R * (1.0 - c))) / denom
-
-    lo, hi = math.radians(5.0), math.radians(89.9)
-    step = math.radians(0.05)
-
-    # coarse scan to find a sign change or best point
-    best_d = lo
-    best_val = abs(F(lo))
-    prev_d = lo
-    prev_f = F(prev_d)
-    bracket = None
-
-    d = lo + step
-    while d <= hi + 1e-12:
-        fd = F(d)
-        if abs(fd) < best_val:
-            best_val, best_d = abs(fd), d
-        if prev_f * fd < 0.0:
-            bracket = (prev_d, d)
-            break
-        prev_d, prev_f = d, fd
-        d += step
-
-    if bracket is None:
-        span = math.radians(5.0)
-        lo = max(math.radians(1e-6), best_d - 0.5 * span)
-        hi = min(math.radians(89.9), best_d + 0.5 * span)
-    else:
-        lo, hi = bracket
-
-    # bisection
-    flo, fhi = F(lo), F(hi)
-    for _ in range(120):
-        mid = 0.5 * (lo + hi)
-        fm = F(mid)
-        if abs(fm) < 1e-14 or (hi - lo) < 1e-12:
-            return mid
-        if flo * fm < 0.0:
-            hi, fhi = mid, fm
-        else:
-            lo, flo = mid, fm
-
-    return 0.5 * (lo + hi)
-
+# ---------- Quarter-wave helper (tangency solve in crown_geometry) ----------
 
 def quarter_wave_from_rect(
     rect_height_mm: float,
@@ -439,8 +341,8 @@ def quarter_wave_from_rect(
     if R <= 0.0:
         raise ValueError("Centerline radius must be positive.")
 
-    # Solve for delta
-    delta = _solve_delta_for_quarter(H, W, w, R)
+    # Solve for delta (shared kernel: closed-form guess + safeguarded Newton)
+    delta = crown_geometry.solve_tangency(H, W, w, R).delta
 
     s, c = math.sin(delta), math.cos(delta)
     # contact point horizontal offset from each corner
@@ -513,6 +415,10 @@ def start():
     # Define an event handler for the command created event. It will be called when the button is clicked.
     futil.add_handler(cmd_def.commandCreated, command_created)
 
+    # Debounced table recomputes are delivered on the UI thread
+    recompute_event = app.registerCustomEvent(RECOMPUTE_EVENT_ID)
+    futil.add_handler(recompute_event, recompute_event_received)
+
     # ******** Add a button into the UI so the user can run the command. ********
     # Get the target workspace the button will be created in.
     workspace = ui.workspaces.itemById(WORKSPACE_ID)
@@ -535,6 +441,9 @@ def stop():
     command_control = panel.controls.itemById(CMD_ID)
     command_definition = ui.commandDefinitions.itemById(CMD_ID)
 
+    recompute.cancel()
+    app.unregisterCustomEvent(RECOMPUTE_EVENT_ID)
+
     # Delete the button command control
     if command_control:
         command_control.deleteMe()
@@ -943,6 +852,9 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     # Initialize the per-ring table based on checkbox state
     try:
         inputs = args.command.commandInputs
+        global dialog_inputs
+        dialog_inputs = inputs
+        recompute.cancel()
         table_input = adsk.core.TableCommandInput.cast(
             inputs.itemById('per_ring_table'))
         config_input = adsk.core.StringValueCommandInput.cast(
@@ -959,6 +871,7 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
 
         # Initialize crown arc suggestions and calculations
         update_crown_arc_suggestions(inputs)
+        update_crown_arc_calculations(inputs)
 
     except Exception as e:
         # Don't show error during initialization, just log it
@@ -972,8 +885,6 @@ def draw_stent_frame(diameter_mm, length_mm, num_rings, crowns_per_ring,
                      draw_fold_lock_limits, fold_lock_columns, per_ring_fold_lock_config,
                      balloon_wall_um, chord_values=None, sagitta_values=None):
     """Draw stent frame based on parameters using optimized calculations"""
-    import math
-
     try:
         app = adsk.core.Application.get()
         ui = app.userInterface
@@ -988,588 +899,36 @@ def draw_stent_frame(diameter_mm, length_mm, num_rings, crowns_per_ring,
         waves_per_ring = max(1, crowns_per_ring // 2)
         sk.name = f'Stent Frame - {num_rings} rings, {waves_per_ring} waves ({crowns_per_ring} crowns)'
 
-        # Convert mm to cm for Fusion API
-        def mm_to_cm(x):
-            return x * 0.1
-
-        # Calculate width from diameter (circumference)
-        width_mm = diameter_mm * math.pi
-
-        # Use height factors as proportional values (no base height needed)
-        ring_heights = height_factors  # Direct proportions
-
-        # Calculate with variable gap values and total length of length_mm
-        num_gaps = num_rings - 1
-        # Sum of actual gap values
-        total_gap_space = sum(gap_values[:num_gaps])
-        available_ring_space = length_mm - total_gap_space
-
-        # Scale ring heights to fit the available space
-        original_total_ring_height = sum(ring_heights)
-        ring_scale_factor = available_ring_space / original_total_ring_height
-        scaled_ring_heights = [h * ring_scale_factor for h in ring_heights]
-
-        # Calculate ring positions using variable gap values
-        ring_centers = []
-        # Start with half of first ring height
-        current_y = scaled_ring_heights[0] / 2
-        ring_centers.append(current_y)
-
-        for i in range(1, num_rings):
-            # Add half of previous ring + specific gap + half of current ring
-            gap_value = gap_values[i-1] if i - \
-                1 < len(gap_values) else gap_values[-1]
-            current_y += scaled_ring_heights[i-1] / \
-                2 + gap_value + scaled_ring_heights[i]/2
-            ring_centers.append(current_y)
-
-        # Calculate ring boundaries (crown start and end positions)
-        ring_start_lines = []  # Top of each ring
-        ring_end_lines = []    # Bottom of each ring
-
-        for i, center in enumerate(ring_centers):
-            ring_start = center - scaled_ring_heights[i]/2
-            ring_end = center + scaled_ring_heights[i]/2
-            ring_start_lines.append(ring_start)
-            ring_end_lines.append(ring_end)
-
-        # Calculate gap center positions (including first and last gaps)
-        gap_centers = []
-
-        # First gap: from Y=0 to start of first ring
-        first_gap_center = (0.0 + ring_start_lines[0]) / 2
-        gap_centers.append(first_gap_center)
-
-        # Middle gaps: between ring end and next ring start
-        for i in range(num_rings - 1):
-            gap_center_y = (ring_end_lines[i] + ring_start_lines[i+1]) / 2
-            gap_centers.append(gap_center_y)
-
-        # Last gap: from end of last ring to total length
-        last_gap_center = (ring_end_lines[-1] + length_mm) / 2
-        gap_centers.append(last_gap_center)
-
-        # Use the specified length as total length
-        total_length = length_mm
-
-        lines = sk.sketchCurves.sketchLines
-
-        # Draw border
-        if draw_border:
-            # Left border
-            line = lines.addByTwoPoints(
-                adsk.core.Point3D.create(mm_to_cm(0.0), mm_to_cm(0.0), 0),
-                adsk.core.Point3D.create(
-                    mm_to_cm(0.0), mm_to_cm(total_length), 0)
-            )
-            line.isConstruction = True
-
-            # Right border
-            line = lines.addByTwoPoints(
-                adsk.core.Point3D.create(mm_to_cm(width_mm), mm_to_cm(0.0), 0),
-                adsk.core.Point3D.create(
-                    mm_to_cm(width_mm), mm_to_cm(total_length), 0)
-            )
-            line.isConstruction = True
-
-            # Top border
-            line = lines.addByTwoPoints(
-                adsk.core.Point3D.create(
-                    mm_to_cm(0.0), mm_to_cm(total_length), 0),
-                adsk.core.Point3D.create(
-                    mm_to_cm(width_mm), mm_to_cm(total_length), 0)
-            )
-            line.isConstruction = True
-
-            # Bottom border
-            line = lines.addByTwoPoints(
-                adsk.core.Point3D.create(mm_to_cm(0.0), mm_to_cm(0.0), 0),
-                adsk.core.Point3D.create(mm_to_cm(width_mm), mm_to_cm(0.0), 0)
-            )
-            line.isConstruction = True
-
-        # Draw ring start lines (crown tops) - only if inside the box
-        if draw_crown_peaks:
-            for ring_start in ring_start_lines:
-                if 0 < ring_start < total_length:  # Only draw if inside the box
-                    line = lines.addByTwoPoints(
-                        adsk.core.Point3D.create(
-                            mm_to_cm(0.0), mm_to_cm(ring_start), 0),
-                        adsk.core.Point3D.create(
-                            mm_to_cm(width_mm), mm_to_cm(ring_start), 0)
-                    )
-                    line.isConstruction = True
-
-        # Draw ring end lines (crown bottoms) - only if inside the box
-        if draw_crown_peaks:
-            for ring_end in ring_end_lines:
-                if 0 < ring_end < total_length:  # Only draw if inside the box
-                    line = lines.addByTwoPoints(
-                        adsk.core.Point3D.create(
-                            mm_to_cm(0.0), mm_to_cm(ring_end), 0),
-                        adsk.core.Point3D.create(
-                            mm_to_cm(width_mm), mm_to_cm(ring_end), 0)
-                    )
-                    line.isConstruction = True
-
-        # Draw gap center lines
-        if draw_gap_centerlines and num_rings > 1:
-            if gap_centerlines_interior_only and num_rings > 2:
-                # Only draw interior gap lines (skip first and last gaps)
-                # Skip gap_centers[0] (before first ring) and gap_centers[-1] (after last ring)
-                interior_gap_centers = gap_centers[1:-
-                                                   1] if len(gap_centers) > 2 else []
-                for gap_center in interior_gap_centers:
-                    line = lines.addByTwoPoints(
-                        adsk.core.Point3D.create(
-                            mm_to_cm(0.0), mm_to_cm(gap_center), 0),
-                        adsk.core.Point3D.create(
-                            mm_to_cm(width_mm), mm_to_cm(gap_center), 0)
-                    )
-                    line.isConstruction = True
-            else:
-                # Draw ALL gap lines (including first and last gaps)
-                for gap_center in gap_centers:
-                    line = lines.addByTwoPoints(
-                        adsk.core.Point3D.create(
-                            mm_to_cm(0.0), mm_to_cm(gap_center), 0),
-                        adsk.core.Point3D.create(
-                            mm_to_cm(width_mm), mm_to_cm(gap_center), 0)
-                    )
-                    line.isConstruction = True
-
-        # Draw wave lines (vertical divisions at wave boundaries)
-        if draw_crown_waves:
-            waves = max(1, crowns_per_ring // 2)
-            wave_spacing = width_mm / waves
-            # Draw lines for each wave boundary (not at edges)
-            for i in range(1, waves):
-                x = i * wave_spacing
-                line = lines.addByTwoPoints(
-                    adsk.core.Point3D.create(mm_to_cm(x), mm_to_cm(0.0), 0),
-                    adsk.core.Point3D.create(
-                        mm_to_cm(x), mm_to_cm(total_length), 0)
-                )
-                line.isConstruction = True
-
-        # Draw wave midlines (vertical lines at midpoint within each wave)
-        if draw_crown_midlines or partial_crown_midlines > 0:
-            waves = max(1, crowns_per_ring // 2)
-            wave_spacing = width_mm / waves
-            # Determine how many crowns to draw midlines for
-            if partial_crown_midlines > 0:
-                # Use partial count (limited from left)
-                midlines_count = min(partial_crown_midlines, waves)
-            else:
-                # Use full count if partial is 0 and main option is enabled
-                midlines_count = waves if draw_crown_midlines else 0
-
-            # Draw midlines for the specified number of crowns from left
-            for i in range(midlines_count):
-                # Midline at the center of each crown section
-                x = i * wave_spacing + wave_spacing / 2
-
-                line = lines.addByTwoPoints(
-                    adsk.core.Point3D.create(mm_to_cm(x), mm_to_cm(0.0), 0),
-                    adsk.core.Point3D.create(
-                        mm_to_cm(x), mm_to_cm(total_length), 0)
-                )
-                line.isConstruction = True
-
-        # Draw crown horizontal midlines (horizontal lines at midpoint of each ring height)
-        if draw_crown_h_midlines:
-            # Draw horizontal midlines at each ring center
-            for center in ring_centers:
-                line = lines.addByTwoPoints(
-                    adsk.core.Point3D.create(
-                        mm_to_cm(0.0), mm_to_cm(center), 0),
-                    adsk.core.Point3D.create(
-                        mm_to_cm(width_mm), mm_to_cm(center), 0)
-                )
-                line.isConstruction = True
-
-        # Removed drawing sagitta guide lines. Chord lines will indicate sagitta positions instead.
-
-        # Draw crown chord lines positioned at sagitta distance from crown tips
-        if draw_crown_chord_lines:
-            crown_spacing = width_mm / crowns_per_ring
-
-            # Precompute sagitta per ring (from table or fallback geometry)
-            ring_sagittas = []
-            for i in range(num_rings):
-                ring_height = scaled_ring_heights[i]
-                if sagitta_values and i < len(sagitta_values):
-                    s_val = sagitta_values[i]
-                    print(
-                        f"Ring {i+1}: Using user-defined sagitta={s_val:.3f}mm")
-                else:
-                    crown_arc_radius_mm = 0.2  # Default crown arc radius
-                    if crown_arc_radius_mm > 0 and ring_height > 0 and ring_height <= 2 * crown_arc_radius_mm:
-                        half_chord = ring_height / 2.0
-                        discriminant = crown_arc_radius_mm * crown_arc_radius_mm - half_chord * half_chord
-                        if discriminant >= 0:
-                            s_val = crown_arc_radius_mm - \
-                                math.sqrt(discriminant)
-                        else:
-                            s_val = ring_height / 16.4
-                    else:
-                        s_val = ring_height / 16.4
-                    print(
-                        f"Ring {i+1}: Using calculated sagitta={s_val:.3f}mm")
-                ring_sagittas.append(s_val)
-
-            # Draw chord lines for each ring
-            for i in range(num_rings):
-                ring_height = scaled_ring_heights[i]
-                ring_center = ring_centers[i]
-
-                # Use user-provided chord value if available, otherwise calculate
-                if chord_values and i < len(chord_values):
-                    # Use user-edited chord value from table
-                    chord_mm = chord_values[i]
-                    print(
-                        f"Ring {i+1}: Using user-defined chord={chord_mm:.3f}mm")
-                else:
-                    # Fallback: calculate chord using crown arc parameters
-                    crown_arc_radius_mm = 0.2  # Default crown arc radius
-                    crown_angle_deg = 72.0  # Default crown angle
-                    crown_radius_um = crown_arc_radius_mm * 1000.0
-                    sagitta_calc, chord_calc, arc_calc = crown_apex_from_theta(
-                        crown_angle_deg, crown_radius_um)
-                    chord_mm = chord_calc
-                    print(
-                        f"Ring {i+1}: Using calculated chord={chord_mm:.3f}mm")
-
-                # Draw chord lines for each crown in this ring
-                for crown_index in range(crowns_per_ring):
-                    # Calculate crown center position
-                    crown_center_x = (crown_index + 0.5) * crown_spacing
-
-                    # Calculate chord start and end positions (centered on crown)
-                    chord_half_length = chord_mm / 2.0
-                    chord_start_x = crown_center_x - chord_half_length
-                    chord_end_x = crown_center_x + chord_half_length
-
-                    # Place a single chord per crown:
-                    # - First half of crowns are 'up' (near top tip)
-                    # - Second half are 'down' (near bottom tip)
-                    # - Alternate the pattern per ring index so adjacent rings are opposite
-                    sagitta_mm = ring_sagittas[i]
-                    chord_y_top = ring_center + ring_height/2 - sagitta_mm
-                    chord_y_bottom = ring_center - ring_height/2 + sagitta_mm
-
-                    # Orientation per wave: within each wave (2 crowns), first crown up, second down; flip per ring
-                    wave_index = crown_index // 2
-                    is_first_in_wave = (crown_index % 2 == 0)
-                    # even rings: first in wave up; odd: first in wave down
-                    up_first = (i % 2 == 0)
-                    is_up = is_first_in_wave if up_first else (
-                        not is_first_in_wave)
-                    chord_y = chord_y_top if is_up else chord_y_bottom
-                    orientation = 'up' if is_up else 'down'
-
-                    print(
-                        f"  Crown {crown_index+1} ({orientation}): chord x={chord_start_x:.3f}-{chord_end_x:.3f} at y={chord_y:.3f}mm")
-                    line = lines.addByTwoPoints(
-                        adsk.core.Point3D.create(
-                            mm_to_cm(chord_start_x), mm_to_cm(chord_y), 0),
-                        adsk.core.Point3D.create(
-                            mm_to_cm(chord_end_x), mm_to_cm(chord_y), 0)
-                    )
-                    line.isConstruction = True
-
-        # Draw crown mid lines (vertical lines at center of each crown - wave quarter lines)
-        if draw_crown_mids or partial_crown_mids > 0:
-            crown_spacing = width_mm / crowns_per_ring
-            # Determine how many crowns to draw mid lines for
-            if partial_crown_mids > 0:
-                # Use partial count (limited from left)
-                mids_count = min(partial_crown_mids, crowns_per_ring)
-            else:
-                # Use full count if partial is 0 and main option is enabled
-                mids_count = crowns_per_ring if draw_crown_mids else 0
-
-            # Draw mid lines for the specified number of crowns from left
-            for i in range(mids_count):
-                # Mid line at center position (wave quarter line)
-                x_mid = i * crown_spacing + crown_spacing / 2
-                line = lines.addByTwoPoints(
-                    adsk.core.Point3D.create(
-                        mm_to_cm(x_mid), mm_to_cm(0.0), 0),
-                    adsk.core.Point3D.create(
-                        mm_to_cm(x_mid), mm_to_cm(total_length), 0)
-                )
-                line.isConstruction = True
-
-        # Draw fold-lock limit lines in specified crown boxes
-        if draw_fold_lock_limits:
-            crown_spacing = width_mm / crowns_per_ring
-
-            # Always use per-ring configuration
-            try:
-                # Parse per-ring configuration: "ring:boxes:gap_mm;ring:boxes:gap_mm"
-                ring_configs = {}
-                for config_part in per_ring_fold_lock_config.split(';'):
-                    if ':' in config_part:
-                        parts = config_part.strip().split(':')
-                        if len(parts) == 3:
-                            # Convert to 0-based
-                            ring_idx = int(parts[0].strip()) - 1
-                            boxes_str = parts[1].strip()
-                            # Now in mm, not fraction
-                            gap_width_mm = float(parts[2].strip())
-                            box_indices = [int(x.strip()) for x in boxes_str.split(
-                                ',') if x.strip().isdigit()]
-                            ring_configs[ring_idx] = {
-                                'boxes': box_indices, 'gap_mm': gap_width_mm}
-
-                # Draw fold-lock lines for each configured ring/gap
-                for gap_idx, gap_center_y in enumerate(gap_centers):
-                    if gap_idx in ring_configs:
-                        config = ring_configs[gap_idx]
-                        fold_lock_indices = config['boxes']
-                        # Gap width in mm
-                        fold_lock_gap_mm = config['gap_mm']
-
-                        # Use half the gap width for vertical offset
-                        line_offset = fold_lock_gap_mm / 2
-
-                        # Draw lines for specified crown boxes
-                        for crown_idx in fold_lock_indices:
-                            if 0 <= crown_idx < crowns_per_ring:
-                                # Calculate crown box boundaries
-                                crown_left = crown_idx * crown_spacing
-                                crown_right = (
-                                    crown_idx + 1) * crown_spacing
-
-                                # Draw horizontal fold-lock limit line ABOVE gap center
-                                line = lines.addByTwoPoints(
-                                    adsk.core.Point3D.create(
-                                        mm_to_cm(crown_left), mm_to_cm(gap_center_y - line_offset), 0),
-                                    adsk.core.Point3D.create(
-                                        mm_to_cm(crown_right), mm_to_cm(gap_center_y - line_offset), 0)
-                                )
-                                line.isConstruction = True
-
-                                # Draw horizontal fold-lock limit line BELOW gap center
-                                line = lines.addByTwoPoints(
-                                    adsk.core.Point3D.create(
-                                        mm_to_cm(crown_left), mm_to_cm(gap_center_y + line_offset), 0),
-                                    adsk.core.Point3D.create(
-                                        mm_to_cm(crown_right), mm_to_cm(gap_center_y + line_offset), 0)
-                                )
-                                line.isConstruction = True
-
-            except (ValueError, IndexError):
-                # If per-ring config is invalid, don't draw fold-lock lines
-                pass
+        # Geometry, line batching and coincident points live in stent_sketch (no Fusion imports)
+        frame = stent_sketch.draw_stent_frame(
+            sketch_backend.FusionSketchBackend(sk), diameter_mm, length_mm, num_rings, crowns_per_ring,
+            height_factors, gap_values, draw_border, draw_gap_centerlines, gap_centerlines_interior_only,
+            draw_crown_peaks, draw_crown_waves, draw_crown_midlines, draw_crown_h_midlines, draw_crown_chord_lines,
+            partial_crown_midlines, draw_crown_mids, partial_crown_mids, create_coincident_points,
+            draw_fold_lock_limits, fold_lock_columns, per_ring_fold_lock_config,
+            balloon_wall_um, chord_values, sagitta_values, log=futil.log)
 
         # Show summary
         if ui:
-            # Count the lines that were actually drawn
-            lines_inside_box = len([r for r in ring_start_lines if 0 < r < total_length]) + \
-                len([r for r in ring_end_lines if 0 < r < total_length]) + \
-                len(gap_centers)
-
-            # Count wave boundary lines and midlines
-            waves = max(1, crowns_per_ring // 2)
-            crown_waves_count = (waves - 1) if draw_crown_waves else 0
-
-            # Count actual midlines drawn (partial or full)
-            if partial_crown_midlines > 0:
-                midlines_count = min(partial_crown_midlines, waves)
-            else:
-                midlines_count = waves if draw_crown_midlines else 0
-
-            h_midlines_count = num_rings if draw_crown_h_midlines else 0
-
-            # Count actual mid lines drawn (partial or full)
-            if partial_crown_mids > 0:
-                # 1 line per crown
-                mids_count = min(partial_crown_mids, crowns_per_ring)
-            else:
-                mids_count = crowns_per_ring if draw_crown_mids else 0
-
-            # Create coincident points at line intersections if requested
-            points_created = 0
-            constraints_created = 0
-            if create_coincident_points:
-                try:
-                    # Collect all horizontal line Y positions
-                    horizontal_lines = []
-
-                    # Add border lines
-                    if draw_border:
-                        horizontal_lines.extend([0.0, total_length])
-
-                    # Add gap centerlines
-                    if draw_gap_centerlines:
-                        horizontal_lines.extend(gap_centers)
-
-                    # Add crown peaks (ring start positions)
-                    if draw_crown_peaks:
-                        # Add both ring start and ring end lines (as drawn in the actual code)
-                        for ring_start in ring_start_lines:
-                            if 0 < ring_start < total_length:  # Only add if inside the box
-                                horizontal_lines.append(ring_start)
-                        for ring_end in ring_end_lines:
-                            if 0 < ring_end < total_length:  # Only add if inside the box
-                                horizontal_lines.append(ring_end)
-
-                    # Add horizontal crown midlines (ring centers)
-                    if draw_crown_h_midlines:
-                        horizontal_lines.extend(ring_centers)
-
-                    # Collect all vertical line X positions
-                    vertical_lines = []
-
-                    # Add border lines
-                    if draw_border:
-                        vertical_lines.extend([0.0, width_mm])
-
-                    # Add wave boundary lines
-                    if draw_crown_waves:
-                        waves = max(1, crowns_per_ring // 2)
-                        wave_width = width_mm / waves
-                        # Only add lines that are actually drawn (between waves, not at borders)
-                        for w in range(1, waves):
-                            x = w * wave_width
-                            vertical_lines.append(x)
-
-                    # Add wave midlines (full or partial)
-                    if draw_crown_midlines or partial_crown_midlines > 0:
-                        waves = max(1, crowns_per_ring // 2)
-                        wave_width = width_mm / waves
-                        midlines_to_draw = partial_crown_midlines if partial_crown_midlines > 0 else waves
-                        for w in range(min(midlines_to_draw, waves)):
-                            midline_x = (w + 0.5) * wave_width
-                            vertical_lines.append(midline_x)
-
-                    # Add crown mid lines (full or partial)
-                    if draw_crown_mids or partial_crown_mids > 0:
-                        crown_width = width_mm / crowns_per_ring
-                        mids_to_draw = partial_crown_mids if partial_crown_mids > 0 else crowns_per_ring
-                        for crown in range(min(mids_to_draw, crowns_per_ring)):
-                            mid_x = (crown + 0.5) * crown_width
-                            vertical_lines.append(mid_x)
-
-                    # Create points at all intersections and add coincident constraints
-                    created_points = []
-
-                    # Debug: log which horizontal lines we're collecting
-                    debug_info = []
-                    debug_info.append(f"Horizontal lines collected:")
-                    if draw_border:
-                        debug_info.append(f"  Border: 0.0, {total_length}")
-                    if draw_gap_centerlines:
-                        debug_info.append(
-                            f"  Gap centers: {[f'{g:.3f}' for g in gap_centers]}")
-                    if draw_crown_peaks:
-                        ring_starts_inside = [
-                            rs for rs in ring_start_lines if 0 < rs < total_length]
-                        ring_ends_inside = [
-                            re for re in ring_end_lines if 0 < re < total_length]
-                        debug_info.append(
-                            f"  Ring starts: {[f'{rs:.3f}' for rs in ring_starts_inside]}")
-                        debug_info.append(
-                            f"  Ring ends: {[f'{re:.3f}' for re in ring_ends_inside]}")
-                    if draw_crown_h_midlines:
-                        debug_info.append(
-                            f"  Ring centers: {[f'{rc:.3f}' for rc in ring_centers]}")
-
-                    debug_info.append(f"Vertical lines collected:")
-                    if draw_border:
-                        debug_info.append(f"  Border: 0.0, {width_mm}")
-                    if draw_crown_waves:
-                        crown_width = width_mm / crowns_per_ring
-                        wave_lines = [
-                            crown * crown_width for crown in range(1, crowns_per_ring)]
-                        debug_info.append(
-                            f"  Crown waves: {[f'{w:.3f}' for w in wave_lines]}")
-
-                    futil.log('\n'.join(debug_info))
-
-                    for h_y in horizontal_lines:
-                        for v_x in vertical_lines:
-                            # Convert to cm for Fusion (Fusion uses cm internally)
-                            point_x_cm = v_x / 10.0
-                            point_y_cm = h_y / 10.0
-                            point = adsk.core.Point3D.create(
-                                point_x_cm, point_y_cm, 0)
-                            sketch_point = sk.sketchPoints.add(point)
-                            created_points.append((sketch_point, v_x, h_y))
-                            points_created += 1
-
-                    # Create coincident constraints between points and lines
-                    constraints_created = 0
-                    try:
-                        constraints = sk.geometricConstraints
-
-                        # Sort lines into horizontal and vertical for easier matching
-                        horizontal_sketch_lines = []
-                        vertical_sketch_lines = []
-
-                        for line in sk.sketchCurves.sketchLines:
-                            start_pt = line.startSketchPoint.geometry
-                            end_pt = line.endSketchPoint.geometry
-
-                            # Check if horizontal (Y values are the same)
-                            if abs(start_pt.y - end_pt.y) < 0.001:
-                                y_mm = start_pt.y * 10.0  # Convert to mm
-                                horizontal_sketch_lines.append((line, y_mm))
-
-                            # Check if vertical (X values are the same)
-                            elif abs(start_pt.x - end_pt.x) < 0.001:
-                                x_mm = start_pt.x * 10.0  # Convert to mm
-                                vertical_sketch_lines.append((line, x_mm))
-
-                        for sketch_point, x_mm, y_mm in created_points:
-                            # Find horizontal line at this Y position
-                            for line, line_y_mm in horizontal_sketch_lines:
-                                if abs(line_y_mm - y_mm) < 0.01:  # Tighter tolerance
-                                    try:
-                                        constraint = constraints.addCoincident(
-                                            sketch_point, line)
-                                        constraints_created += 1
-                                    except:
-                                        pass  # Skip if constraint fails
-
-                            # Find vertical line at this X position
-                            for line, line_x_mm in vertical_sketch_lines:
-                                if abs(line_x_mm - x_mm) < 0.01:  # Tighter tolerance
-                                    try:
-                                        constraint = constraints.addCoincident(
-                                            sketch_point, line)
-                                        constraints_created += 1
-                                    except:
-                                        pass  # Skip if constraint fails
-
-                    except Exception as constraint_error:
-                        futil.log(
-                            f'Error creating constraints: {str(constraint_error)}')
-                        constraints_created = 0
-
-                except Exception as e:
-                    futil.log(f'Error creating coincident points: {str(e)}')
-
-            waves = max(1, crowns_per_ring // 2)
+            num_gaps = frame['num_gaps']
             ui.messageBox(
                 f'Stent frame created successfully!\n'
                 f'• Diameter: {diameter_mm:.3f} mm\n'
                 f'• Length: {length_mm:.3f} mm\n'
-                f'• Width (circumference): {width_mm:.3f} mm\n'
+                f'• Width (circumference): {frame["width_mm"]:.3f} mm\n'
                 f'• Rings: {num_rings}\n'
-                f'• Waves per ring: {waves} (crowns: {crowns_per_ring})\n'
-                f'• Scaled ring heights: {[f"{h:.3f}" for h in scaled_ring_heights]}\n'
+                f'• Waves per ring: {frame["waves"]} (crowns: {crowns_per_ring})\n'
+                f'• Scaled ring heights: {[f"{h:.3f}" for h in frame["scaled_ring_heights"]]}\n'
                 f'• Gap values: {[f"{g:.3f}" for g in gap_values[:num_gaps]]} mm\n'
-                f'• Ring scale factor: {ring_scale_factor:.3f}\n'
-                f'• Horizontal lines inside box: {lines_inside_box}\n'
-                f'• Vertical wave boundaries: {crown_waves_count}\n'
-                f'• Vertical wave midlines: {midlines_count}\n'
-                f'• Vertical crown mid lines: {mids_count}\n'
-                f'• Horizontal crown midlines: {h_midlines_count}\n'
-                f'• Coincident points created: {points_created}\n'
-                f'• Coincident constraints created: {constraints_created}'
+                f'• Ring scale factor: {frame["ring_scale_factor"]:.3f}\n'
+                f'• Horizontal lines inside box: {frame["lines_inside_box"]}\n'
+                f'• Vertical wave boundaries: {frame["crown_waves_count"]}\n'
+                f'• Vertical wave midlines: {frame["midlines_count"]}\n'
+                f'• Vertical crown mid lines: {frame["mids_count"]}\n'
+                f'• Horizontal crown midlines: {frame["h_midlines_count"]}\n'
+                f'• Coincident points created: {frame["points_created"]}\n'
+                f'• Coincident constraints created: {frame["constraints_created"]}\n'
+                f'• Coincident constraints failed: {frame["constraints_failed"]}'
             )
 
     except Exception as e:
@@ -1592,6 +951,9 @@ def command_execute(args: adsk.core.CommandEventArgs):
     # Get a reference to your command's inputs.
     inputs = args.command.commandInputs
 
+    # Apply table rebuilds still waiting for the end of a burst of changes
+    recompute.flush(inputs)
+
     # Extract input values with proper casting
     diameter_input = adsk.core.ValueCommandInput.cast(
         inputs.itemById('diameter'))
@@ -1944,236 +1306,18 @@ def command_preview(args: adsk.core.CommandEventArgs):
 # allowing you to modify values of other inputs based on that change.
 def command_input_changed(args: adsk.core.InputChangedEventArgs):
     changed_input = args.input
-    inputs = args.inputs
 
     # General logging for debug.
     futil.log(
         f'{CMD_NAME} Input Changed Event fired from a change to {changed_input.id}')
 
-    # Special check for crown arc inputs
-    if changed_input.id in ['crown_arc_radius', 'crown_arc_height']:
-        futil.log(f'*** CROWN ARC INPUT DETECTED: {changed_input.id} ***')
-
-    # Handle changes to balloon wall thickness or material to update default fold-lock gap
-    if changed_input.id == 'balloon_wall_um' or changed_input.id == 'balloon_material':
-        # Material/wall changes no longer need to update UI since default gap field was removed
-        pass
-
-    # Handle changes to number of rings or crowns to update table
-    elif changed_input.id in ['num_rings', 'crowns_per_ring']:
-        try:
-            command = adsk.core.Command.cast(args.firingEvent.sender)
-            all_inputs = command.commandInputs
-            table_input = adsk.core.TableCommandInput.cast(
-                all_inputs.itemById('per_ring_table'))
-
-            # Always update all tables when number of rings changes
-            # This ensures the table rows stay in sync with the number of rings setting
-            if table_input:
-                update_fold_lock_table(all_inputs)
-                # Sync the fold-lock table data back to the text configuration
-                update_fold_lock_config_from_table(all_inputs)
-
-            # Update height factors and gap configuration tables
-            update_height_factors_table(all_inputs)
-            update_gap_config_table(all_inputs)
-
-            # Update crown arc suggestions when crowns per ring changes
-            if changed_input.id == 'crowns_per_ring':
-                update_crown_arc_suggestions(all_inputs)
-
-            # Update crown arc height when number of rings changes (affects average calculation)
-            if changed_input.id == 'num_rings':
-                average_ring_height = calculate_average_ring_height(all_inputs)
-                height_input = adsk.core.ValueCommandInput.cast(
-                    all_inputs.itemById('crown_arc_height'))
-                if height_input and height_input.value <= 0.1:  # Only if still at default
-                    height_input.value = average_ring_height
-                    update_crown_arc_calculations(all_inputs)
-
-        except Exception as e:
-            app = adsk.core.Application.get()
-            ui = app.userInterface
-            ui.messageBox(
-                f"Error updating tables: {str(e)}", "Debug: Exception")
-
-    # Handle changes to diameter - update crown arc suggestions
-    elif changed_input.id == 'diameter':
-        try:
-            command = adsk.core.Command.cast(args.firingEvent.sender)
-            all_inputs = command.commandInputs
-            update_crown_arc_suggestions(all_inputs)
-        except Exception as e:
-            app = adsk.core.Application.get()
-            ui = app.userInterface
-            ui.messageBox(
-                f"Error updating crown arc suggestions: {str(e)}", "Debug: Exception")
-
-    # Handle changes to crown arc radius, height, or theta - recalculate all parameters
-    elif changed_input.id in ['crown_arc_radius', 'crown_arc_height', 'crown_arc_theta']:
-        try:
-            futil.log(f'Crown arc input changed: {changed_input.id}')
-            update_crown_arc_calculations(inputs)
-            # Update sagitta values since crown arc radius affects sagitta calculation
-            if changed_input.id == 'crown_arc_radius':
-                update_sagitta_values_in_height_table(inputs)
-            futil.log('Crown arc calculations completed')
-        except Exception as e:
-            futil.log(f'Crown arc calculation error: {str(e)}')
-            app = adsk.core.Application.get()
-            ui = app.userInterface
-            ui.messageBox(
-                f"Error updating crown arc calculations: {str(e)}", "Debug: Exception")
-
-    # Handle changes to height factors - update crown arc height with new average
-    elif changed_input.id.startswith('height_ring_') and changed_input.id.endswith('_factor'):
-        try:
-            futil.log(f'Height factor input changed: {changed_input.id}')
-
-            # Calculate new average ring height
-            average_ring_height = calculate_average_ring_height(inputs)
-            futil.log(
-                f'Calculated average ring height: {average_ring_height:.3f}mm')
-
-            # Update crown arc height with the new average (if user hasn't manually modified it significantly)
-            height_input = adsk.core.ValueCommandInput.cast(
-                inputs.itemById('crown_arc_height'))
-            if height_input:
-                # Update if the current value is close to a calculated average (within 50% tolerance)
-                # This prevents overriding user's manual adjustments
-                current_value = height_input.value
-                futil.log(f'Current crown arc height: {current_value:.3f}mm')
-                if abs(current_value - average_ring_height) / max(average_ring_height, 0.1) < 0.5:
-                    futil.log(
-                        'Updating crown arc height with calculated average')
-                    height_input.value = average_ring_height
-                    # Trigger crown arc recalculation
-                    update_crown_arc_calculations(inputs)
-                else:
-                    futil.log(
-                        'Not updating crown arc height - user has made manual adjustments')
-
-        except Exception as e:
-            futil.log(f'Height factor calculation error: {str(e)}')
-            app = adsk.core.Application.get()
-            ui = app.userInterface
-            ui.messageBox(
-                f"Error updating crown arc height from ring heights: {str(e)}", "Debug: Exception")
-
-    # Handle changes to length - update crown arc height with new average
-    elif changed_input.id == 'length':
-        try:
-            futil.log('Length input changed')
-
-            # Calculate new average ring height based on new length
-            average_ring_height = calculate_average_ring_height(inputs)
-
-            # Update crown arc height (only if still close to calculated value)
-            height_input = adsk.core.ValueCommandInput.cast(
-                inputs.itemById('crown_arc_height'))
-            if height_input:
-                current_value = height_input.value
-                if abs(current_value - average_ring_height) / max(average_ring_height, 0.1) < 0.5:
-                    height_input.value = average_ring_height
-                    update_crown_arc_calculations(inputs)
-
-            # Update sagitta values in height table since length affects ring scaling
-            update_sagitta_values_in_height_table(inputs)
-
-        except Exception as e:
-            app = adsk.core.Application.get()
-            ui = app.userInterface
-            ui.messageBox(
-                f"Error updating crown arc height from length change: {str(e)}", "Debug: Exception")
-
-    # Handle changes to fold-lock table inputs and sync with text configuration
-    elif changed_input.id.startswith('table_gap_') and ('_enable' in changed_input.id or '_boxes' in changed_input.id or '_gap' in changed_input.id):
-        try:
-            command = adsk.core.Command.cast(args.firingEvent.sender)
-            all_inputs = command.commandInputs
-            update_fold_lock_config_from_table(all_inputs)
-
-        except Exception as e:
-            app = adsk.core.Application.get()
-            ui = app.userInterface
-            ui.messageBox(
-                f"Error syncing fold-lock table data: {str(e)}", "Debug: Exception")
-
-    # Handle changes to height factors table inputs
-    elif changed_input.id.startswith('height_ring_') and '_factor' in changed_input.id:
-        try:
-            command = adsk.core.Command.cast(args.firingEvent.sender)
-            all_inputs = command.commandInputs
-            config_input = adsk.core.StringValueCommandInput.cast(
-                all_inputs.itemById('height_factors'))
-            num_rings_input = adsk.core.IntegerSpinnerCommandInput.cast(
-                all_inputs.itemById('num_rings'))
-
-            if config_input and num_rings_input:
-                # Collect current table data and update text configuration
-                height_factors = []
-                num_rings = num_rings_input.value
-
-                for ring_num in range(1, num_rings + 1):
-                    try:
-                        factor_input = adsk.core.ValueCommandInput.cast(
-                            all_inputs.itemById(f'height_ring_{ring_num}_factor'))
-                        if factor_input:
-                            height_factors.append(str(factor_input.value))
-                    except:
-                        height_factors.append('1.0')  # Default value
-
-                # Update the text configuration
-                config_input.value = ', '.join(height_factors)
-
-                # Recalculate and update sagitta values for all rings
-                update_sagitta_values_in_height_table(all_inputs)
-
-        except Exception as e:
-            app = adsk.core.Application.get()
-            ui = app.userInterface
-            ui.messageBox(
-                f"Error syncing height factors: {str(e)}", "Debug: Exception")
-
-    # Handle changes to gap configuration table inputs
-    elif changed_input.id.startswith('gap_') and '_value' in changed_input.id:
-        try:
-            command = adsk.core.Command.cast(args.firingEvent.sender)
-            all_inputs = command.commandInputs
-            config_input = adsk.core.StringValueCommandInput.cast(
-                all_inputs.itemById('gap_between_rings'))
-            num_rings_input = adsk.core.IntegerSpinnerCommandInput.cast(
-                all_inputs.itemById('num_rings'))
-
-            if config_input and num_rings_input:
-                # Collect current table data and update text configuration
-                gap_values = []
-                num_rings = num_rings_input.value
-                num_gaps = max(1, num_rings - 1)
-
-                for gap_num in range(1, num_gaps + 1):
-                    try:
-                        gap_input = adsk.core.ValueCommandInput.cast(
-                            all_inputs.itemById(f'gap_{gap_num}_value'))
-                        if gap_input:
-                            gap_values.append(str(gap_input.value))
-                    except:
-                        gap_values.append('0.14')  # Default value
-
-                # Update the text configuration
-                config_input.value = ', '.join(gap_values)
-
-                # Update sagitta values since gaps affect available ring space
-                update_sagitta_values_in_height_table(all_inputs)
-
-        except Exception as e:
-            app = adsk.core.Application.get()
-            ui = app.userInterface
-            ui.messageBox(
-                f"Error syncing gap values: {str(e)}", "Debug: Exception")
+    # Derived tables and hidden configs are only marked dirty here and recomputed
+    # once the burst of changes is over (see RECOMPUTE_NODES)
+    if recompute.changed(changed_input.id):
+        return
 
     # Handle update all heights button
-    elif changed_input.id == 'update_all_heights':
+    if changed_input.id == 'update_all_heights':
         try:
             update_button = adsk.core.BoolValueCommandInput.cast(changed_input)
             if update_button.value:  # Button was clicked
@@ -2200,11 +1344,8 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
                         except:
                             pass  # Skip if input doesn't exist
 
-                    # Trigger update of the hidden text input
-                    update_height_factors_from_table(all_inputs)
-
-                    # Update sagitta values since all height factors changed
-                    update_sagitta_values_in_height_table(all_inputs)
+                    # Hidden text input, sagitta values and crown arc height follow
+                    recompute.mark('height_factors_config')
 
                 # Reset the button
                 update_button.value = False
@@ -2246,8 +1387,8 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
                         except:
                             pass  # Skip if input doesn't exist
 
-                    # Trigger update of the hidden text input
-                    update_gap_config_from_table(all_inputs)
+                    # Hidden text input and sagitta values follow
+                    recompute.mark('gap_config')
 
                 # Reset the button
                 update_button.value = False
@@ -2298,58 +1439,6 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
             ui.messageBox(
                 f"Error processing paste table data: {str(e)}", "Debug: Exception")
 
-    # Handle edits to chord cells: persist to hidden string input immediately
-    elif changed_input.id.startswith('height_ring_') and changed_input.id.endswith('_chord'):
-        try:
-            command = adsk.core.Command.cast(args.firingEvent.sender)
-            all_inputs = command.commandInputs
-            num_rings_input = adsk.core.IntegerSpinnerCommandInput.cast(
-                all_inputs.itemById('num_rings'))
-            chord_config_input = adsk.core.StringValueCommandInput.cast(
-                all_inputs.itemById('chord_values'))
-
-            if num_rings_input and chord_config_input:
-                num_rings = num_rings_input.value
-                chord_values = []
-                for ring_num in range(1, num_rings + 1):
-                    try:
-                        v_in = adsk.core.ValueCommandInput.cast(
-                            all_inputs.itemById(f'height_ring_{ring_num}_chord'))
-                        # store as mm (convert from cm)
-                        chord_values.append(
-                            str(v_in.value * 10.0)) if v_in else chord_values.append('0.0')
-                    except:
-                        chord_values.append('0.0')
-                chord_config_input.value = ', '.join(chord_values)
-        except:
-            pass
-
-    # Handle edits to sagitta cells: persist to hidden string input immediately
-    elif changed_input.id.startswith('height_ring_') and changed_input.id.endswith('_sagitta'):
-        try:
-            command = adsk.core.Command.cast(args.firingEvent.sender)
-            all_inputs = command.commandInputs
-            num_rings_input = adsk.core.IntegerSpinnerCommandInput.cast(
-                all_inputs.itemById('num_rings'))
-            sagitta_config_input = adsk.core.StringValueCommandInput.cast(
-                all_inputs.itemById('sagitta_values'))
-
-            if num_rings_input and sagitta_config_input:
-                num_rings = num_rings_input.value
-                sagitta_values = []
-                for ring_num in range(1, num_rings + 1):
-                    try:
-                        v_in = adsk.core.ValueCommandInput.cast(
-                            all_inputs.itemById(f'height_ring_{ring_num}_sagitta'))
-                        # store as mm (convert from cm)
-                        sagitta_values.append(
-                            str(v_in.value * 10.0)) if v_in else sagitta_values.append('0.0')
-                    except:
-                        sagitta_values.append('0.0')
-                sagitta_config_input.value = ', '.join(sagitta_values)
-        except:
-            pass
-
 
 def parse_and_apply_table_data(inputs, table_text):
     """Parse pasted table data and update chord and sagitta values"""
@@ -3494,9 +2583,6 @@ def update_height_factors_from_table(inputs):
             # Update the text configuration
             config_input.value = ', '.join(height_factors)
 
-            # Update sagitta values since height factors changed
-            update_sagitta_values_in_height_table(inputs)
-
     except Exception as e:
         app = adsk.core.Application.get()
         ui = app.userInterface
@@ -3593,6 +2679,37 @@ def update_per_ring_config_from_table(inputs):
     update_fold_lock_config_from_table(inputs)
 
 
+def update_ring_values_from_table(inputs, column, config_id):
+    """Persist one mm column of the height factors table (chord / sagitta) to its hidden text input"""
+    try:
+        num_rings_input = adsk.core.IntegerSpinnerCommandInput.cast(
+            inputs.itemById('num_rings'))
+        config_input = adsk.core.StringValueCommandInput.cast(
+            inputs.itemById(config_id))
+
+        if num_rings_input and config_input:
+            values = []
+            for ring_num in range(1, num_rings_input.value + 1):
+                try:
+                    v_in = adsk.core.ValueCommandInput.cast(
+                        inputs.itemById(f'height_ring_{ring_num}_{column}'))
+                    # store as mm (convert from cm)
+                    values.append(str(v_in.value * 10.0) if v_in else '0.0')
+                except:
+                    values.append('0.0')
+            config_input.value = ', '.join(values)
+    except:
+        pass
+
+
+def update_chord_config_from_table(inputs):
+    update_ring_values_from_table(inputs, 'chord', 'chord_values')
+
+
+def update_sagitta_config_from_table(inputs):
+    update_ring_values_from_table(inputs, 'sagitta', 'sagitta_values')
+
+
 def update_crown_arc_calculations(inputs):
     """Update crown arc calculations based on user-input radius, height, or theta"""
     try:
@@ -3858,9 +2975,6 @@ def update_crown_arc_suggestions(inputs):
         if theta_input and (theta_input.value <= 1.0 or theta_input.value == 72.0):
             theta_input.value = target_theta
 
-        # Trigger calculation update
-        update_crown_arc_calculations(inputs)
-
     except Exception as e:
         app = adsk.core.Application.get()
         ui = app.userInterface
@@ -3869,6 +2983,80 @@ def update_crown_arc_suggestions(inputs):
                 f'Error updating crown arc suggestions: {str(e)}')
 
 
+def rebuild_fold_lock_table(inputs):
+    """Rebuild the fold-lock table, then drop configuration for gaps that no longer exist"""
+    update_fold_lock_table(inputs)
+    update_fold_lock_config_from_table(inputs)
+
+
+def follow_average_ring_height(inputs):
+    """Keep the crown arc height on the average ring height unless the user has moved it away"""
+    height_input = adsk.core.ValueCommandInput.cast(
+        inputs.itemById('crown_arc_height'))
+    if not height_input:
+        return
+    average_ring_height = calculate_average_ring_height(inputs)
+    current_value = height_input.value
+    # Still at default, or within 50% of the calculated average: not a manual adjustment
+    if current_value <= 0.1 or abs(current_value - average_ring_height) / max(average_ring_height, 0.1) < 0.5:
+        futil.log(
+            f'Updating crown arc height with calculated average {average_ring_height:.3f}mm')
+        height_input.value = average_ring_height
+    else:
+        futil.log(
+            'Not updating crown arc height - user has made manual adjustments')
+
+
+# Derived dialog state, in run order: name, input ids that invalidate it, the
+# nodes it is computed from, and the function that recomputes it.
+# Hidden configs are synced from the table cells before any table is rebuilt from them.
+_Node = recompute_scheduler.Node
+RECOMPUTE_NODES = (
+    _Node('fold_lock_config', ('table_gap_*',), (), update_fold_lock_config_from_table),
+    _Node('height_factors_config', ('height_ring_*_factor',), (), update_height_factors_from_table),
+    _Node('chord_config', ('height_ring_*_chord',), (), update_chord_config_from_table),
+    _Node('sagitta_config', ('height_ring_*_sagitta',), (), update_sagitta_config_from_table),
+    _Node('gap_config', ('gap_*_value',), (), update_gap_config_from_table),
+    _Node('fold_lock_table', ('num_rings', 'crowns_per_ring'), (), rebuild_fold_lock_table),
+    _Node('height_factors_table', ('num_rings',), (), update_height_factors_table),
+    _Node('gap_config_table', ('num_rings',), (), update_gap_config_table),
+    _Node('average_ring_height', ('length',),
+          ('height_factors_config', 'height_factors_table'), follow_average_ring_height),
+    _Node('crown_arc_suggestions', ('diameter', 'crowns_per_ring'), (), update_crown_arc_suggestions),
+    _Node('sagitta_values', ('length', 'crown_arc_radius'),
+          ('height_factors_config', 'gap_config', 'crown_arc_suggestions'),
+          update_sagitta_values_in_height_table),
+    _Node('crown_arc', ('crown_arc_radius', 'crown_arc_height', 'crown_arc_theta'),
+          ('average_ring_height', 'crown_arc_suggestions'), update_crown_arc_calculations),
+)
+
+
+def wake_recompute(delay_s):
+    """Deliver RECOMPUTE_EVENT_ID on the UI thread after delay_s"""
+    timer = threading.Timer(
+        delay_s, lambda: adsk.core.Application.get().fireCustomEvent(RECOMPUTE_EVENT_ID))
+    timer.daemon = True
+    timer.start()
+
+
+def report_recompute_error(node, error):
+    futil.log(f'Error recomputing {node}: {str(error)}')
+    ui.messageBox(f"Error updating {node}: {str(error)}", "Debug: Exception")
+
+
+recompute = recompute_scheduler.RecomputeScheduler(
+    RECOMPUTE_NODES, wake=wake_recompute, on_error=report_recompute_error)
+
+
+def recompute_event_received(args: adsk.core.CustomEventArgs):
+    """UI-thread side of the debounce: recompute once the burst of changes is over"""
+    if dialog_inputs is None:
+        return
+    ran = recompute.poll(dialog_inputs)
+    if ran:
+        futil.log(f'{CMD_NAME} recomputed: {", ".join(ran)}')
+
+
 # This event handler is called when the user interacts with any of the inputs in the dialog
 # which allows you to verify that all of the inputs are valid and enables the OK button.
 def command_validate_input(args: adsk.core.ValidateInputsEventArgs):
@@ -3906,5 +3094,7 @@ def command_destroy(args: adsk.core.CommandEventArgs):
     # General logging for debug.
     futil.log(f'{CMD_NAME} Command Destroy Event')
 
-    global local_handlers
+    global local_handlers, dialog_inputs
     local_handlers = []
+    dialog_inputs = None
+    recompute.cancel()
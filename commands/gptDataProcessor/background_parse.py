@@ -0,0 +1,197 @@
+"""
+background_parse.py
+-------------------
+Parse data files on a worker thread (no Fusion imports).
+
+BackgroundParser runs one job at a time: starting a new file cancels the
+previous job, whose rows stop being read at the next row boundary and whose
+result is discarded even if it finishes. The worker never touches Fusion
+objects or the parsed-file cache; it only calls post(message), which must be
+thread-safe (the command uses Application.fireCustomEvent, whose handler runs
+on the UI thread). Messages are dicts:
+  {"job": id, "state": "progress", "rows": n}
+  {"job": id, "state": "done", "rows": n}
+  {"job": id, "state": "error", "error": "..."}
+The UI thread then collects the result with take(job_id).
+
+With preview_rows set, a streamed result whose parameters already give the
+ring / column counts (num_rings, crowns_per_ring) is only read up to the
+preview: the remaining rows stay unread in a data_io.LazyRows and are parsed
+on demand, e.g. when the command executes. Other results are read in full.
+"""
+import itertools
+import threading
+import time
+
+try:
+    from . import data_io
+except ImportError:
+    import data_io
+
+PROGRESS_INTERVAL_S = 0.1
+
+
+class Cancelled(Exception):
+    pass
+
+
+class ParseJob:
+    def __init__(self, job_id, path):
+        self.id = job_id
+        self.path = path
+        self.key = None
+        self._cancel = threading.Event()
+        self.thread = None
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise Cancelled()
+
+
+def realize_rows(result, job, post, interval=PROGRESS_INTERVAL_S):
+    """Read streamed rows of a loader result into a list, posting progress.
+
+    Sequences (ColumnTable, CellView, lists) are already parsed and returned as-is.
+    """
+    data = result.get("data")
+    if data is None or hasattr(data, "__len__"):
+        return result
+    rows = []
+    last = time.monotonic()
+    try:
+        for row in data:
+            rows.append(row)
+            if job.cancelled:
+                raise Cancelled()
+            now = time.monotonic()
+            if now - last >= interval:
+                last = now
+                post({"job": job.id, "state": "progress", "rows": len(rows)})
+    finally:
+        if hasattr(data, "close"):
+            data.close()
+    return dict(result, data=rows)
+
+
+def previewable(result):
+    """True if a preview of result needs only its first rows (see module docstring)."""
+    data = result.get("data")
+    parameters = result.get("parameters") or {}
+    return (data is not None and not hasattr(data, "__len__")
+            and "num_rings" in parameters and "crowns_per_ring" in parameters)
+
+
+def read_preview(result, job, limit):
+    """Result with its rows wrapped in a LazyRows holding only the first limit rows."""
+    data = data_io.LazyRows(result["data"])
+    rows = 0
+    try:
+        for _ in itertools.islice(data, limit):
+            rows += 1
+            job.check()
+    except BaseException:
+        data.close()
+        raise
+    return dict(result, data=data), rows
+
+
+def close_rows(result):
+    data = result.get("data") if result else None
+    if isinstance(data, data_io.LazyRows):
+        data.close()
+
+
+class BackgroundParser:
+    """Single-slot background parser: the latest start() wins."""
+
+    def __init__(self, loader, post, key=data_io.file_key, progress_interval=PROGRESS_INTERVAL_S,
+                 preview_rows=None):
+        self.loader = loader
+        self.post = post
+        self.key = key
+        self.progress_interval = progress_interval
+        self.preview_rows = preview_rows
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._job = None
+        self._results = {}      # job id -> (job, result, error), filled by the worker
+
+    @property
+    def current(self):
+        with self._lock:
+            return self._job
+
+    def start(self, path):
+        """Cancel the running job (if any) and parse path on a new daemon thread."""
+        with self._lock:
+            if self._job is not None:
+                self._job.cancel()
+            self._next_id += 1
+            job = ParseJob(self._next_id, path)
+            self._job = job
+            self._results.clear()
+        job.thread = threading.Thread(target=self._run, args=(job,),
+                                      name=f"parse-{job.id}", daemon=True)
+        job.thread.start()
+        return job
+
+    def cancel(self):
+        with self._lock:
+            job, self._job = self._job, None
+            self._results.clear()
+        if job is not None:
+            job.cancel()
+        return job
+
+    def _run(self, job):
+        result = None
+        try:
+            # keyed before reading: a file rewritten mid-parse is parsed again later
+            job.key = self.key(job.path)
+            result = self.loader(job.path)
+            if self.preview_rows is not None and previewable(result):
+                result, rows = read_preview(result, job, self.preview_rows)
+            else:
+                result = realize_rows(result, job, self.post, self.progress_interval)
+                job.check()
+                # the (ring, col) index is one more pass over the rows: keep it off the UI thread too
+                if result.get("data") is not None:
+                    data_io.ring_index(result)
+                rows = len(result["data"]) if result.get("data") is not None else 0
+        except Cancelled:
+            close_rows(result)
+            return
+        except Exception as e:
+            close_rows(result)
+            if self._store(job, None, e):
+                self.post({"job": job.id, "state": "error", "error": str(e)})
+            return
+        if self._store(job, result, None):
+            self.post({"job": job.id, "state": "done", "rows": rows})
+        else:
+            close_rows(result)
+
+    def _store(self, job, result, error):
+        with self._lock:
+            if job is not self._job or job.cancelled:
+                return False
+            self._results[job.id] = (job, result, error)
+            return True
+
+    def take(self, job_id):
+        """(job, result, error) of a finished current job, or None if stale / unknown.
+
+        error is the exception raised by the loader (result is then None).
+        """
+        with self._lock:
+            entry = self._results.pop(job_id, None)
+            if entry is None or entry[0] is not self._job:
+                return None
+            return entry
@@ -0,0 +1,246 @@
+"""
+cell_table.py
+-------------
+Columnar (struct-of-arrays) store for derived per-cell geometry.
+
+One float64 array of shape (num_rings, crowns_per_ring) per field, indexed by
+(ring - 1, col). Values are kept unrounded; the legacy per-cell dicts, the
+Cells DataFrame and JSON records are produced from the arrays on demand
+(rounded to 6 decimals like the original deriver output).
+
+cells() gives the legacy list of dicts (a CellList, which also carries the
+table for columnar consumers); view() gives a lazy CellView, which builds the
+dicts only when indexed, iterated (one ring at a time) or serialized. The
+derivation pipelines, v2 JSON and .dbin readers hand out views.
+"""
+from collections.abc import Sequence
+import numpy as np
+
+# Float fields stored as (R, C) arrays, in legacy dict order
+FLOAT_FIELDS = (
+    "x_left_mm", "x_right_mm", "y_top_edge_mm", "y_bottom_edge_mm",
+    "left_cl_x1", "left_cl_x2", "left_cl_y", "right_cl_x1", "right_cl_x2", "right_cl_y",
+    "Rc_mm", "theta_deg", "delta_deg", "chord_center_len_mm", "sagitta_center_mm", "M_mm",
+    "x_keepout_mm", "x_keepout_raw_mm", "x_keepout_max_mm", "alpha_deg",
+)
+# Boolean: left crown sits on the ring top chord (right crown is then on the bottom)
+BOOL_FIELDS = ("left_top",)
+
+# Excel "Cells" sheet columns -> table field (ring/col/positions handled separately)
+SHEET_COLUMNS = (
+    ("ring", None), ("col", None),
+    ("x_left_mm", "x_left_mm"), ("x_right_mm", "x_right_mm"),
+    ("y_top_edge_mm", "y_top_edge_mm"), ("y_bottom_edge_mm", "y_bottom_edge_mm"),
+    ("left_pos", None), ("right_pos", None),
+    ("Rc_mm", "Rc_mm"), ("theta_deg", "theta_deg"), ("delta_deg", "delta_deg"),
+    ("c_center_mm", "chord_center_len_mm"), ("s_center_mm", "sagitta_center_mm"),
+    ("M_mm", "M_mm"), ("x_keepout_mm", "x_keepout_mm"),
+    ("x_keepout_raw_mm", "x_keepout_raw_mm"), ("x_keepout_max_mm", "x_keepout_max_mm"),
+    ("alpha_deg", "alpha_deg"),
+    ("left_cl_x1", "left_cl_x1"), ("left_cl_y", "left_cl_y"), ("left_cl_x2", "left_cl_x2"),
+    ("right_cl_x1", "right_cl_x1"), ("right_cl_y", "right_cl_y"), ("right_cl_x2", "right_cl_x2"),
+)
+
+DECIMALS = 6
+
+
+def legacy_cell(ring, col, v, left_top):
+    """Legacy derived-JSON cell dict from rounded field values v."""
+    return {
+        "ring": ring, "col": col,
+        "x_left_mm": v["x_left_mm"], "x_right_mm": v["x_right_mm"],
+        "y_top_edge_mm": v["y_top_edge_mm"], "y_bottom_edge_mm": v["y_bottom_edge_mm"],
+        "left_crown_pos": "top" if left_top else "bottom",
+        "right_crown_pos": "bottom" if left_top else "top",
+        "left_cl": [[v["left_cl_x1"], v["left_cl_y"]], [v["left_cl_x2"], v["left_cl_y"]]],
+        "right_cl": [[v["right_cl_x1"], v["right_cl_y"]], [v["right_cl_x2"], v["right_cl_y"]]],
+        "Rc_mm": v["Rc_mm"], "theta_deg": v["theta_deg"], "delta_deg": v["delta_deg"],
+        "chord_center_len_mm": v["chord_center_len_mm"],
+        "sagitta_center_mm": v["sagitta_center_mm"],
+        "M_mm": v["M_mm"],
+        "x_keepout_mm": v["x_keepout_mm"], "x_keepout_raw_mm": v["x_keepout_raw_mm"],
+        "x_keepout_max_mm": v["x_keepout_max_mm"],
+        "alpha_deg": v["alpha_deg"],
+    }
+
+
+class CellTable:
+    """Per-cell geometry as one (num_rings, crowns_per_ring) array per field."""
+
+    def __init__(self, num_rings, crowns_per_ring, columns=None):
+        self.num_rings = int(num_rings)
+        self.crowns_per_ring = int(crowns_per_ring)
+        shape = self.shape
+        self.columns = {}
+        for name in FLOAT_FIELDS:
+            self.columns[name] = np.zeros(shape)
+        for name in BOOL_FIELDS:
+            self.columns[name] = np.zeros(shape, dtype=bool)
+        for name, values in (columns or {}).items():
+            self[name] = values
+        # optional unrounded (R, C) intermediates (gaps, H, y_top, ...) set by the deriver
+        self.stack = None
+
+    @property
+    def shape(self):
+        return (self.num_rings, self.crowns_per_ring)
+
+    def __len__(self):
+        return self.num_rings * self.crowns_per_ring
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __setitem__(self, name, values):
+        if name not in self.columns:
+            raise KeyError(f"Unknown cell field '{name}'")
+        dtype = bool if name in BOOL_FIELDS else float
+        self.columns[name] = np.array(np.broadcast_to(np.asarray(values, dtype=dtype), self.shape))
+
+    def copy(self):
+        table = CellTable(self.num_rings, self.crowns_per_ring,
+                          {k: v.copy() for k, v in self.columns.items()})
+        if self.stack is not None:
+            table.stack = {k: np.array(v, copy=True) for k, v in self.stack.items()}
+        return table
+
+    # ---------- Legacy per-cell dicts ----------
+
+    def cell(self, ring, col):
+        """Legacy cell dict for 1-based ring and 0-based col."""
+        r = ring - 1
+        v = {name: round(float(self.columns[name][r, col]), DECIMALS) for name in FLOAT_FIELDS}
+        return legacy_cell(ring, col, v, bool(self.columns["left_top"][r, col]))
+
+    def cells(self):
+        """Ring-major list of legacy cell dicts (plain JSON-serializable list, carrying .table)."""
+        return CellList(self.to_records(), self)
+
+    def view(self):
+        """Lazy ring-major sequence of legacy cell dicts (built on access, a ring at a time)."""
+        return CellView(self)
+
+    def to_records(self):
+        """All legacy cell dicts (ring-major), built column-wise from the arrays."""
+        return self._records(0, self.num_rings)
+
+    def ring_cells(self, ring):
+        """Legacy cell dicts of one 1-based ring, built column-wise."""
+        return self._records(ring - 1, ring)
+
+    def _records(self, r0, r1):
+        C = self.crowns_per_ring
+        cols = {name: np.round(self.columns[name][r0:r1], DECIMALS).ravel().tolist() for name in FLOAT_FIELDS}
+        left_top = self.columns["left_top"][r0:r1].ravel().tolist()
+        return [legacy_cell(r0 + i // C + 1, i % C, {name: col[i] for name, col in cols.items()}, left_top[i])
+                for i in range(len(left_top))]
+
+    # ---------- Tabular export ----------
+
+    def sheet_columns(self, decimals=DECIMALS):
+        """Ordered {column: flat array} for the Excel Cells sheet."""
+        R, C = self.shape
+        left_top = self.columns["left_top"].ravel()
+        out = {}
+        for col_name, field in SHEET_COLUMNS:
+            if col_name == "ring":
+                out[col_name] = np.repeat(np.arange(1, R + 1), C)
+            elif col_name == "col":
+                out[col_name] = np.tile(np.arange(C), R)
+            elif col_name == "left_pos":
+                out[col_name] = np.where(left_top, "top", "bottom")
+            elif col_name == "right_pos":
+                out[col_name] = np.where(left_top, "bottom", "top")
+            else:
+                values = self.columns[field].ravel()
+                out[col_name] = np.round(values, decimals) if decimals is not None else values
+        return out
+
+    def to_dataframe(self, decimals=DECIMALS):
+        """Flat Cells DataFrame (one row per cell, ring-major)."""
+        import pandas as pd  # optional: not needed inside Fusion
+        return pd.DataFrame(self.sheet_columns(decimals))
+
+    @classmethod
+    def wrap(cls, num_rings, crowns_per_ring, columns):
+        """Table adopting existing (R, C) arrays (e.g. memory-mapped) without copying."""
+        table = cls.__new__(cls)
+        table.num_rings = int(num_rings)
+        table.crowns_per_ring = int(crowns_per_ring)
+        table.columns = {name: columns[name] for name in (*FLOAT_FIELDS, *BOOL_FIELDS)}
+        table.stack = None
+        return table
+
+    @classmethod
+    def from_cells(cls, cells):
+        """Build a table from legacy cell dicts (e.g. a derived JSON loaded from disk)."""
+        if isinstance(cells, (CellList, CellView)):
+            return cells.table
+        cells = list(cells)
+        R = max(c["ring"] for c in cells)
+        C = max(c["col"] for c in cells) + 1
+        table = cls(R, C)
+        for c in cells:
+            r, j = c["ring"] - 1, c["col"]
+            (x1, y1), (x2, _) = c["left_cl"]
+            (rx1, ry), (rx2, _) = c["right_cl"]
+            row = dict(c, left_cl_x1=x1, left_cl_x2=x2, left_cl_y=y1,
+                       right_cl_x1=rx1, right_cl_x2=rx2, right_cl_y=ry)
+            for name in FLOAT_FIELDS:
+                table.columns[name][r, j] = row[name]
+            table.columns["left_top"][r, j] = (c["left_crown_pos"] == "top")
+        return table
+
+
+class CellList(list):
+    """Legacy cell dicts as a real list, with the CellTable they were built from as .table."""
+
+    def __init__(self, records=(), table=None):
+        super().__init__(records)
+        self.table = table
+
+
+class CellView(Sequence):
+    """Read-only list-like view yielding legacy cell dicts on access."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("cell index out of range")
+        C = self.table.crowns_per_ring
+        return self.table.cell(index // C + 1, index % C)
+
+    def __iter__(self):
+        for ring in range(1, self.table.num_rings + 1):
+            yield from self.table.ring_cells(ring)
+
+    def __eq__(self, other):
+        if isinstance(other, CellView):
+            other = other.table.to_records()
+        return isinstance(other, (list, tuple)) and self.table.to_records() == list(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"CellView({self.table.num_rings} rings × {self.table.crowns_per_ring} cols)"
+
+
+def json_default(obj):
+    """json.dump hook: serialize lazy cell views and numpy scalars."""
+    if isinstance(obj, CellView):
+        return obj.table.to_records()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
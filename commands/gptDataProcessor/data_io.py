@@ -0,0 +1,691 @@
+"""
+data_io.py
+----------
+File readers for the Process Stent Data command (no Fusion / numpy imports).
+
+JSON files are read incrementally: the top-level object is scanned key by key
+and the row array ("cells" or the older "wave_inputs_by_column") is yielded one
+element at a time, so a preview can stop after the first rows without parsing
+(or even reading) the rest of a large derived file. Rows are typed with
+per-key converters compiled once from the first row.
+
+Excel workbooks are opened read-only and their WaveInputsByColumn sheet is
+iterated as plain value tuples, typed by column converters built once from
+the header row.
+
+CSV files are parsed column-wise into typed arrays (array('q') for ring/col,
+array('d') for everything else) in chunks of rows; empty or non-numeric
+cells stay NaN instead of becoming 0.0.
+
+ParsedFileCache keeps the last few parse results keyed on (path, mtime, size)
+so the dialog's preview and the OK/execute step share one parse; streamed
+rows are wrapped in LazyRows, which keeps what has been parsed so far.
+"""
+import os
+import csv
+import json
+import gzip
+import math
+import itertools
+from collections import OrderedDict
+from array import array
+from collections.abc import Sequence
+
+# Top-level arrays holding one dict per (ring, col) row, in lookup order
+ROW_KEYS = ("cells", "wave_inputs_by_column")
+INT_KEYS = ("ring", "col", "linked_above", "linked_below")
+CHUNK_SIZE = 1 << 16
+
+
+def is_gzip(path):
+    with open(path, "rb") as f:
+        return f.read(2) == b"\x1f\x8b"
+
+
+def open_text(path, mode="rt"):
+    """Text handle on a plain or gzip file (gzip detected by magic on read, suffix on write)."""
+    if "r" in mode:
+        compressed = is_gzip(path)
+    else:
+        compressed = str(path).endswith(".gz")
+    return gzip.open(path, mode, encoding="utf-8") if compressed else open(path, mode, encoding="utf-8")
+
+
+# ---------- Row typing ----------
+
+def to_int(value):
+    try:
+        return int(value) if value is not None else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+def to_float(value):
+    try:
+        return float(value) if value is not None else 0.0
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def keep(value):
+    return value
+
+
+def converter_for(key, sample):
+    """Converter for one row key, chosen from a sample value.
+
+    Integer keys -> int, nested values (chord coordinate arrays, ...) and
+    non-numeric strings ("top"/"bottom") are kept as-is, everything else
+    -> float; null / unparsable values become 0.
+    """
+    if key in INT_KEYS:
+        return to_int
+    if isinstance(sample, (list, dict)):
+        return keep
+    if isinstance(sample, str):
+        try:
+            float(sample)
+        except ValueError:
+            return keep
+    return to_float
+
+
+def compile_converters(row):
+    return {key: converter_for(key, value) for key, value in row.items()}
+
+
+def typed_rows(rows):
+    """Yield rows with values converted by per-key converters built from the first row."""
+    converters = None
+    for row in rows:
+        if converters is None:
+            converters = compile_converters(row)
+        out = {}
+        for key, value in row.items():
+            conv = converters.get(key)
+            if conv is None:
+                conv = converters[key] = converter_for(key, value)
+            out[key] = conv(value)
+        yield out
+
+
+# ---------- Incremental JSON ----------
+
+class _Scanner:
+    """Buffered JSON token reader over a text file handle."""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        if self.eof:
+            return False
+        # grow reads with the buffer so a large value is re-scanned O(log n) times
+        chunk = self.f.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        # drop the consumed prefix so the buffer stays about one value long
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, chars):
+        ch = self.peek()
+        if ch not in chars or not ch:
+            raise ValueError(f"Malformed JSON: expected {chars!r}, found {ch!r}")
+        self.pos += 1
+        return ch
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # a number ending exactly at the buffer end may continue in the next chunk
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def items(self):
+        """Yield elements of the array starting at the current position."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+
+class JsonRowStream:
+    """Lazy reader for a stent data JSON file.
+
+    header holds the top-level keys read so far (everything before the row
+    array, e.g. "meta" and "parameters"); iterating yields the raw row dicts
+    of the first ROW_KEYS array found, then reads the remaining keys into
+    header. key is the row array's name (None if the file has none).
+    """
+
+    def __init__(self, path, row_keys=ROW_KEYS, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.header = {}
+        self.key = None
+        self._file = open_text(path)
+        self._scan = _Scanner(self._file, chunk_size)
+        self._done = False
+        try:
+            self._scan.expect("{")
+            self._read_header(row_keys)
+        except Exception:
+            self.close()
+            raise
+
+    def _next_key(self):
+        """Next top-level key, or None at the closing brace."""
+        ch = self._scan.peek()
+        if ch == "}":
+            self._scan.pos += 1
+            return None
+        if ch == ",":
+            self._scan.pos += 1
+        key = self._scan.value()
+        self._scan.expect(":")
+        return key
+
+    def _read_header(self, row_keys):
+        while True:
+            key = self._next_key()
+            if key is None:
+                self._finish()
+                return
+            # v2 derived files keep "cells" as an object: read it whole
+            if key in row_keys and self._scan.peek() == "[":
+                self.key = key
+                return
+            self.header[key] = self._scan.value()
+
+    def _finish(self):
+        self._done = True
+        self.close()
+
+    def __iter__(self):
+        if self.key is None or self._done:
+            return
+        try:
+            yield from self._scan.items()
+            while True:
+                key = self._next_key()
+                if key is None:
+                    break
+                self.header[key] = self._scan.value()
+            self._done = True
+        finally:
+            self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def parameters(self):
+        return self.header.get("parameters", {})
+
+
+# ---------- Excel (WaveInputsByColumn) ----------
+
+WAVE_SHEET = "WaveInputsByColumn"
+# Excel columns parsed as integers; every other column is parsed as a float
+SHEET_INT_COLUMNS = ("ring", "col")
+
+
+def cell_int(value):
+    if value.__class__ is int:
+        return value
+    try:
+        return int(float(value))
+    except (ValueError, TypeError):
+        return str(value)
+
+
+def cell_float(value):
+    if value.__class__ is float:
+        return value
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return str(value)
+
+
+def sheet_converters(header):
+    """(index, name, converter, missing value) per named header cell, built once."""
+    out = []
+    for i, name in enumerate(header):
+        if name is None or not str(name).strip():
+            continue
+        name = str(name).strip()
+        if name in SHEET_INT_COLUMNS:
+            out.append((i, name, cell_int, 0))
+        else:
+            out.append((i, name, cell_float, 0.0))
+    return tuple(out)
+
+
+def sheet_rows(rows, converters):
+    """Typed row dicts from values_only tuples; rows with an empty first cell are skipped."""
+    for row in rows:
+        if not row or row[0] is None:
+            continue
+        n = len(row)
+        out = {}
+        for i, name, conv, missing in converters:
+            value = row[i] if i < n else None
+            out[name] = missing if value is None else conv(value)
+        yield out
+
+
+def read_xlsx_rows(path, sheet=WAVE_SHEET):
+    """Row generator over one sheet of a workbook, streamed in read-only mode.
+
+    Opening the workbook, finding the sheet and reading the header happen
+    eagerly (so a missing openpyxl or sheet raises here); rows are parsed as
+    they are consumed and the workbook is closed when the generator ends.
+    """
+    import openpyxl  # optional: only needed for .xlsx input
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet not in wb.sheetnames:
+            raise ValueError(f"Sheet '{sheet}' not found in Excel file.")
+        rows = wb[sheet].iter_rows(values_only=True)
+        converters = sheet_converters(next(rows, ()))
+    except Exception:
+        wb.close()
+        raise
+    return _closing(sheet_rows(rows, converters), wb)
+
+
+def _closing(rows, wb):
+    try:
+        yield from rows
+    finally:
+        wb.close()
+
+
+# ---------- CSV ----------
+
+# Column typecodes: "q" integer key columns (rows without them are skipped), "d" float
+CSV_SCHEMA = {"ring": "q", "col": "q"}
+CSV_CHUNK_ROWS = 8192
+NAN = float("nan")
+
+
+def _parse_column(texts, fast, slow):
+    """map(fast) at C speed; per-value slow path only for columns with bad cells."""
+    try:
+        return list(map(fast, texts))
+    except ValueError:
+        pass
+    if fast is float:
+        # empty cells are the usual culprit: read them as "nan" and retry at C speed
+        try:
+            return list(map(float, [t if t else "nan" for t in texts]))
+        except ValueError:
+            pass
+    return list(map(slow, texts))
+
+
+def csv_float(text):
+    try:
+        return float(text)
+    except ValueError:
+        return NAN
+
+
+def csv_int(text):
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return int(float(text))
+        except (ValueError, OverflowError):
+            return None
+
+
+class ColumnTable(Sequence):
+    """Rows stored as one typed array per column; reads as a sequence of row dicts."""
+
+    def __init__(self, columns):
+        self.columns = dict(columns)
+        lengths = {len(col) for col in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("Columns have different lengths")
+        self._len = lengths.pop() if lengths else 0
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("row index out of range")
+        return {name: col[index] for name, col in self.columns.items()}
+
+    def __iter__(self):
+        names = tuple(self.columns)
+        for values in zip(*self.columns.values()):
+            yield dict(zip(names, values))
+
+    def extend(self, other):
+        for name, col in self.columns.items():
+            col.extend(other.columns[name])
+        self._len += len(other)
+
+    def __repr__(self):
+        return f"ColumnTable({self._len} rows × {len(self.columns)} columns)"
+
+
+def _csv_block(header, codes, block):
+    """ColumnTable from one block of csv.reader rows."""
+    n = len(header)
+    if set(map(len, block)) != {n}:
+        block = [(row + [""] * n)[:n] for row in block]
+    raw = list(zip(*block)) if block else [() for _ in header]
+    keys = [i for i, code in enumerate(codes) if code == "q"]
+    parsed = {i: _parse_column(raw[i], int, csv_int) for i in keys}
+    if any(None in vals for vals in parsed.values()):
+        keep_rows = [r for r in range(len(block)) if all(parsed[i][r] is not None for i in keys)]
+        raw = [[col[r] for r in keep_rows] for col in raw]
+        parsed = {i: [vals[r] for r in keep_rows] for i, vals in parsed.items()}
+    columns = {}
+    for i, (name, code) in enumerate(zip(header, codes)):
+        values = parsed[i] if code == "q" else _parse_column(raw[i], float, csv_float)
+        columns[name] = array(code, values)
+    return ColumnTable(columns)
+
+
+def iter_csv_chunks(path, schema=CSV_SCHEMA, chunk_rows=CSV_CHUNK_ROWS):
+    """Yield ColumnTables of up to chunk_rows rows each."""
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        codes = [schema.get(name, "d") for name in header]
+        while True:
+            block = list(itertools.islice(reader, chunk_rows))
+            if not block:
+                return
+            block = [row for row in block if row]
+            if block:
+                yield _csv_block(header, codes, block)
+
+
+def read_csv_columns(path, schema=CSV_SCHEMA, chunk_rows=CSV_CHUNK_ROWS):
+    """Whole CSV file as one ColumnTable (read chunk by chunk)."""
+    table = None
+    for chunk in iter_csv_chunks(path, schema, chunk_rows):
+        if table is None:
+            table = chunk
+        else:
+            table.extend(chunk)
+    return table if table is not None else ColumnTable({})
+
+
+def finite(values):
+    """Values that are not NaN (missing CSV cells)."""
+    return [v for v in values if not (isinstance(v, float) and math.isnan(v))]
+
+
+# ---------- Ring / column index ----------
+
+class RingStats:
+    """Per-ring aggregates of the rows of one ring (NaN cells ignored)."""
+    __slots__ = ("count", "top_min", "bottom_max", "height_max", "gap_below_max",
+                 "width_sum", "width_count")
+
+    def __init__(self):
+        self.count = 0
+        self.top_min = None         # min y_top_border_mm
+        self.bottom_max = None      # max y_bottom_border_mm
+        self.height_max = None      # max wave_height_mm
+        self.gap_below_max = None   # max gap_below_mm (rows without it count as 0)
+        self.width_sum = 0.0        # wave_width_mm, for the mean
+        self.width_count = 0
+
+
+def _num(value):
+    """value if it is a usable number, else None (missing, NaN or text)."""
+    if value is None or value.__class__ is str or value != value:
+        return None
+    return value
+
+
+class RingIndex:
+    """Rows grouped by ring and indexed by (ring, col), with per-ring stats.
+
+    Built in one pass over any row iterable; rows keeps them ring by ring
+    (sorted rings, file order within a ring).
+    """
+
+    def __init__(self, rows):
+        by_ring = {}
+        self.cells = {}
+        self.stats = {}
+        self.has_absolute_positions = False
+        self.has_crown_chords = False
+        for row in rows:
+            ring = row["ring"]
+            ring_rows = by_ring.get(ring)
+            if ring_rows is None:
+                ring_rows = by_ring[ring] = []
+                self.stats[ring] = RingStats()
+            ring_rows.append(row)
+            self.cells[(ring, row.get("col"))] = row
+            st = self.stats[ring]
+            st.count += 1
+            if "y_top_border_mm" in row and "y_bottom_border_mm" in row:
+                self.has_absolute_positions = True
+            if "chord_top_centerline" in row:
+                self.has_crown_chords = True
+            top = _num(row.get("y_top_border_mm"))
+            if top is not None and (st.top_min is None or top < st.top_min):
+                st.top_min = top
+            bottom = _num(row.get("y_bottom_border_mm"))
+            if bottom is not None and (st.bottom_max is None or bottom > st.bottom_max):
+                st.bottom_max = bottom
+            height = _num(row.get("wave_height_mm"))
+            if height is not None and (st.height_max is None or height > st.height_max):
+                st.height_max = height
+            gap = _num(row.get("gap_below_mm", 0))
+            if gap is not None and (st.gap_below_max is None or gap > st.gap_below_max):
+                st.gap_below_max = gap
+            width = _num(row.get("wave_width_mm"))
+            if width is not None:
+                st.width_sum += width
+                st.width_count += 1
+        self.rings = sorted(by_ring)
+        self.rows_by_ring = {ring: by_ring[ring] for ring in self.rings}
+
+    def __len__(self):
+        return sum(st.count for st in self.stats.values())
+
+    @property
+    def rows(self):
+        """All rows, ring by ring."""
+        return [row for ring in self.rings for row in self.rows_by_ring[ring]]
+
+    def cell(self, ring, col):
+        return self.cells.get((ring, col))
+
+    def counts(self):
+        """{ring: number of rows}"""
+        return {ring: self.stats[ring].count for ring in self.rings}
+
+    @property
+    def mean_wave_width(self):
+        total = sum(st.width_sum for st in self.stats.values())
+        n = sum(st.width_count for st in self.stats.values())
+        return total / n if n else 0.0
+
+
+def ring_index(file_data):
+    """RingIndex of a read result, built once and kept in the result dict."""
+    index = file_data.get("index")
+    if index is None:
+        index = file_data["index"] = RingIndex(file_data["data"])
+    return index
+
+
+# ---------- Parsed-file cache ----------
+
+def file_key(path):
+    """(absolute path, mtime, size): changes whenever the file is rewritten."""
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+class LazyRows:
+    """Rows of a one-shot iterator, parsed on demand and kept for re-iteration.
+
+    Every iteration replays the rows parsed so far, then continues the source.
+    A parse error is re-raised on every later iteration instead of silently
+    ending the rows early.
+    """
+
+    def __init__(self, source):
+        self._source = iter(source)
+        self._rows = []
+        self.error = None
+
+    @property
+    def complete(self):
+        return self._source is None and self.error is None
+
+    def __iter__(self):
+        i = 0
+        while True:
+            if i < len(self._rows):
+                yield self._rows[i]
+                i += 1
+                continue
+            if self.error is not None:
+                raise self.error
+            if self._source is None:
+                return
+            try:
+                row = next(self._source)
+            except StopIteration:
+                self._source = None
+                return
+            except Exception as e:
+                self.error = e
+                self.close()
+                raise
+            self._rows.append(row)
+
+    def close(self):
+        """Stop parsing (closes the underlying file); rows parsed so far are kept."""
+        source, self._source = self._source, None
+        if source is not None and hasattr(source, "close"):
+            source.close()
+        if self.error is None and source is not None:
+            self.error = ValueError("Row stream was closed before it was fully read")
+
+
+class ParsedFileCache:
+    """LRU cache of loader(path) results, keyed on file_key(path).
+
+    loader returns a dict whose "data" is a sequence or a one-shot row
+    iterator; iterators are wrapped in LazyRows so every caller sees all rows.
+    A rewritten file (new mtime or size) is parsed again.
+    """
+
+    def __init__(self, loader, max_entries=4):
+        self.loader = loader
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # abspath -> (file_key, result)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, path):
+        entry = self._entries.get(os.path.abspath(path))
+        return entry is not None and entry[0] == file_key(path)
+
+    def get(self, path):
+        key = file_key(path)
+        entry = self._entries.get(key[0])
+        if entry is not None:
+            data = entry[1].get("data")
+            if entry[0] == key and getattr(data, "error", None) is None:
+                self._entries.move_to_end(key[0])
+                self.hits += 1
+                return entry[1]
+            self._drop(key[0])
+        self.misses += 1
+        return self.put(key, self.loader(path))
+
+    def put(self, key, result):
+        """Store a result parsed elsewhere (e.g. on a worker thread) under key = file_key(path)."""
+        result = dict(result)
+        data = result.get("data")
+        if data is not None and not hasattr(data, "__len__") and not isinstance(data, LazyRows):
+            result["data"] = LazyRows(data)
+        if key[0] in self._entries:
+            self._drop(key[0])
+        self._entries[key[0]] = (key, result)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+        return result
+
+    def invalidate(self, path=None):
+        """Forget one file (or everything)."""
+        if path is None:
+            for k in list(self._entries):
+                self._drop(k)
+        elif os.path.abspath(path) in self._entries:
+            self._drop(os.path.abspath(path))
+
+    def release(self):
+        """Close open row streams, dropping entries that were not fully parsed."""
+        for k, (_, result) in list(self._entries.items()):
+            data = result.get("data")
+            if isinstance(data, LazyRows) and not data.complete:
+                self._drop(k)
+
+    def _drop(self, k):
+        _, result = self._entries.pop(k)
+        data = result.get("data")
+        if isinstance(data, LazyRows):
+            data.close()
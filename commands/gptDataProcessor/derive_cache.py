@@ -0,0 +1,184 @@
+"""
+derive_cache.py
+---------------
+Content-addressed on-disk cache of derivation outputs.
+
+An entry is keyed on sha256(code version + canonical spec + output kind):
+  - the canonical spec is the JSON of its "parameters", "gaps_policy" and
+    "links" with sorted keys (the spec's own "meta" does not affect the result),
+  - the code version hashes the deriver's source files, so editing the
+    geometry code never serves stale results,
+  - the output kind separates e.g. JSON+xlsx from a sweep summary row.
+Each entry is a directory <root>/<key[:2]>/<key>/ written to a temporary
+directory and renamed into place, so concurrent writers (sweep workers) never
+see half-written entries. Hits refresh the entry's mtime. Each cache object
+tracks the size of the cache (a scan on its first store, then the size of each
+entry it stores); whenever that exceeds max_bytes the least recently used
+entries are deleted, so the cache never holds more than max_bytes plus the
+entry just stored. Entries written by other processes are picked up by the
+next scan, at the latest every RESCAN_EVERY stores.
+
+Default root: $STENT_DERIVE_CACHE or ~/.cache/stent_derive.
+"""
+import os, json, shutil, hashlib, tempfile
+from pathlib import Path
+
+CACHE_ENV = "STENT_DERIVE_CACHE"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+SPEC_KEYS = ("parameters", "gaps_policy", "links")
+HERE = Path(__file__).resolve().parent
+# Sources whose behaviour the cached outputs depend on
+CODE_FILES = (
+    HERE / "derive_from_linkmatrix.py", HERE / "cell_table.py",
+    HERE / "derived_json.py", HERE / "derived_binary.py",
+    HERE.parents[1] / "crown_geometry.py",
+)
+STAMP = ".complete"
+# evict() scans the whole cache; between scans the size is tracked, with a full
+# rescan every RESCAN_EVERY stores to count other processes' entries
+RESCAN_EVERY = 64
+
+_code_versions = {}
+
+def code_version(files=CODE_FILES):
+    """sha256 over the given source files (memoized per process)."""
+    files = tuple(files)
+    if files not in _code_versions:
+        h = hashlib.sha256()
+        for path in files:
+            h.update(Path(path).name.encode())
+            h.update(Path(path).read_bytes())
+        _code_versions[files] = h.hexdigest()
+    return _code_versions[files]
+
+def canonical_spec(spec):
+    """Stable JSON text of the parts of a minimal spec that determine the derivation."""
+    return json.dumps({k: spec[k] for k in SPEC_KEYS}, sort_keys=True, separators=(",", ":"))
+
+def spec_key(spec, kind="", version=None):
+    h = hashlib.sha256()
+    h.update((version or code_version()).encode())
+    h.update(b"\0" + kind.encode() + b"\0")
+    h.update(canonical_spec(spec).encode())
+    return h.hexdigest()
+
+def default_root():
+    return Path(os.environ.get(CACHE_ENV) or Path.home() / ".cache" / "stent_derive")
+
+def entry_size(entry):
+    """Bytes of the files in one entry directory."""
+    return sum(f.stat().st_size for f in Path(entry).iterdir())
+
+class DeriveCache:
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root) if root is not None else default_root()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._stores = 0
+        self._size = None               # bytes in the cache as of the last scan + own stores
+
+    def entry_dir(self, key):
+        return self.root / key[:2] / key
+
+    def lookup(self, key):
+        """Entry directory for key (marking it recently used), or None."""
+        path = self.entry_dir(key)
+        stamp = path / STAMP
+        if not stamp.exists():
+            self.misses += 1
+            return None
+        try:
+            os.utime(stamp)
+        except OSError:
+            pass
+        self.hits += 1
+        return path
+
+    def store(self, key, write):
+        """Create the entry for key by calling write(directory); returns its final path."""
+        final = self.entry_dir(key)
+        final.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=f".{key[:8]}-", dir=final.parent))
+        try:
+            write(tmp)
+            (tmp / STAMP).touch()
+            try:
+                os.rename(tmp, final)
+            except OSError:
+                # another process stored the same key first: keep theirs
+                if not (final / STAMP).exists():
+                    raise
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+        if self._size is not None:
+            self._size += entry_size(final)
+        if self._size is None or self._size > self.max_bytes or self._stores % RESCAN_EVERY == 0:
+            # never the entry about to be handed to the caller
+            self.evict(keep=(key,))
+        self._stores += 1
+        return final
+
+    def discard(self, key):
+        """Delete the entry for key (e.g. found incomplete after a concurrent eviction)."""
+        shutil.rmtree(self.entry_dir(key), ignore_errors=True)
+
+    def get_or_create(self, key, write):
+        """(entry path, hit) for key, creating the entry with write(directory) on a miss."""
+        path = self.lookup(key)
+        if path is not None:
+            return path, True
+        return self.store(key, write), False
+
+    def entries(self):
+        """[(last use, size in bytes, path)] of every complete entry."""
+        out = []
+        if not self.root.is_dir():
+            return out
+        for stamp in self.root.glob(f"*/*/{STAMP}"):
+            entry = stamp.parent
+            try:
+                out.append((stamp.stat().st_mtime, entry_size(entry), entry))
+            except OSError:
+                continue
+        return out
+
+    def evict(self, max_bytes=None, keep=()):
+        """Delete least recently used entries until the cache fits in max_bytes.
+
+        Entries whose key is in keep are never deleted, even if the cache stays over the limit.
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        keep = set(keep)
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry in entries:
+            if total <= limit:
+                break
+            if entry.name in keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+
+    def clear(self):
+        return self.evict(0)
+
+    # ---------- Small JSON payloads (e.g. sweep summary rows) ----------
+
+    def load_json(self, key, name="value.json"):
+        path = self.lookup(key)
+        if path is None:
+            return None
+        with open(path / name) as f:
+            return json.load(f)
+
+    def save_json(self, key, value, name="value.json"):
+        def write(d):
+            with open(d / name, "w") as f:
+                json.dump(value, f, default=lambda o: o.item())  # numpy scalars
+        return self.store(key, write)
@@ -14,83 +14,226 @@ Read a minimal stent spec (PARAMETERS + LINK MATRIX + GAP POLICY) and derive:
 - export derived JSON + Excel
 
 Usage:
-  python derive_from_linkmatrix.py /path/to/stent_min_spec.json
+  python derive_from_linkmatrix.py /path/to/stent_min_spec.json [--binary] [--v2] [--gzip]
+                                   [--no-cache] [--cache-dir DIR]
 Outputs:
-  derived_[timestamp].json and derived_[timestamp].xlsx in same folder.
+  derived_[timestamp].json and derived_[timestamp].xlsx in same folder as the spec.
+  Results are kept in the derive cache (see derive_cache.py), keyed on the spec's
+  content and the deriver's code, so an unchanged spec is not re-derived: its
+  files are copied out of the cache. --no-cache always derives.
+  --binary adds derived*.dbin, the memory-mappable binary;
+  --v2 writes the JSON in the compact v2 layout (see derived_json.py);
+  --gzip compresses it (derived*.json.gz).
 """
-import sys, json, math
+import sys, json, math, shutil, argparse
 from pathlib import Path
 from datetime import datetime
 import numpy as np
-import pandas as pd
-from openpyxl import load_workbook
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
 from openpyxl.utils import get_column_letter
 
+# Shared crown geometry kernel lives at the add-in root
+ADDIN_DIR = Path(__file__).resolve().parents[2]
+if str(ADDIN_DIR) not in sys.path:
+    sys.path.append(str(ADDIN_DIR))
+import crown_geometry
+try:
+    from .cell_table import CellTable, json_default
+    from . import derived_binary, derived_json, derive_cache
+except ImportError:
+    from cell_table import CellTable, json_default
+    import derived_binary, derived_json, derive_cache
+
 def load_spec(path: Path):
     with open(path, "r") as f:
         return json.load(f)
 
 def gaps_from_policy(link_matrix, gp):
-    # link_matrix shape: 5 x C
-    I, C = link_matrix.shape
-    gaps = np.zeros_like(link_matrix, dtype=float)
-    for i in range(I):
-        for j in range(C):
-            linked = (link_matrix[i, j] == 1)
-            if i in (1,2,3):  # interior interfaces 2-3,3-4,4-5
-                gaps[i, j] = gp["body_linked_mm"] if linked else gp["body_unlinked_mm"]
-            else:
-                # ends: i=0 is 1-2 (prox), i=4 is 5-6 (dist)
-                if linked:
-                    gaps[i, j] = gp["end_linked_mm"]
-                else:
-                    gaps[i, j] = gp["end_unlinked_prox_mm"] if i == 0 else gp["end_unlinked_dist_mm"]
-    return gaps
-
-def solve_delta_quarter(H_full, W_full, w, Rc, max_iter=120):
+    """Gap (mm) per interface × column from the link matrix and gap policy.
+
+    Interface 0 (rings 1-2) is the proximal end, the last interface the distal end,
+    everything in between is body; works for any number of rings.
+    """
+    linked = (np.asarray(link_matrix) == 1)            # (num_rings-1) x C
+    I = linked.shape[0]
+    iface = np.arange(I)[:, None]
+    prox = (iface == 0)
+    dist = (iface == I - 1) & ~prox
+    end_unlinked = np.where(prox, gp["end_unlinked_prox_mm"], gp["end_unlinked_dist_mm"])
+    end_gap = np.where(linked, gp["end_linked_mm"], end_unlinked)
+    body_gap = np.where(linked, gp["body_linked_mm"], gp["body_unlinked_mm"])
+    return np.where(prox | dist, end_gap, body_gap).astype(float)
+
+def stack_positions(factors, scale_col, gaps_mat):
+    """Ring heights H and top/bottom y of every ring, per column: all (num_rings, C).
+
+    Heights and gaps are interleaved (H0, g0, H1, g1, ...) down each column and
+    cumulatively summed, so y_bot[r] / y_top[r+1] are the running stack totals.
+    Leading batch axes of scale_col (..., C) / gaps_mat (..., R-1, C) carry through.
+    """
+    factors = np.asarray(factors, dtype=float)
+    H = factors[:, None] * np.asarray(scale_col, dtype=float)[..., None, :]
+    *batch, R, C = H.shape
+    steps = np.empty((*batch, 2*R - 1, C))
+    steps[..., 0::2, :] = H
+    steps[..., 1::2, :] = gaps_mat
+    totals = np.cumsum(steps, axis=-2)
+    y_bot = totals[..., 0::2, :]
+    y_top = np.zeros(H.shape)
+    y_top[..., 1:, :] = totals[..., 1::2, :]
+    return H, y_top, y_bot
+
+def solve_delta_quarter(H_full, W_full, w, Rc, max_iter=60):
     """Solve tan δ = 2*(Hq - w/2 - Rc*(1 - cos δ)) / (Wq - 2 Rc sin δ) for quarter-rectangle geometry."""
-    Hq = 0.5*H_full
-    Wq = 0.5*W_full
-    p = 0.5*w
-    A = Hq - p
-    # Function
-    def F(d):
-        s = math.sin(d); c = math.cos(d)
-        denom = Wq - 2.0*Rc*s
-        if abs(denom) < 1e-14:
-            denom = 1e-14 if denom >= 0 else -1e-14
-        return math.tan(d) - (2.0*(A - Rc*(1.0 - c))) / denom
-    # bracket + bisection
-    lo, hi = math.radians(5.0), math.radians(89.9)
-    step = math.radians(0.05)
-    # coarse search for sign change or best
-    best_d, best_val = lo, abs(F(lo))
-    prev_d, prev_f = lo, F(lo)
-    bracket = None
-    d = lo + step
-    while d <= hi + 1e-12:
-        fd = F(d)
-        if abs(fd) < best_val: best_val, best_d = abs(fd), d
-        if prev_f * fd < 0: bracket = (prev_d, d); break
-        prev_d, prev_f = d, fd
-        d += step
-    if bracket is None:
-        span = math.radians(5.0)
-        lo = max(math.radians(1e-6), best_d - 0.5*span)
-        hi = min(math.radians(89.9),   best_d + 0.5*span)
-    else:
-        lo, hi = bracket
-    flo = F(lo)
-    for _ in range(max_iter):
-        mid = 0.5*(lo+hi); fm = F(mid)
-        if abs(fm) < 1e-14 or (hi-lo) < 1e-12: return mid
-        if flo * fm < 0.0:
-            hi = mid
-        else:
-            lo = mid; flo = fm
-    return 0.5*(lo+hi)
-
-def compute_from_min_spec(spec: dict):
+    return crown_geometry.solve_tangency(0.5*H_full, 0.5*W_full, w, Rc, max_iter=max_iter).delta
+
+def solve_delta_quarter_batch(H_full, W_full, w, Rc, max_iter=60):
+    """Vectorized solve_delta_quarter over arrays of (H_full, W_full, w, Rc).
+
+    Inputs broadcast against each other; returns δ (radians) with the broadcast shape.
+    """
+    H_full, W_full = np.asarray(H_full, dtype=float), np.asarray(W_full, dtype=float)
+    return crown_geometry.solve_tangency_batch(0.5*H_full, 0.5*W_full, w, Rc, max_iter=max_iter).delta
+
+class CrownSolveCache:
+    """Memo of quarter-wave solves keyed on the quantized (H_full, W_full, w, Rc) tuple.
+
+    Cells sharing a key are solved once; solves run at the quantized representative
+    so results don't depend on which cell filled the entry. Pass one instance to
+    several compute_from_min_spec calls to share solves across specs.
+    """
+    def __init__(self, quantum_mm=1e-9, max_entries=None):
+        self.quantum_mm = float(quantum_mm)
+        self.max_entries = max_entries
+        self._delta = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._delta)
+
+    def clear(self):
+        self._delta.clear()
+        self.hits = self.misses = 0
+
+    def solve(self, H_full, W_full, w, Rc):
+        """δ (radians) for broadcast arrays; returns (delta, TangencySolution of the misses or None, stats)."""
+        arrays = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (H_full, W_full, w, Rc)))
+        shape = arrays[0].shape
+        q = self.quantum_mm
+        keys = np.stack([np.round(a.ravel() / q) for a in arrays], axis=1).astype(np.int64)
+        uniq, inverse = np.unique(keys, axis=0, return_inverse=True)
+        uniq_delta = np.empty(len(uniq))
+        missing = []
+        for i, key in enumerate(map(tuple, uniq.tolist())):
+            d = self._delta.get(key)
+            if d is None:
+                missing.append(i)
+            else:
+                uniq_delta[i] = d
+        sol = None
+        if missing:
+            rep = uniq[missing] * q
+            sol = crown_geometry.solve_tangency_batch(0.5*rep[:, 0], 0.5*rep[:, 1], rep[:, 2], rep[:, 3])
+            uniq_delta[missing] = sol.delta
+            for i, d in zip(missing, sol.delta.tolist()):
+                self._delta[tuple(uniq[i].tolist())] = d
+            if self.max_entries is not None:
+                while len(self._delta) > self.max_entries:
+                    self._delta.pop(next(iter(self._delta)))
+        n = keys.shape[0]
+        stats = {"cells": n, "hits": n - len(missing), "misses": len(missing),
+                 "entries": len(self._delta), "quantum_mm": q}
+        self.hits += stats["hits"]; self.misses += stats["misses"]
+        return uniq_delta[inverse.ravel()].reshape(shape), sol, stats
+
+def solver_stats(sol):
+    """Summary of a batch TangencySolution (None when nothing was solved) for the derived meta block."""
+    if sol is None:
+        return {"method": "closed-form guess + safeguarded Newton", "cells": 0}
+    return {
+        "method": "closed-form guess + safeguarded Newton",
+        "cells": int(np.size(sol.delta)),
+        "iterations_max": int(np.max(sol.iterations, initial=0)),
+        "iterations_total": int(np.sum(sol.iterations)),
+        "evaluations_total": int(np.sum(sol.evaluations)),
+        "residual_max": float(np.max(sol.residual, initial=0.0)),
+        "unconverged_cells": int(np.size(sol.converged) - np.count_nonzero(sol.converged)),
+    }
+
+def cell_geometry(delta, H_full, y_top_chord, y_bot_chord, pitch, L, w, Rc, xk_min, rings, cols):
+    """Crown geometry & dynamic keepout of cells; returns {field: array}.
+
+    Array inputs broadcast against (..., len(rings), len(cols)); rings/cols are the
+    0-based indices of the trailing axes (they set x positions and crown phase).
+    Leading axes (e.g. Monte Carlo samples) pass straight through.
+    """
+    rings = np.asarray(rings, dtype=int); cols = np.asarray(cols, dtype=int)
+    x_left = cols[None, :] * pitch; x_right = (cols[None, :] + 1) * pitch
+    theta = 2.0*delta
+    c_center = 2.0*Rc*np.sin(delta)
+    s_center = Rc*(1.0 - np.cos(delta))
+    # M margin per your spec
+    M = s_center + 0.5*w
+    # Internal vertical edges
+    y_top_edge = np.maximum(0.0, np.minimum(L, y_top_chord + M))
+    y_bottom_edge = np.maximum(0.0, np.minimum(L, y_bot_chord - M))
+    # Phase rule (left/right positions for top/bottom)
+    ring_parity = ((rings[:, None] + 1) % 2 == 1)          # rings 1,3,5 True
+    col_parity = (cols[None, :] % 2 == 0)                  # even columns True
+    left_top = (ring_parity != col_parity)                 # base phase: left bottom, right top
+    yL = np.where(left_top, y_top_chord, y_bot_chord)
+    yR = np.where(left_top, y_bot_chord, y_top_chord)
+    # Tangency-based keepout for a straight leg
+    tan_delta = np.tan(delta)
+    flat = tan_delta < 1e-8
+    xk_raw = np.where(flat, (pitch - 2.0*c_center)/2.0,
+                      0.5*(pitch - 2.0*c_center - H_full/np.where(flat, 1.0, tan_delta)))
+    xk_max = np.maximum(0.0, (pitch - 2.0*c_center)/2.0)
+    xk = np.maximum(xk_min, np.minimum(xk_raw, xk_max))
+    # Chords (centerline) with keepout
+    left_x1 = x_left + xk; left_x2 = x_left + xk + c_center
+    right_x1 = x_right - xk - c_center; right_x2 = x_right - xk
+    # Diagnostics
+    dx = right_x1 - left_x2; dy = yR - yL
+    alpha = np.where(np.abs(dx) > 1e-12, np.arctan2(dy, dx), np.pi/2.0)
+    return {
+        "x_left_mm": x_left, "x_right_mm": x_right,
+        "y_top_edge_mm": y_top_edge, "y_bottom_edge_mm": y_bottom_edge,
+        "left_top": left_top,
+        "left_cl_x1": left_x1, "left_cl_x2": left_x2, "left_cl_y": yL,
+        "right_cl_x1": right_x1, "right_cl_x2": right_x2, "right_cl_y": yR,
+        "Rc_mm": Rc, "theta_deg": np.degrees(theta), "delta_deg": np.degrees(delta),
+        "chord_center_len_mm": c_center, "sagitta_center_mm": s_center, "M_mm": M,
+        "x_keepout_mm": xk, "x_keepout_raw_mm": xk_raw, "x_keepout_max_mm": xk_max,
+        "alpha_deg": np.degrees(alpha),
+    }
+
+def fill_cell_geometry(table, delta, H, y_top, y_bot, pitch, L, w_by_ring, R_factor, xk_min, cols=None, rings=None):
+    """Per-cell crown geometry & dynamic keepout from tangency, vectorized over (ring, col).
+
+    delta/H/y_top/y_bot are (R, C) arrays; only the block rings × cols (0-based,
+    all by default) is written.
+    """
+    R, C = table.shape
+    cols = np.arange(C) if cols is None else np.asarray(cols, dtype=int)
+    rings = np.arange(R) if rings is None else np.asarray(rings, dtype=int)
+    block = np.ix_(rings, cols)
+    w = np.asarray(w_by_ring, dtype=float)[rings, None]
+    values = cell_geometry(delta[block], H[block], y_top[block], y_bot[block], pitch, L,
+                           w, R_factor * w, xk_min, rings, cols)
+    for name, v in values.items():
+        table[name][block] = np.broadcast_to(v, (rings.size, cols.size))
+    return table
+
+def derive_table(spec: dict, cache=None):
+    """(derived, table): the derivation with its cells left in the CellTable.
+
+    derived holds every key of compute_from_min_spec's result but "cells"; no
+    per-cell dicts are built, so sweeps and writers pay only for the arrays.
+    """
     P = spec["parameters"]
     gp = spec["gaps_policy"]
     links = spec["links"]
@@ -105,88 +248,33 @@ def compute_from_min_spec(spec: dict):
 
     circumference = math.pi * D
     pitch = circumference / C
-    link_matrix = np.array(links["matrix"], dtype=int)  # 5 x C
+    link_matrix = np.array(links["matrix"], dtype=int)  # (num_rings-1) x C
     assert link_matrix.shape == (num_rings-1, C)
 
     # 1) Gaps matrix from policy
-    gaps_mat = gaps_from_policy(link_matrix, gp)  # (5 x C)
+    gaps_mat = gaps_from_policy(link_matrix, gp)  # (num_rings-1) x C
     sum_gaps_col = gaps_mat.sum(axis=0)          # (C,)
     Fsum = sum(factors)
     # 2) Per-column scale to close L
     scale_col = (L - sum_gaps_col) / Fsum        # (C,)
 
     # 3) Ring heights & stack positions per column
-    H = np.zeros((num_rings, C))
-    y_top = np.zeros((num_rings, C))
-    y_bot = np.zeros((num_rings, C))
-    for c in range(C):
-        y = 0.0
-        for r in range(num_rings):
-            H[r, c] = factors[r] * scale_col[c]
-            y_top[r, c] = y
-            y += H[r, c]
-            y_bot[r, c] = y
-            if r < num_rings - 1:
-                y += gaps_mat[r, c]
+    H, y_top, y_bot = stack_positions(factors, scale_col, gaps_mat)
 
     # 4) Per-cell geometry & dynamic keepout from tangency
-    cells = []
-    for r in range(num_rings):
-        w = w_by_ring[r]; Rc = R_factor * w
-        for c in range(C):
-            x_left  = c * pitch; x_right = (c+1) * pitch
-            y_top_chord = float(y_top[r, c]); y_bot_chord = float(y_bot[r, c])
-            H_full = float(H[r, c])
-            # Solve crown quarter
-            delta = solve_delta_quarter(H_full, pitch, w, Rc)
-            theta = 2.0*delta
-            c_center = 2.0*Rc*math.sin(delta)
-            s_center = Rc*(1.0 - math.cos(delta))
-            # M margin per your spec
-            M = s_center + 0.5*w
-            # Internal vertical edges
-            y_top_edge = max(0.0, min(L, y_top_chord + M))
-            y_bottom_edge = max(0.0, min(L, y_bot_chord - M))
-            # Phase rule (left/right positions for top/bottom)
-            ring_parity = ((r+1) % 2 == 1)   # rings 1,3,5 True
-            col_parity  = (c % 2 == 0)       # even columns True
-            use_base = (ring_parity == col_parity)
-            left_pos, right_pos = (("bottom","top") if use_base else ("top","bottom"))
-            yL = y_top_chord if left_pos == "top" else y_bot_chord
-            yR = y_top_chord if right_pos == "top" else y_bot_chord
-            # Tangency-based keepout for a straight leg
-            tan_delta = math.tan(delta)
-            if tan_delta < 1e-8:
-                xk_raw = (pitch - 2.0*c_center)/2.0
-            else:
-                xk_raw = 0.5*(pitch - 2.0*c_center - H_full/tan_delta)
-            xk_max = max(0.0, (pitch - 2.0*c_center)/2.0)
-            xk = max(xk_min, min(xk_raw, xk_max))
-            # Chords (centerline) with keepout
-            left_cl  = [[x_left + xk, yL], [x_left + xk + c_center, yL]]
-            right_cl = [[x_right - xk - c_center, yR], [x_right - xk, yR]]
-            # Diagnostics
-            dx = (right_cl[0][0] - left_cl[1][0]); dy = (yR - yL)
-            alpha = math.atan2(dy, dx) if abs(dx) > 1e-12 else (math.pi/2.0)
-            cells.append({
-                "ring": r+1, "col": c,
-                "x_left_mm": round(x_left, 6), "x_right_mm": round(x_right, 6),
-                "y_top_edge_mm": round(y_top_edge, 6), "y_bottom_edge_mm": round(y_bottom_edge, 6),
-                "left_crown_pos": left_pos, "right_crown_pos": right_pos,
-                "left_cl": [[round(left_cl[0][0], 6), round(left_cl[0][1], 6)],
-                            [round(left_cl[1][0], 6), round(left_cl[1][1], 6)]],
-                "right_cl": [[round(right_cl[0][0], 6), round(right_cl[0][1], 6)],
-                             [round(right_cl[1][0], 6), round(right_cl[1][1], 6)]],
-                "Rc_mm": round(Rc, 6), "theta_deg": round(math.degrees(theta), 6),
-                "delta_deg": round(math.degrees(delta), 6),
-                "chord_center_len_mm": round(c_center, 6),
-                "sagitta_center_mm": round(s_center, 6),
-                "M_mm": round(M, 6),
-                "x_keepout_mm": round(xk, 6), "x_keepout_raw_mm": round(xk_raw, 6), "x_keepout_max_mm": round(xk_max, 6),
-                "alpha_deg": round(math.degrees(alpha), 6)
-            })
+    # Crown quarter solved in one batch over the distinct (H, pitch, w, Rc) cells
+    if cache is None:
+        cache = CrownSolveCache()
+    w_col = np.array(w_by_ring)[:, None]
+    delta_mat, sol, cache_stats = cache.solve(H, pitch, w_col, R_factor * w_col)
+    table = CellTable(num_rings, C)
+    fill_cell_geometry(table, delta_mat, H, y_top, y_bot, pitch, L, w_by_ring, R_factor, xk_min)
+    # unrounded intermediates, kept for incremental re-derivation
+    table.stack = {"gaps": gaps_mat, "scale_col": scale_col, "H": H, "y_top": y_top, "y_bot": y_bot,
+                   "delta": delta_mat}
     derived = {
-        "meta": {"generated_at": datetime.now().isoformat(timespec="seconds"), "units": "mm (angles in deg)"},
+        "meta": {"generated_at": datetime.now().isoformat(timespec="seconds"), "units": "mm (angles in deg)",
+                 "solver": solver_stats(sol), "solve_cache": cache_stats},
         "parameters": {
             **P,
             "circumference_mm": circumference,
@@ -201,20 +289,67 @@ def compute_from_min_spec(spec: dict):
         "stack_positions_by_column": [
             {
                 "col": c,
-                "ring_top_y_mm": [float(y_top[r, c]) for r in range(num_rings)],
-                "ring_bottom_y_mm": [float(y_bot[r, c]) for r in range(num_rings)],
+                "ring_top_y_mm": y_top[:, c].tolist(),
+                "ring_bottom_y_mm": y_bot[:, c].tolist(),
                 "y_bottom_of_stent_mm": float(y_bot[-1, c])
             }
             for c in range(C)
         ],
-        "cells": cells
     }
+    return derived, table
+
+def compute_from_min_spec(spec: dict, cache=None):
+    """Derived dict with "cells" as a plain list of legacy dicts (JSON-serializable, carries .table)."""
+    derived, table = derive_table(spec, cache=cache)
+    derived["cells"] = table.cells()
+    return derived
+
+def derive_lazy(spec: dict, cache=None):
+    """Derived dict with "cells" as a lazy CellView: the dicts are built only when serialized."""
+    derived, table = derive_table(spec, cache=cache)
+    derived["cells"] = table.view()
     return derived
 
+SHEET_KEY = [
+    ["Parameters", "Global inputs, derived pitch/circumference."],
+    ["LinkMatrix", "Interfaces×columns: 1=link, 0=no link."],
+    ["GapsMatrix", "Derived from LinkMatrix + GapsPolicy."],
+    ["ColumnScale", "Per-column scale to close L."],
+    ["RingHeights", "Ring heights (mm) by column."],
+    ["Cells", "Per-cell chords, edges, keep-out & geometry."],
+]
+CELLS_WIDTHS = [8,8,14,14,14,14, 10,10, 10,10,10, 12,12,12, 12,12,12, 12,12,12]
+
+# Header cells styled like the original pandas export: bold, thin box, centred at the top
+HEADER_FONT = Font(b=True)
+_THIN = Side(style="thin")
+HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+
+def header_cell(ws, value):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.font = HEADER_FONT
+    cell.border = HEADER_BORDER
+    cell.alignment = HEADER_ALIGNMENT
+    return cell
+
+def write_sheet(wb, name, header, rows, widths):
+    """Stream one sheet of a write-only workbook: widths and freeze pane first, then rows."""
+    ws = wb.create_sheet(name)
+    ws.freeze_panes = "A2"
+    for i, w in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(i)].width = w
+    ws.append([header_cell(ws, h) for h in header])
+    for row in rows:
+        ws.append(row)
+
 def export_excel(derived: dict, out_xlsx: Path):
-    # Build DataFrames
+    """Single-pass write-only export (no pandas frames, no reload for widths/panes)."""
     P = derived["parameters"]
-    df_params = pd.DataFrame([
+    C = P["crowns_per_ring"]
+    col_names = [f"col_{j}" for j in derived["links"]["matrix_cols"]]
+    interfaces = derived["links"]["interfaces"]
+    params = [
         ["diameter_mm", P["diameter_mm"], "mm", "Expanded OD"],
         ["length_mm", P["length_mm"], "mm", "Total axial length"],
         ["num_rings", P["num_rings"], "", "Axial rings"],
@@ -223,92 +358,91 @@ def export_excel(derived: dict, out_xlsx: Path):
         ["pitch_mm", P["pitch_mm"], "mm", "circumference / N"],
         ["R_factor", P["R_factor"], "", "Rc = R_factor × w"],
         ["x_keepout_min_mm", P.get("x_keepout_min_mm", 0.010), "mm", "Min lateral keep-out"],
-    ], columns=["Parameter","Value","Units","Notes"])
-
-    df_links = pd.DataFrame(derived["links"]["matrix"], columns=[f"col_{j}" for j in derived["links"]["matrix_cols"]])
-    df_links.insert(0, "interface", derived["links"]["interfaces"])
-
-    df_gaps = pd.DataFrame(derived["gaps_matrix"], columns=[f"col_{j}" for j in derived["links"]["matrix_cols"]])
-    df_gaps.insert(0, "interface", derived["links"]["interfaces"])
-
-    df_scale = pd.DataFrame({
-        "col": list(range(P["crowns_per_ring"])),
-        "sum_gaps_in_col_mm": derived["sum_gaps_in_col_mm"],
-        "scale_mm_per_factor": derived["scale_mm_per_factor_by_col"],
-    })
-
-    # Ring heights as flat rows
-    rh_rows = []
-    H = derived["ring_heights_mm"]
-    for r_idx, row in enumerate(H, start=1):
-        rh_rows.append({"ring": r_idx, **{f"col_{c}": row[c] for c in range(P["crowns_per_ring"])}})
-    df_rh = pd.DataFrame(rh_rows)
-
-    # Cells table
-    def flat_cell(cell):
-        d = {
-            "ring": cell["ring"], "col": cell["col"],
-            "x_left_mm": cell["x_left_mm"], "x_right_mm": cell["x_right_mm"],
-            "y_top_edge_mm": cell["y_top_edge_mm"], "y_bottom_edge_mm": cell["y_bottom_edge_mm"],
-            "left_pos": cell["left_crown_pos"], "right_pos": cell["right_crown_pos"],
-            "Rc_mm": cell["Rc_mm"], "theta_deg": cell["theta_deg"], "delta_deg": cell["delta_deg"],
-            "c_center_mm": cell["chord_center_len_mm"], "s_center_mm": cell["sagitta_center_mm"],
-            "M_mm": cell["M_mm"], "x_keepout_mm": cell["x_keepout_mm"],
-            "x_keepout_raw_mm": cell["x_keepout_raw_mm"], "x_keepout_max_mm": cell["x_keepout_max_mm"],
-            "alpha_deg": cell["alpha_deg"],
-        }
-        (x1,y1),(x2,y2) = cell["left_cl"]
-        d.update({"left_cl_x1": x1, "left_cl_y": y1, "left_cl_x2": x2})
-        (x1,y1),(x2,y2) = cell["right_cl"]
-        d.update({"right_cl_x1": x1, "right_cl_y": y1, "right_cl_x2": x2})
-        return d
-    df_cells = pd.DataFrame([flat_cell(c) for c in derived["cells"]])
-
-    with pd.ExcelWriter(out_xlsx, engine="openpyxl") as writer:
-        pd.DataFrame([
-            ["Parameters", "Global inputs, derived pitch/circumference."],
-            ["LinkMatrix", "Interfaces×columns: 1=link, 0=no link."],
-            ["GapsMatrix", "Derived from LinkMatrix + GapsPolicy."],
-            ["ColumnScale", "Per-column scale to close L."],
-            ["RingHeights", "Ring heights (mm) by column."],
-            ["Cells", "Per-cell chords, edges, keep-out & geometry."],
-        ], columns=["sheet","purpose"]).to_excel(writer, sheet_name="KEY", index=False)
-        df_params.to_excel(writer, sheet_name="Parameters", index=False)
-        df_links.to_excel(writer, sheet_name="LinkMatrix", index=False)
-        df_gaps.to_excel(writer, sheet_name="GapsMatrix", index=False)
-        df_scale.to_excel(writer, sheet_name="ColumnScale", index=False)
-        df_rh.to_excel(writer, sheet_name="RingHeights", index=False)
-        df_cells.to_excel(writer, sheet_name="Cells", index=False)
-
-    wb = load_workbook(out_xlsx)
-    def set_width(wsname, widths):
-        ws = wb[wsname]; ws.freeze_panes = "A2"
-        for i, w in enumerate(widths, start=1):
-            ws.column_dimensions[get_column_letter(i)].width = w
-    set_width("KEY", [24, 84])
-    set_width("Parameters", [28, 16, 10, 44])
-    set_width("LinkMatrix", [16] + [10]* (1 + derived["parameters"]["crowns_per_ring"]))
-    set_width("GapsMatrix", [16] + [10]* (1 + derived["parameters"]["crowns_per_ring"]))
-    set_width("ColumnScale", [10, 22, 22])
-    set_width("RingHeights", [10] + [14]* (derived["parameters"]["crowns_per_ring"]))
-    set_width("Cells", [8,8,14,14,14,14, 10,10, 10,10,10, 12,12,12, 12,12,12, 12,12,12])
+    ]
+    # Cells sheet rows straight from the columnar store
+    sheet = CellTable.from_cells(derived["cells"]).sheet_columns()
+    cell_rows = zip(*(v.tolist() for v in sheet.values()))
+
+    wb = Workbook(write_only=True)
+    write_sheet(wb, "KEY", ["sheet", "purpose"], SHEET_KEY, [24, 84])
+    write_sheet(wb, "Parameters", ["Parameter", "Value", "Units", "Notes"], params, [28, 16, 10, 44])
+    write_sheet(wb, "LinkMatrix", ["interface", *col_names],
+                ([i, *row] for i, row in zip(interfaces, derived["links"]["matrix"])), [16] + [10] * (1 + C))
+    write_sheet(wb, "GapsMatrix", ["interface", *col_names],
+                ([i, *row] for i, row in zip(interfaces, derived["gaps_matrix"])), [16] + [10] * (1 + C))
+    write_sheet(wb, "ColumnScale", ["col", "sum_gaps_in_col_mm", "scale_mm_per_factor"],
+                zip(range(C), derived["sum_gaps_in_col_mm"], derived["scale_mm_per_factor_by_col"]),
+                [10, 22, 22])
+    write_sheet(wb, "RingHeights", ["ring", *[f"col_{c}" for c in range(C)]],
+                ([r, *row] for r, row in enumerate(derived["ring_heights_mm"], start=1)), [10] + [14] * C)
+    write_sheet(wb, "Cells", list(sheet), cell_rows, CELLS_WIDTHS)
     wb.save(out_xlsx)
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python derive_from_linkmatrix.py /path/to/stent_min_spec.json")
-        sys.exit(1)
-    in_path = Path(sys.argv[1]).expanduser().resolve()
+# Flags that change the files written (and so the cache entry)
+OUTPUT_FLAGS = ("--binary", "--v2", "--gzip")
+
+def output_paths(out_dir, stem, flags):
+    """{kind: path} of the files main() writes for these flags."""
+    paths = {"json": out_dir / f"{stem}.json{'.gz' if '--gzip' in flags else ''}",
+             "xlsx": out_dir / f"{stem}.xlsx"}
+    if "--binary" in flags:
+        paths["dbin"] = out_dir / f"{stem}{derived_binary.SUFFIX}"
+    return paths
+
+def write_outputs(derived, out_dir, stem, flags):
+    paths = output_paths(out_dir, stem, flags)
+    if "--v2" in flags:
+        derived_json.write_derived_v2(derived, paths["json"])
+    else:
+        with derived_json.open_text(paths["json"], "wt") as f:
+            json.dump(derived, f, indent=2, default=json_default)
+    export_excel(derived, paths["xlsx"])
+    if "dbin" in paths:
+        derived_binary.write_derived_binary(derived, paths["dbin"])
+    return paths
+
+def derive_cached(spec, flags=(), cache=None):
+    """({kind: path}, hit) of the derivation outputs of spec, from the derive cache if present."""
+    cache = cache if cache is not None else derive_cache.DeriveCache()
+    kind = "derive:" + ",".join(sorted(f for f in flags if f in OUTPUT_FLAGS))
+    key = derive_cache.spec_key(spec, kind)
+    write = lambda d: write_outputs(derive_lazy(spec), d, "derived", flags)
+    entry, hit = cache.get_or_create(key, write)
+    paths = output_paths(entry, "derived", flags)
+    if hit and not all(p.exists() for p in paths.values()):
+        # evicted by another process since the lookup
+        cache.discard(key)
+        entry, hit = cache.store(key, write), False
+        paths = output_paths(entry, "derived", flags)
+    return paths, hit
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Derive a minimal stent spec to derived JSON + Excel.")
+    ap.add_argument("spec", help="minimal spec JSON")
+    ap.add_argument("--binary", action="store_true", help="also write the memory-mappable derived*.dbin")
+    ap.add_argument("--v2", action="store_true", help="write the JSON in the compact v2 layout")
+    ap.add_argument("--gzip", action="store_true", help="gzip the JSON (derived*.json.gz)")
+    ap.add_argument("--no-cache", action="store_true", help="always derive, ignoring the derive cache")
+    ap.add_argument("--cache-dir", default=None, help="derive cache directory (default: $%s or ~/.cache/stent_derive)"
+                    % derive_cache.CACHE_ENV)
+    args = ap.parse_args(argv)
+    in_path = Path(args.spec).expanduser().resolve()
     spec = load_spec(in_path)
-    derived = compute_from_min_spec(spec)
+    flags = {f"--{name}" for name in ("binary", "v2", "gzip") if getattr(args, name)}
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    out_json = in_path.parent / f"derived_{ts}.json"
-    out_xlsx = in_path.parent / f"derived_{ts}.xlsx"
-    with open(out_json, "w") as f:
-        json.dump(derived, f, indent=2)
-    export_excel(derived, out_xlsx)
-    print(str(out_json))
-    print(str(out_xlsx))
+    if args.no_cache:
+        paths = write_outputs(derive_lazy(spec), in_path.parent, f"derived_{ts}", flags)
+    else:
+        cached, hit = derive_cached(spec, flags, derive_cache.DeriveCache(args.cache_dir))
+        if hit:
+            print("cached", file=sys.stderr)
+        paths = output_paths(in_path.parent, f"derived_{ts}", flags)
+        # copies, not links: editing an output must not change the cache entry
+        for kind, path in paths.items():
+            shutil.copyfile(cached[kind], path)
+    for path in paths.values():
+        print(str(path))
+    return paths
 
 if __name__ == "__main__":
     main()
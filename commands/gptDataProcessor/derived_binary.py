@@ -0,0 +1,108 @@
+"""
+derived_binary.py
+-----------------
+Compact binary layout for derived results, memory-mappable on load.
+
+  bytes 0-7    magic b"STENTDRV"
+  bytes 8-15   header length (uint64, little endian)
+  header       UTF-8 JSON: format version, meta, parameters, links, gaps_policy
+               and an "arrays" index {name: {"dtype", "shape", "offset"}}
+  arrays       raw C-order little-endian data; the data section starts at the first
+               64-byte boundary after the header and every array offset (relative
+               to it) is 64-byte aligned
+
+Arrays: gaps_matrix, sum_gaps_in_col_mm, scale_mm_per_factor_by_col,
+ring_heights_mm, ring_top_y_mm / ring_bottom_y_mm (ring × column stack positions)
+and one "cells/<field>" (num_rings × crowns_per_ring) array per CellTable field.
+Cell values are stored unrounded. Only numpy is needed, so the data processor
+can load it inside Fusion.
+"""
+import json
+from pathlib import Path
+import numpy as np
+
+try:
+    from .cell_table import CellTable, FLOAT_FIELDS, BOOL_FIELDS
+except ImportError:
+    from cell_table import CellTable, FLOAT_FIELDS, BOOL_FIELDS
+
+MAGIC = b"STENTDRV"
+FORMAT_VERSION = 1
+ALIGN = 64
+SUFFIX = ".dbin"
+HEADER_KEYS = ("meta", "parameters", "links", "gaps_policy")
+
+def _aligned(n):
+    return -(-n // ALIGN) * ALIGN
+
+def derived_arrays(derived):
+    """Ordered {name: array} of everything stored as binary."""
+    table = CellTable.from_cells(derived["cells"])
+    stack = derived["stack_positions_by_column"]
+    arrays = {
+        "gaps_matrix": np.asarray(derived["gaps_matrix"], dtype=float).reshape(-1, table.crowns_per_ring),
+        "sum_gaps_in_col_mm": np.asarray(derived["sum_gaps_in_col_mm"], dtype=float),
+        "scale_mm_per_factor_by_col": np.asarray(derived["scale_mm_per_factor_by_col"], dtype=float),
+        "ring_heights_mm": np.asarray(derived["ring_heights_mm"], dtype=float),
+        "ring_top_y_mm": np.array([c["ring_top_y_mm"] for c in stack], dtype=float).T,
+        "ring_bottom_y_mm": np.array([c["ring_bottom_y_mm"] for c in stack], dtype=float).T,
+    }
+    for name in (*FLOAT_FIELDS, *BOOL_FIELDS):
+        arrays[f"cells/{name}"] = table[name]
+    return arrays
+
+def write_derived_binary(derived, path):
+    """Write derived (from compute_from_min_spec or a loaded derived JSON) to path."""
+    arrays = {k: np.ascontiguousarray(v, dtype=v.dtype.newbyteorder("<")) for k, v in derived_arrays(derived).items()}
+    index, offset = {}, 0
+    for k, v in arrays.items():
+        index[k] = {"dtype": v.dtype.str, "shape": list(v.shape), "offset": offset}
+        offset = _aligned(offset + v.nbytes)
+    header = {"format": "stent-derived-binary", "version": FORMAT_VERSION,
+              **{k: derived[k] for k in HEADER_KEYS}, "arrays": index}
+    text = json.dumps(header, default=float).encode()
+    data_start = _aligned(16 + len(text))
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(text)).astype("<u8").tobytes())
+        f.write(text)
+        for k, v in arrays.items():
+            f.write(b"\0" * (data_start + index[k]["offset"] - f.tell()))
+            f.write(v.tobytes())
+    return Path(path)
+
+def read_header(path):
+    """(header dict, absolute offset of the data section)."""
+    with open(path, "rb") as f:
+        if f.read(8) != MAGIC:
+            raise ValueError(f"{path} is not a derived binary file")
+        n = int(np.frombuffer(f.read(8), dtype="<u8")[0])
+        header = json.loads(f.read(n).decode())
+    if header.get("version", 0) > FORMAT_VERSION:
+        raise ValueError(f"Unsupported derived binary version {header.get('version')}")
+    return header, _aligned(16 + n)
+
+def read_derived_binary(path, mmap=True):
+    """Derived dict from a binary file; arrays are read-only memory maps (copies if mmap=False).
+
+    Matrices come back as numpy arrays under their JSON keys, stack positions as
+    ring_top_y_mm / ring_bottom_y_mm (ring × column) and "cells" as a lazy CellView.
+    """
+    header, data_start = read_header(path)
+    if mmap:
+        buf = np.memmap(path, dtype=np.uint8, mode="r")
+    else:
+        buf = np.fromfile(path, dtype=np.uint8)
+    arrays = {}
+    for name, info in header["arrays"].items():
+        dtype = np.dtype(info["dtype"]); shape = tuple(info["shape"])
+        nbytes = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+        start = data_start + info["offset"]
+        arrays[name] = buf[start:start + nbytes].view(dtype).reshape(shape)
+    derived = {k: header[k] for k in HEADER_KEYS}
+    P = derived["parameters"]
+    cells = {name[len("cells/"):]: a for name, a in arrays.items() if name.startswith("cells/")}
+    table = CellTable.wrap(P["num_rings"], P["crowns_per_ring"], cells)
+    derived.update({name: a for name, a in arrays.items() if not name.startswith("cells/")})
+    derived["cells"] = table.view()
+    return derived
@@ -0,0 +1,133 @@
+"""
+derived_json.py
+---------------
+Compact v2 layout for derived JSON, written section by section.
+
+v1 (json.dump of the derived dict) repeats every field in each cell dict and
+pretty-prints with indent=2. v2 keeps the same top-level sections but stores
+cells as parallel arrays, with fields that are constant along a ring (e.g. Rc_mm)
+or a column (x_left_mm / x_right_mm) stored once:
+
+  {"format": "stent-derived", "version": 2,
+   "meta": ..., "parameters": ..., "links": ..., "gaps_policy": ...,
+   "gaps_matrix": ..., "sum_gaps_in_col_mm": ..., "scale_mm_per_factor_by_col": ...,
+   "ring_heights_mm": ...,
+   "stack_positions": {"ring_top_y_mm": [[...]], "ring_bottom_y_mm": [[...]]},   # ring × column
+   "cells": {"shape": [R, C], "order": "ring-major", "decimals": 6,
+             "per_ring": {field: [R values]}, "per_col": {field: [C values]},
+             "per_cell": {field: [R*C values]}}}
+
+A ".gz" path writes gzip. load_derived_json() reads v1 or
+v2, plain or gzip, and returns the derived dict with lazy "cells".
+
+Usage (convert an archive file):
+  python derived_json.py derived_x.json [-o derived_x.v2.json.gz]
+"""
+import json, argparse
+from pathlib import Path
+import numpy as np
+
+try:
+    from .cell_table import CellTable, FLOAT_FIELDS, BOOL_FIELDS, DECIMALS
+    from .data_io import open_text
+except ImportError:
+    from cell_table import CellTable, FLOAT_FIELDS, BOOL_FIELDS, DECIMALS
+    from data_io import open_text
+
+FORMAT = "stent-derived"
+VERSION = 2
+HEADER_KEYS = ("meta", "parameters", "links", "gaps_policy", "gaps_matrix",
+               "sum_gaps_in_col_mm", "scale_mm_per_factor_by_col", "ring_heights_mm")
+COMPACT = (",", ":")
+
+def _dump(value):
+    return json.dumps(value, separators=COMPACT, default=float)
+
+def split_fields(table, decimals=DECIMALS):
+    """Rounded field arrays grouped into per_ring / per_col / per_cell lists."""
+    groups = {"per_ring": {}, "per_col": {}, "per_cell": {}}
+    for name in FLOAT_FIELDS:
+        a = np.round(table[name], decimals)
+        if (a == a[:, :1]).all():
+            groups["per_ring"][name] = a[:, 0].tolist()
+        elif (a == a[:1, :]).all():
+            groups["per_col"][name] = a[0, :].tolist()
+        else:
+            groups["per_cell"][name] = a.ravel().tolist()
+    for name in BOOL_FIELDS:
+        groups["per_cell"][name] = table[name].ravel().astype(int).tolist()
+    return groups
+
+def write_derived_v2(derived, path):
+    """Stream derived (dict from compute_from_min_spec or a v1 JSON) to path as v2; gzip if path ends in .gz."""
+    path = Path(path)
+    table = CellTable.from_cells(derived["cells"])
+    stack = derived["stack_positions_by_column"]
+    with open_text(path, "wt") as f:
+        f.write(f'{{"format":"{FORMAT}","version":{VERSION}')
+        for key in HEADER_KEYS:
+            f.write(f',\n"{key}":')
+            f.write(_dump(derived[key]))
+        f.write(',\n"stack_positions":{"ring_top_y_mm":')
+        f.write(_dump([list(r) for r in zip(*(c["ring_top_y_mm"] for c in stack))]))
+        f.write(',"ring_bottom_y_mm":')
+        f.write(_dump([list(r) for r in zip(*(c["ring_bottom_y_mm"] for c in stack))]))
+        f.write('},\n"cells":{')
+        f.write(f'"shape":[{table.num_rings},{table.crowns_per_ring}],"order":"ring-major","decimals":{DECIMALS}')
+        for group, fields in split_fields(table).items():
+            f.write(f',\n"{group}":{{')
+            for i, (name, values) in enumerate(fields.items()):
+                f.write(("," if i else "") + f'\n"{name}":')
+                f.write(_dump(values))
+            f.write("}")
+        f.write("}}\n")
+    return path
+
+def table_from_v2(cells):
+    """CellTable from the v2 "cells" section."""
+    R, C = cells["shape"]
+    table = CellTable(R, C)
+    for name, values in cells.get("per_ring", {}).items():
+        table[name] = np.asarray(values, dtype=float)[:, None]
+    for name, values in cells.get("per_col", {}).items():
+        table[name] = np.asarray(values, dtype=float)[None, :]
+    for name, values in cells.get("per_cell", {}).items():
+        table[name] = np.asarray(values).reshape(R, C)
+    return table
+
+def expand_v2(doc):
+    """Derived dict (v1 keys, lazy cells) from a parsed v2 document."""
+    if doc.get("format") != FORMAT or doc.get("version") != VERSION:
+        raise ValueError("Not a v2 derived JSON document")
+    derived = {k: doc[k] for k in HEADER_KEYS if k in doc}
+    top = doc["stack_positions"]["ring_top_y_mm"]; bot = doc["stack_positions"]["ring_bottom_y_mm"]
+    derived["stack_positions_by_column"] = [
+        {"col": c, "ring_top_y_mm": [row[c] for row in top], "ring_bottom_y_mm": [row[c] for row in bot],
+         "y_bottom_of_stent_mm": bot[-1][c]}
+        for c in range(len(top[0]) if top else 0)
+    ]
+    derived["cells"] = table_from_v2(doc["cells"]).view()
+    return derived
+
+def json_version(doc):
+    """2 for v2 documents, 1 for everything else (the original derived dict)."""
+    return doc.get("version", 1) if doc.get("format") == FORMAT else 1
+
+def load_derived_json(path):
+    """Derived dict from a v1 or v2 derived JSON (plain or gzip)."""
+    with open_text(path) as f:
+        doc = json.load(f)
+    return expand_v2(doc) if json_version(doc) == 2 else doc
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Convert a derived JSON to the compact v2 layout.")
+    ap.add_argument("input", help="derived JSON (v1 or v2, plain or gzip)")
+    ap.add_argument("-o", "--output", help="output path (default: <input>.v2.json.gz)")
+    args = ap.parse_args(argv)
+    in_path = Path(args.input).expanduser().resolve()
+    out_path = Path(args.output) if args.output else in_path.with_name(in_path.name.split(".")[0] + ".v2.json.gz")
+    out = write_derived_v2(load_derived_json(in_path), out_path)
+    print(str(out), f"{in_path.stat().st_size} -> {out.stat().st_size} bytes")
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ import traceback
 import os
 import sys
 import math
+import itertools
+import json
 
 # Import fusion utilities
 try:
@@ -45,6 +47,32 @@ try:
 except ImportError:
     crown_arc = None
 
+# Streaming file readers and the worker-thread parser (stdlib only)
+try:
+    from . import data_io, background_parse
+except ImportError:
+    import data_io
+    import background_parse
+
+# Binary derived results (.dbin) need numpy
+try:
+    from . import derived_binary
+except ImportError:
+    derived_binary = None
+
+# Compact v2 derived JSON (per-ring / per-column / per-cell arrays) also needs numpy
+try:
+    from . import derived_json
+except ImportError:
+    derived_json = None
+
+# Frame geometry drawn through a sketch backend (shared with the Stent Frame Designer)
+try:
+    from ... import sketch_backend, stent_sketch
+except ImportError:
+    import sketch_backend
+    import stent_sketch
+
 # TODO *** Define the location of the command ***
 # This is done by declaring the space, the tab, and the panel.
 CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_gptDataProcessor'
@@ -72,6 +100,28 @@ ICON_FOLDER = os.path.join(os.path.dirname(
 # they are not released and garbage collected.
 local_handlers = []
 
+# Number of rows parsed for the file preview
+PREVIEW_ROWS = 3
+
+# Parsed files shared by the preview and execute steps, keyed on (path, mtime, size)
+parsed_files = data_io.ParsedFileCache(lambda path: read_excel_data(path))
+
+# Files are parsed on a worker thread, only up to the preview rows when the file's
+# parameters give the ring / column counts; progress and completion come back to the
+# UI thread through this custom event (Application.fireCustomEvent is thread-safe)
+PARSE_EVENT_ID = f'{CMD_ID}_parse'
+
+
+def post_parse_message(message):
+    adsk.core.Application.get().fireCustomEvent(PARSE_EVENT_ID, json.dumps(message))
+
+
+background_parser = background_parse.BackgroundParser(
+    lambda path: read_excel_data(path), post_parse_message, preview_rows=PREVIEW_ROWS)
+
+# Inputs of the open dialog, for parse events (None once the dialog is closed)
+preview_inputs = None
+
 # Global variables
 excel_file_path = ""
 
@@ -91,6 +141,10 @@ def start():
         # Define an event handler for the command created event. It will be called when the button is clicked.
         futil.add_handler(cmd_def.commandCreated, command_created)
 
+        # Background parse progress / completion is delivered on the UI thread
+        parse_event = adsk.core.Application.get().registerCustomEvent(PARSE_EVENT_ID)
+        futil.add_handler(parse_event, parse_event_received)
+
         # ******** Add a button into the UI so the user can run the command. ********
         # Get the target workspace the button will be created in.
         workspace = adsk.core.Application.get(
@@ -144,6 +198,10 @@ def stop():
     command_definition = adsk.core.Application.get(
     ).userInterface.commandDefinitions.itemById(CMD_ID)
 
+    background_parser.cancel()
+    adsk.core.Application.get().unregisterCustomEvent(PARSE_EVENT_ID)
+    parsed_files.invalidate()
+
     # Delete the button command control
     if command_control:
         command_control.deleteMe()
@@ -310,6 +368,9 @@ def command_execute(args: adsk.core.CommandEventArgs):
             'Please select an Excel file first.')
         return
 
+    # A preview parse still running would only duplicate the work below
+    background_parser.cancel()
+
     # Process the Excel file and create the stent frame
     try:
         length_input = adsk.core.ValueCommandInput.cast(
@@ -323,6 +384,7 @@ def command_execute(args: adsk.core.CommandEventArgs):
             create_points=create_points_input.value
         )
     except Exception as e:
+        parsed_files.invalidate(file_path_input.value)
         adsk.core.Application.get().userInterface.messageBox(
             f'Error processing Excel file: {str(e)}')
         futil.log(f'Error in command_execute: {traceback.format_exc()}')
@@ -357,7 +419,7 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
             file_dialog = adsk.core.Application.get().userInterface.createFileDialog()
             file_dialog.isMultiSelectEnabled = False
             file_dialog.title = "Select JSON, CSV, or Excel File"
-            file_dialog.filter = "JSON files (*.json);;CSV files (*.csv);;Excel files (*.xlsx);;All files (*.*)"
+            file_dialog.filter = "JSON files (*.json *.json.gz);;Derived binary (*.dbin);;CSV files (*.csv);;Excel files (*.xlsx);;All files (*.*)"
 
             if file_dialog.showOpen() == adsk.core.DialogResults.DialogOK:
                 file_path = file_dialog.filename
@@ -365,8 +427,8 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
                     inputs.itemById('file_path'))
                 file_path_input.value = file_path
 
-                # Update preview
-                update_data_preview(inputs, file_path)
+                # Update preview (parsed in the background)
+                start_data_preview(inputs, file_path)
                 print(f"DEBUG: File dialog selected: {file_path}")
 
     # Handle file path changes
@@ -374,7 +436,59 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
         file_path_input = adsk.core.StringValueCommandInput.cast(changed_input)
         if file_path_input.value and os.path.exists(file_path_input.value):
             print(f"DEBUG: File path changed to: {file_path_input.value}")
-            update_data_preview(inputs, file_path_input.value)
+            start_data_preview(inputs, file_path_input.value)
+
+
+def start_data_preview(inputs, file_path):
+    """Parse file_path on a worker thread; the preview is built when it finishes"""
+    global preview_inputs
+    preview_inputs = inputs
+
+    # Already parsed (and unchanged on disk): build the preview right away
+    if file_path in parsed_files:
+        background_parser.cancel()
+        update_data_preview(inputs, file_path)
+        return
+
+    status_text = adsk.core.TextBoxCommandInput.cast(inputs.itemById('status'))
+    if status_text:
+        status_text.text = f'Reading {os.path.basename(file_path)}...'
+    # Replaces (and cancels) the parse of a previously selected file
+    background_parser.start(file_path)
+
+
+def parse_event_received(args: adsk.core.CustomEventArgs):
+    """UI-thread side of the background parse: live status, then the preview"""
+    try:
+        message = json.loads(args.additionalInfo)
+        job = background_parser.current
+        inputs = preview_inputs
+        # Ignore messages from cancelled parses or a closed dialog
+        if job is None or message.get('job') != job.id or inputs is None:
+            return
+
+        status_text = adsk.core.TextBoxCommandInput.cast(inputs.itemById('status'))
+        if message['state'] == 'progress':
+            if status_text:
+                status_text.text = f'Reading {os.path.basename(job.path)}... {message["rows"]} rows'
+            return
+
+        finished = background_parser.take(job.id)
+        if finished is None:
+            return
+        job, result, error = finished
+        if error is not None:
+            # the worker never calls Fusion: its errors are logged here, on the UI thread
+            futil.log(f'Error reading {job.path}: '
+                      f'{"".join(traceback.format_exception(type(error), error, error.__traceback__))}')
+            if status_text:
+                status_text.text = f'Error: {str(error)}'
+            return
+        parsed_files.put(job.key, result)
+        update_data_preview(inputs, job.path)
+
+    except Exception:
+        futil.log(f'Error in parse_event_received: {traceback.format_exc()}')
 
 
 def update_data_preview(inputs, file_path):
@@ -391,26 +505,37 @@ def update_data_preview(inputs, file_path):
             return
 
         # Try to read Excel file
-        file_data = read_excel_data(file_path)
+        file_data = parsed_files.get(file_path)
         data = file_data['data']
         parameters = file_data.get('parameters', {})
 
-        print(f"DEBUG: Read {len(data)} data rows")
         print(f"DEBUG: Parameters found: {parameters}")
 
-        if data is None or len(data) == 0:
+        # JSON rows are streamed: only the sample rows are parsed when the
+        # file's parameters already give the ring / column counts
+        rows = iter(data) if data is not None else iter(())
+        sample = list(itertools.islice(rows, PREVIEW_ROWS))
+        if not sample:
             if status_text:
                 status_text.text = 'Error: No valid data found.'
             return
 
+        if hasattr(data, '__len__') or 'index' in file_data:
+            # Parsed already: one pass builds the ring index (kept for execute)
+            ring_counts = data_io.ring_index(file_data).counts()
+        elif 'num_rings' in parameters and 'crowns_per_ring' in parameters:
+            rows.close()
+            ring_counts = {ring: int(parameters['crowns_per_ring'])
+                           for ring in range(1, int(parameters['num_rings']) + 1)}
+        else:
+            ring_counts = data_io.ring_index(file_data).counts()
+
         # Create preview text
-        rings = sorted(set(row['ring'] for row in data))
-        cols_per_ring = {}
-        for ring in rings:
-            ring_data = [row for row in data if row['ring'] == ring]
-            cols_per_ring[ring] = len(ring_data)
+        rings = sorted(ring_counts)
+        cols_per_ring = {ring: ring_counts[ring] for ring in rings}
 
-        total_rows = len(data)
+        total_rows = sum(cols_per_ring.values())
+        print(f"DEBUG: {total_rows} data rows")
 
         preview = f"File loaded successfully!\n\n"
         preview += f"Total data rows: {total_rows}\n"
@@ -430,14 +555,14 @@ def update_data_preview(inputs, file_path):
                 preview += f"  Crowns per ring: {parameters['crowns_per_ring']}\n"
 
         # Show first few rows as sample
-        preview += "Sample data (first 3 rows):\n"
-        for i, row in enumerate(data[:3]):
+        preview += f"Sample data (first {PREVIEW_ROWS} rows):\n"
+        for row in sample:
             preview += f"Ring {row['ring']}, Col {row['col']}: "
-            preview += f"height={row['wave_height_mm']:.3f}mm, "
-            preview += f"width={row['wave_width_mm']:.3f}mm\n"
+            preview += f"height={sample_height(row):.3f}mm, "
+            preview += f"width={sample_width(row):.3f}mm\n"
 
-        if len(data) > 3:
-            preview += f"... and {len(data) - 3} more rows"
+        if total_rows > len(sample):
+            preview += f"... and {total_rows - len(sample)} more rows"
 
         if status_text:
             status_text.text = f'Ready to process {total_rows} data points from {len(rings)} rings.'
@@ -514,12 +639,9 @@ def update_data_preview(inputs, file_path):
             else:
                 print("DEBUG: No diameter_mm found in parameters")
                 # Calculate diameter from wave width
-                wave_widths = [float(row.get('wave_width_mm', 0))
-                               for row in data]
-                avg_wave_width = sum(wave_widths) / \
-                    len(wave_widths) if wave_widths else 0
-                cols_in_first_ring = len(
-                    [row for row in data if row['ring'] == rings[0]])
+                index = data_io.ring_index(file_data)
+                avg_wave_width = index.mean_wave_width
+                cols_in_first_ring = index.stats[index.rings[0]].count
                 calculated_diameter = (
                     avg_wave_width * cols_in_first_ring) / math.pi
                 diameter_cm = calculated_diameter / 10
@@ -582,207 +704,111 @@ def update_data_preview(inputs, file_path):
         futil.log(f'Error in update_data_preview: {traceback.format_exc()}')
 
 
+def sample_height(row):
+    """Wave height of a preview row (derived cells only carry the cell edges)"""
+    if 'wave_height_mm' in row:
+        return row['wave_height_mm']
+    return row.get('y_bottom_edge_mm', 0.0) - row.get('y_top_edge_mm', 0.0)
+
+
+def sample_width(row):
+    if 'wave_width_mm' in row:
+        return row['wave_width_mm']
+    return row.get('x_right_mm', 0.0) - row.get('x_left_mm', 0.0)
+
+
+# The readers below run on the background parse worker: no Fusion API calls
+# (futil.log included). Their callers log errors on the UI thread.
 def read_excel_data(file_path):
     """Read Excel data from WaveInputsByColumn sheet"""
+    # For now, provide a simple CSV alternative or require manual data entry
+    # This is a placeholder that would work with CSV data
+
+    # Check if it's a CSV or JSON file instead
+    if file_path.lower().endswith('.csv'):
+        csv_data = read_csv_data(file_path)
+        return {'data': csv_data, 'parameters': {}}
+    elif file_path.lower().endswith(('.json', '.json.gz')):
+        return read_json_data(file_path)
+    elif file_path.lower().endswith('.dbin'):
+        return read_binary_data(file_path)
+
+    # Excel files: WaveInputsByColumn streamed in read-only mode with openpyxl
     try:
-        # For now, provide a simple CSV alternative or require manual data entry
-        # This is a placeholder that would work with CSV data
-
-        # Check if it's a CSV or JSON file instead
-        if file_path.lower().endswith('.csv'):
-            csv_data = read_csv_data(file_path)
-            return {'data': csv_data, 'parameters': {}}
-        elif file_path.lower().endswith('.json'):
-            return read_json_data(file_path)
-
-        # For Excel files, we'll need openpyxl or pandas
-        # Try to import openpyxl
-        try:
-            import openpyxl  # type: ignore
-
-            wb = openpyxl.load_workbook(file_path, data_only=True)
-
-            if 'WaveInputsByColumn' not in wb.sheetnames:
-                raise Exception(
-                    "Sheet 'WaveInputsByColumn' not found in Excel file.")
-
-            ws = wb['WaveInputsByColumn']
-
-            # Get header row
-            headers = []
-            for cell in ws[1]:
-                if cell.value:
-                    headers.append(str(cell.value).strip())
-
-            # Read data rows
-            data = []
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if row[0] is not None:  # Skip empty rows
-                    row_data = {}
-                    for i, header in enumerate(headers):
-                        if i < len(row) and row[i] is not None:
-                            value = row[i]
-                            try:
-                                # Convert to appropriate type
-                                if header in ['ring', 'col']:
-                                    row_data[header] = int(float(str(value)))
-                                else:
-                                    row_data[header] = float(str(value))
-                            except (ValueError, TypeError):
-                                row_data[header] = str(value)
-                        else:
-                            row_data[header] = 0.0 if header not in [
-                                'ring', 'col'] else 0
-                    data.append(row_data)
-
-            wb.close()
-            return {'data': data, 'parameters': {}}
-
-        except ImportError:
-            # If openpyxl is not available, suggest alternative
-            raise Exception(
-                "openpyxl library not found. Please install openpyxl or save your Excel file as CSV format.")
-
-    except Exception as e:
-        futil.log(f'Error reading Excel file: {traceback.format_exc()}')
-        raise
+        rows = data_io.read_xlsx_rows(file_path, data_io.WAVE_SHEET)
+    except ImportError:
+        # If openpyxl is not available, suggest alternative
+        raise Exception(
+            "openpyxl library not found. Please install openpyxl or save your Excel file as CSV format.")
+    return {'data': rows, 'parameters': {}}
 
 
 def read_csv_data(file_path):
-    """Read CSV data as alternative to Excel"""
-    try:
-        import csv
-        data = []
-
-        with open(file_path, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-
-            for row in reader:
-                row_data = {}
-                for key, value in row.items():
-                    try:
-                        if key in ['ring', 'col']:
-                            row_data[key] = int(float(value))
-                        else:
-                            row_data[key] = float(value)
-                    except (ValueError, TypeError):
-                        row_data[key] = 0.0 if key not in [
-                            'ring', 'col'] else 0
-                data.append(row_data)
-
-        return data
+    """Read CSV data as alternative to Excel
 
-    except Exception as e:
-        futil.log(f'Error reading CSV file: {traceback.format_exc()}')
-        raise
+    Numeric columns are parsed into typed arrays; empty cells stay NaN.
+    """
+    return data_io.read_csv_columns(file_path)
+
+
+def read_binary_data(file_path):
+    """Memory-map a derived binary (.dbin) written by derive_from_linkmatrix.py --binary"""
+    if derived_binary is None:
+        raise Exception(
+            "numpy is required to read derived binary files. Please use the JSON output instead.")
+    derived = derived_binary.read_derived_binary(file_path)
+    # Cells stay a lazy view over the mapped arrays; rows are built on access
+    return {'data': derived['cells'], 'parameters': dict(derived['parameters'])}
 
 
 def read_json_data(file_path):
-    """Read JSON data with stent frame structure"""
-    try:
-        import json
-
-        with open(file_path, 'r', encoding='utf-8') as jsonfile:
-            json_data = json.load(jsonfile)
-
-        # Extract parameters for diameter and length
-        parameters = {}
-        if 'parameters' in json_data:
-            parameters = json_data['parameters']
-
-        # Check for new format with 'cells' data
-        if 'cells' in json_data:
-            data = json_data['cells']
-            print("DEBUG: Found new JSON format with 'cells' data")
-
-            # Convert to the expected format if needed
-            formatted_data = []
-            for row in data:
-                # Ensure all numeric values are properly typed
-                row_data = {}
-                for key, value in row.items():
-                    if value is None:
-                        # Handle null values
-                        if key in ['ring', 'col']:
-                            row_data[key] = 0
-                        else:
-                            row_data[key] = 0.0
-                    elif key in ['ring', 'col', 'linked_above', 'linked_below']:
-                        try:
-                            row_data[key] = int(
-                                value) if value is not None else 0
-                        except (ValueError, TypeError):
-                            row_data[key] = 0
-                    elif key in ['chord_top_centerline', 'chord_bottom_centerline', 'chord_top_outer', 'chord_bottom_outer']:
-                        # Keep chord coordinate arrays as-is
-                        row_data[key] = value
-                    else:
-                        try:
-                            row_data[key] = float(
-                                value) if value is not None else 0.0
-                        except (ValueError, TypeError):
-                            row_data[key] = 0.0
-                formatted_data.append(row_data)
-
-            # Return both data and parameters
-            return {
-                'data': formatted_data,
-                'parameters': parameters
-            }
-        # Extract wave_inputs_by_column data (old format)
-        elif 'wave_inputs_by_column' in json_data:
-            data = json_data['wave_inputs_by_column']
-            print("DEBUG: Found old JSON format with 'wave_inputs_by_column' data")
-
-            # Convert to the expected format if needed
-            formatted_data = []
-            for row in data:
-                # Ensure all numeric values are properly typed
-                row_data = {}
-                for key, value in row.items():
-                    if value is None:
-                        # Handle null values
-                        if key in ['ring', 'col']:
-                            row_data[key] = 0
-                        else:
-                            row_data[key] = 0.0
-                    elif key in ['ring', 'col', 'linked_above', 'linked_below']:
-                        try:
-                            row_data[key] = int(
-                                value) if value is not None else 0
-                        except (ValueError, TypeError):
-                            row_data[key] = 0
-                    else:
-                        try:
-                            row_data[key] = float(
-                                value) if value is not None else 0.0
-                        except (ValueError, TypeError):
-                            row_data[key] = 0.0
-                formatted_data.append(row_data)
-
-            # Return both data and parameters
-            return {
-                'data': formatted_data,
-                'parameters': parameters
-            }
-        else:
+    """Read JSON data with stent frame structure
+
+    Rows are returned as a generator: the file is scanned incrementally and
+    each row is typed as it is consumed (plain or gzip, v1 or v2 layout).
+    """
+    stream = data_io.JsonRowStream(file_path)
+    header = stream.header
+
+    # v2 layout (derive_from_linkmatrix.py --v2): cells stored as field arrays
+    if header.get('format') == 'stent-derived' and header.get('version') == 2:
+        if derived_json is None:
             raise Exception(
-                "No 'cells' or 'wave_inputs_by_column' data found in JSON file")
+                "numpy is required to read v2 derived JSON files. Please re-export without --v2.")
+        derived = derived_json.expand_v2(header)
+        print("DEBUG: Found v2 derived JSON format")
+        return {'data': derived['cells'], 'parameters': dict(derived['parameters'])}
+
+    # Extract parameters for diameter and length
+    parameters = stream.parameters
+
+    if stream.key == 'cells':
+        print("DEBUG: Found new JSON format with 'cells' data")
+    elif stream.key == 'wave_inputs_by_column':
+        print("DEBUG: Found old JSON format with 'wave_inputs_by_column' data")
+    else:
+        raise Exception(
+            "No 'cells' or 'wave_inputs_by_column' data found in JSON file")
 
-    except Exception as e:
-        futil.log(f'Error reading JSON file: {traceback.format_exc()}')
-        raise
+    # Return both data and parameters
+    return {
+        'data': data_io.typed_rows(stream),
+        'parameters': parameters
+    }
 
 
 def process_excel_file(file_path, diameter_mm, length_mm=None, draw_construction=True, draw_chords=True, create_points=False):
     """Process the Excel file and create the stent frame sketch"""
     try:
         # Read Excel data (now returns dict with 'data' and 'parameters')
-        file_data = read_excel_data(file_path)
-        data = file_data['data']
+        # Shares the parse (and any rows already read) with the dialog preview
+        file_data = parsed_files.get(file_path)
         parameters = file_data.get('parameters', {})
 
-        if not data:
+        # (ring, col) index and per-ring aggregates, from one pass over the rows
+        index = data_io.ring_index(file_data)
+
+        if not index.rings:
             raise Exception("No data found in Excel file")
 
         # Use diameter from JSON parameters if available, otherwise use provided value
@@ -810,323 +836,22 @@ def process_excel_file(file_path, diameter_mm, length_mm=None, draw_construction
         sketch = root.sketches.add(root.xYConstructionPlane)
 
         # Analyze data structure
-        rings = sorted(set(row['ring'] for row in data))
+        rings = index.rings
+        data = index.rows
 
         # Calculate stent dimensions
-        first_ring_data = [row for row in data if row['ring'] == rings[0]]
-        cols_per_ring = len(first_ring_data)
-
-        # Calculate total length and ring positions from absolute Y positions
-        total_length_mm = 0
-        ring_positions = {}
-
-        # Check if we have absolute Y position data
-        has_absolute_positions = any(
-            'y_top_border_mm' in row and 'y_bottom_border_mm' in row for row in data)
-
-        if has_absolute_positions:
-            print("DEBUG: Using absolute Y positions from data")
-            # Use absolute Y positions from the data
-            for ring_num in rings:
-                ring_data = [row for row in data if row['ring'] == ring_num]
-
-                # Get min top and max bottom for this ring
-                top_positions = [row['y_top_border_mm']
-                                 for row in ring_data if 'y_top_border_mm' in row]
-                bottom_positions = [row['y_bottom_border_mm']
-                                    for row in ring_data if 'y_bottom_border_mm' in row]
-
-                if top_positions and bottom_positions:
-                    start_y = min(top_positions)
-                    end_y = max(bottom_positions)
-                    ring_height = end_y - start_y
-
-                    ring_positions[ring_num] = {
-                        'center_y': start_y + ring_height / 2,
-                        'start_y': start_y,
-                        'end_y': end_y,
-                        'height': ring_height
-                    }
-
-                    # Update total length
-                    total_length_mm = max(total_length_mm, end_y)
-        else:
-            print("DEBUG: Calculating Y positions from wave heights and gaps")
-            # Fallback to calculated positions
-            current_y = 0
-            for ring_num in rings:
-                ring_data = [row for row in data if row['ring'] == ring_num]
-                ring_height = max(row['wave_height_mm'] for row in ring_data)
-
-                ring_positions[ring_num] = {
-                    'center_y': current_y + ring_height / 2,
-                    'start_y': current_y,
-                    'end_y': current_y + ring_height,
-                    'height': ring_height
-                }
-
-                current_y += ring_height
-
-                # Add gap after ring (except for last ring)
-                if ring_num < max(rings):
-                    # Use gap_below from current ring data
-                    gap_below = max(row.get('gap_below_mm', 0)
-                                    for row in ring_data)
-                    current_y += gap_below
-
-            total_length_mm = current_y
-
-        # Use provided length if available, otherwise use calculated length
-        if length_mm is not None:
-            print(
-                f"DEBUG: Using provided length: {length_mm} mm (calculated was: {total_length_mm:.3f} mm)")
-            total_length_mm = length_mm
-        else:
-            print(f"DEBUG: Using calculated length: {total_length_mm:.3f} mm")
-
-        # Calculate width from diameter
-        width_mm = diameter_mm * math.pi
+        cols_per_ring = index.stats[rings[0]].count
 
         # Set sketch name
         sketch.name = f'Stent Frame from Excel - {len(rings)} rings, {cols_per_ring} cols'
 
-        lines = sketch.sketchCurves.sketchLines
-
-        # Convert mm to cm for Fusion API
-        def mm_to_cm(x):
-            return x * 0.1
-
-        # Draw border
-        if draw_construction:
-            # Left border
-            lines.addByTwoPoints(
-                adsk.core.Point3D.create(0, 0, 0),
-                adsk.core.Point3D.create(0, mm_to_cm(total_length_mm), 0)
-            ).isConstruction = True
-
-            # Right border
-            lines.addByTwoPoints(
-                adsk.core.Point3D.create(mm_to_cm(width_mm), 0, 0),
-                adsk.core.Point3D.create(
-                    mm_to_cm(width_mm), mm_to_cm(total_length_mm), 0)
-            ).isConstruction = True
-
-            # Top border
-            lines.addByTwoPoints(
-                adsk.core.Point3D.create(0, mm_to_cm(total_length_mm), 0),
-                adsk.core.Point3D.create(
-                    mm_to_cm(width_mm), mm_to_cm(total_length_mm), 0)
-            ).isConstruction = True
-
-            # Bottom border
-            lines.addByTwoPoints(
-                adsk.core.Point3D.create(0, 0, 0),
-                adsk.core.Point3D.create(mm_to_cm(width_mm), 0, 0)
-            ).isConstruction = True
-
-        # Draw ring boundaries
-        if draw_construction:
-            for ring_num, ring_info in ring_positions.items():
-                # Ring start line
-                lines.addByTwoPoints(
-                    adsk.core.Point3D.create(
-                        0, mm_to_cm(ring_info['start_y']), 0),
-                    adsk.core.Point3D.create(
-                        mm_to_cm(width_mm), mm_to_cm(ring_info['start_y']), 0)
-                ).isConstruction = True
-
-                # Ring end line
-                lines.addByTwoPoints(
-                    adsk.core.Point3D.create(
-                        0, mm_to_cm(ring_info['end_y']), 0),
-                    adsk.core.Point3D.create(
-                        mm_to_cm(width_mm), mm_to_cm(ring_info['end_y']), 0)
-                ).isConstruction = True
-
-        # Draw column boundaries
-        if draw_construction:
-            col_spacing = width_mm / cols_per_ring
-            for col in range(1, cols_per_ring):
-                x_pos = col * col_spacing
-                lines.addByTwoPoints(
-                    adsk.core.Point3D.create(mm_to_cm(x_pos), 0, 0),
-                    adsk.core.Point3D.create(
-                        mm_to_cm(x_pos), mm_to_cm(total_length_mm), 0)
-                ).isConstruction = True
-
-        # Draw chord lines based on Excel data
-        if draw_chords:
-            col_spacing = width_mm / cols_per_ring
-
-            for row in data:
-                ring_num = row['ring']
-                col_num = row['col']
-
-                # Check if this row has crown chord coordinate data (new format)
-                if 'chord_top_centerline' in row and 'chord_bottom_centerline' in row:
-                    print(
-                        f"DEBUG: Drawing crown chords using coordinates for ring {ring_num}, col {col_num}")
-
-                    # Draw top crown chord using centerline coordinates
-                    chord_top = row.get('chord_top_centerline', [])
-                    if len(chord_top) >= 2:
-                        start_point = chord_top[0]  # [x, y]
-                        end_point = chord_top[1]    # [x, y]
-
-                        lines.addByTwoPoints(
-                            adsk.core.Point3D.create(
-                                mm_to_cm(start_point[0]), mm_to_cm(start_point[1]), 0),
-                            adsk.core.Point3D.create(
-                                mm_to_cm(end_point[0]), mm_to_cm(end_point[1]), 0)
-                        ).isConstruction = True
-
-                    # Draw bottom crown chord using centerline coordinates
-                    chord_bottom = row.get('chord_bottom_centerline', [])
-                    if len(chord_bottom) >= 2:
-                        start_point = chord_bottom[0]  # [x, y]
-                        end_point = chord_bottom[1]    # [x, y]
-
-                        lines.addByTwoPoints(
-                            adsk.core.Point3D.create(
-                                mm_to_cm(start_point[0]), mm_to_cm(start_point[1]), 0),
-                            adsk.core.Point3D.create(
-                                mm_to_cm(end_point[0]), mm_to_cm(end_point[1]), 0)
-                        ).isConstruction = True
-
-                    # Optionally draw outer edge chords for keep-out zones
-                    if 'chord_top_outer' in row and 'chord_bottom_outer' in row:
-                        # Draw top crown chord outer edge
-                        chord_top_outer = row.get('chord_top_outer', [])
-                        if len(chord_top_outer) >= 2:
-                            start_point = chord_top_outer[0]  # [x, y]
-                            end_point = chord_top_outer[1]    # [x, y]
-
-                            outer_line = lines.addByTwoPoints(
-                                adsk.core.Point3D.create(
-                                    mm_to_cm(start_point[0]), mm_to_cm(start_point[1]), 0),
-                                adsk.core.Point3D.create(
-                                    mm_to_cm(end_point[0]), mm_to_cm(end_point[1]), 0)
-                            )
-                            outer_line.isConstruction = True
-                            # Make outer edge lines a different style if possible
-
-                        # Draw bottom crown chord outer edge
-                        chord_bottom_outer = row.get('chord_bottom_outer', [])
-                        if len(chord_bottom_outer) >= 2:
-                            start_point = chord_bottom_outer[0]  # [x, y]
-                            end_point = chord_bottom_outer[1]    # [x, y]
-
-                            outer_line = lines.addByTwoPoints(
-                                adsk.core.Point3D.create(
-                                    mm_to_cm(start_point[0]), mm_to_cm(start_point[1]), 0),
-                                adsk.core.Point3D.create(
-                                    mm_to_cm(end_point[0]), mm_to_cm(end_point[1]), 0)
-                            )
-                            outer_line.isConstruction = True
-
-                # Fallback to old method if no crown chord coordinates available
-                elif ring_num in ring_positions:
-                    ring_info = ring_positions[ring_num]
-
-                    # Calculate column center position
-                    col_center_x = (col_num + 0.5) * col_spacing
-
-                    # Get chord and sagitta data
-                    upper_chord = row.get('upper_chord_center_mm', 0)
-                    upper_sagitta = row.get('upper_sagitta_center_mm', 0)
-                    lower_chord = row.get('lower_chord_center_mm', 0)
-                    lower_sagitta = row.get('lower_sagitta_center_mm', 0)
-
-                    # Draw upper chord line
-                    if upper_chord > 0:
-                        chord_half_length = upper_chord / 2
-                        chord_y = ring_info['center_y'] + \
-                            ring_info['height']/2 - upper_sagitta
-
-                        lines.addByTwoPoints(
-                            adsk.core.Point3D.create(
-                                mm_to_cm(col_center_x - chord_half_length), mm_to_cm(chord_y), 0),
-                            adsk.core.Point3D.create(
-                                mm_to_cm(col_center_x + chord_half_length), mm_to_cm(chord_y), 0)
-                        ).isConstruction = True
-
-                    # Draw lower chord line
-                    if lower_chord > 0:
-                        chord_half_length = lower_chord / 2
-                        chord_y = ring_info['center_y'] - \
-                            ring_info['height']/2 + lower_sagitta
-
-                        lines.addByTwoPoints(
-                            adsk.core.Point3D.create(
-                                mm_to_cm(col_center_x - chord_half_length), mm_to_cm(chord_y), 0),
-                            adsk.core.Point3D.create(
-                                mm_to_cm(col_center_x + chord_half_length), mm_to_cm(chord_y), 0)
-                        ).isConstruction = True
-
-        # Draw individual cell frames using absolute Y positions
-        if has_absolute_positions and draw_construction:
-            print("DEBUG: Drawing individual cell frames using absolute Y positions")
-            col_spacing = width_mm / cols_per_ring
-
-            for row in data:
-                ring_num = row['ring']
-                col_num = row['col']
-
-                # Check if this row has absolute position data
-                if 'y_top_border_mm' in row and 'y_bottom_border_mm' in row:
-                    y_top = row['y_top_border_mm']
-                    y_bottom = row['y_bottom_border_mm']
-
-                    # Calculate column boundaries
-                    x_left = col_num * col_spacing
-                    x_right = (col_num + 1) * col_spacing
-
-                    # Draw cell frame rectangle (construction lines)
-                    # Top border of cell
-                    lines.addByTwoPoints(
-                        adsk.core.Point3D.create(
-                            mm_to_cm(x_left), mm_to_cm(y_top), 0),
-                        adsk.core.Point3D.create(
-                            mm_to_cm(x_right), mm_to_cm(y_top), 0)
-                    ).isConstruction = True
-
-                    # Bottom border of cell
-                    lines.addByTwoPoints(
-                        adsk.core.Point3D.create(
-                            mm_to_cm(x_left), mm_to_cm(y_bottom), 0),
-                        adsk.core.Point3D.create(
-                            mm_to_cm(x_right), mm_to_cm(y_bottom), 0)
-                    ).isConstruction = True
-
-                    # Left border of cell
-                    lines.addByTwoPoints(
-                        adsk.core.Point3D.create(
-                            mm_to_cm(x_left), mm_to_cm(y_top), 0),
-                        adsk.core.Point3D.create(
-                            mm_to_cm(x_left), mm_to_cm(y_bottom), 0)
-                    ).isConstruction = True
-
-                    # Right border of cell
-                    lines.addByTwoPoints(
-                        adsk.core.Point3D.create(
-                            mm_to_cm(x_right), mm_to_cm(y_top), 0),
-                        adsk.core.Point3D.create(
-                            mm_to_cm(x_right), mm_to_cm(y_bottom), 0)
-                    ).isConstruction = True
-
-        # Create points at intersections if requested
-        if create_points:
-            col_spacing = width_mm / cols_per_ring
-
-            for ring_num, ring_info in ring_positions.items():
-                for col in range(cols_per_ring + 1):
-                    x_pos = col * col_spacing
-
-                    # Points at ring boundaries
-                    sketch.sketchPoints.add(adsk.core.Point3D.create(
-                        mm_to_cm(x_pos), mm_to_cm(ring_info['start_y']), 0))
-                    sketch.sketchPoints.add(adsk.core.Point3D.create(
-                        mm_to_cm(x_pos), mm_to_cm(ring_info['end_y']), 0))
+        # Ring positions, line batching and points live in stent_sketch (no Fusion imports)
+        has_absolute_positions = index.has_absolute_positions
+        frame = stent_sketch.draw_data_frame(
+            sketch_backend.FusionSketchBackend(sketch), index, diameter_mm, length_mm,
+            draw_construction, draw_chords, create_points)
+        total_length_mm = frame['total_length_mm']
+        width_mm = frame['width_mm']
 
         # Show summary
         rings_count = len(rings)
@@ -1135,7 +860,7 @@ def process_excel_file(file_path, diameter_mm, length_mm=None, draw_construction
         cell_frames_drawn = has_absolute_positions and draw_construction
 
         # Check if crown chord coordinates are available
-        has_crown_chords = any('chord_top_centerline' in row for row in data)
+        has_crown_chords = index.has_crown_chords
         chord_method = "Crown chord coordinates" if has_crown_chords else "Calculated sagitta positions"
 
         ui.messageBox(
@@ -1152,6 +877,7 @@ def process_excel_file(file_path, diameter_mm, length_mm=None, draw_construction
             f'• Chord lines: {"Yes" if draw_chords else "No"}\n'
             f'• Chord method: {chord_method}\n'
             f'• Individual cell frames: {"Yes" if cell_frames_drawn else "No"}\n'
+            f'• Sketch lines: {frame["lines_drawn"]} ({frame["lines_planned"] - frame["lines_drawn"]} duplicates merged)\n'
             f'• Sketch points: {"Yes" if create_points else "No"}'
         )
 
@@ -1244,5 +970,11 @@ def command_destroy(args: adsk.core.CommandEventArgs):
     # General logging for debug.
     futil.log(f'{CMD_NAME} Command Destroy Event')
 
+    # Stop any background parse and close row streams left half-read by the preview
+    global preview_inputs
+    preview_inputs = None
+    background_parser.cancel()
+    parsed_files.release()
+
     global local_handlers
     local_handlers = []
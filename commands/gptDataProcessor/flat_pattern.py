@@ -0,0 +1,303 @@
+"""
+flat_pattern.py
+---------------
+Export the flat pattern of derived designs straight to DXF and SVG (no Fusion).
+
+Layers:
+  BORDER   circumference × length outline (from the design parameters)
+  FRAME    cell edges: x_left/x_right × y_top_edge/y_bottom_edge
+  CHORDS   left and right crown chords (centerline)
+  KEEPOUT  lateral keep-out limits: x_left + x_keepout and x_right - x_keepout
+           over the cell height
+
+Cells are streamed (v1 JSON rows are scanned incrementally with
+data_io.JsonRowStream; v2 JSON and .dbin are held as their compact field
+arrays, .dbin memory-mapped, and cell dicts are built one ring at a time) and
+lines are deduplicated one ring at a time with sketch_writer.SketchWriter, so
+shared cell edges are cut once and no per-cell dicts or lines are kept for
+more than a ring. SVG layers are spooled to
+temporary files and joined at the end, once the drawing bounds are known.
+Coordinates are mm; the SVG is flipped so both files read like the Fusion sketch.
+
+Usage:
+  python flat_pattern.py derived_*.json [more designs ...] [-o OUT_DIR] [--format dxf,svg] [--workers N]
+Outputs:
+  <design>.dxf and <design>.svg next to each input (or in OUT_DIR); designs with
+  the same name get their folder name prefixed.
+"""
+import argparse
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# sketch_writer lives at the add-in root
+ADDIN_DIR = Path(__file__).resolve().parents[2]
+if str(ADDIN_DIR) not in sys.path:
+    sys.path.append(str(ADDIN_DIR))
+import sketch_writer
+try:
+    from . import data_io
+except ImportError:
+    import data_io
+
+FORMATS = ("dxf", "svg")
+LAYERS = {                      # name: (DXF colour index, SVG stroke)
+    "BORDER": (5, "#0000ff"),
+    "FRAME": (7, "#000000"),
+    "CHORDS": (1, "#ff0000"),
+    "KEEPOUT": (3, "#00a000"),
+}
+SVG_STROKE_MM = 0.005
+SPOOL_BYTES = 1 << 20           # per SVG layer, before spilling to disk
+
+def _fmt(v):
+    return f"{v:.6f}"
+
+# ---------- Reading designs ----------
+
+def read_design(path):
+    """(parameters, cell rows) of a derived design; rows are produced lazily, ring by ring."""
+    path = str(path)
+    if path.lower().endswith(".dbin"):
+        try:
+            from . import derived_binary
+        except ImportError:
+            import derived_binary
+        derived = derived_binary.read_derived_binary(path)
+        return dict(derived["parameters"]), iter(derived["cells"].table.view())
+    stream = data_io.JsonRowStream(path)
+    header = stream.header
+    if header.get("format") == "stent-derived" and header.get("version") == 2:
+        try:
+            from . import derived_json
+        except ImportError:
+            import derived_json
+        # only the parameters and the compact cell arrays are kept
+        table = derived_json.table_from_v2(header["cells"])
+        return dict(header["parameters"]), iter(table.view())
+    if stream.key != "cells":
+        raise ValueError(f"{path}: no derived 'cells' found")
+    return dict(stream.parameters or {}), iter(stream)
+
+def cell_lines(row):
+    """[(layer, x0, y0, x1, y1)] of one derived cell."""
+    xl, xr = row["x_left_mm"], row["x_right_mm"]
+    yt, yb = row["y_top_edge_mm"], row["y_bottom_edge_mm"]
+    out = [("FRAME", xl, yt, xr, yt), ("FRAME", xl, yb, xr, yb),
+           ("FRAME", xl, yt, xl, yb), ("FRAME", xr, yt, xr, yb)]
+    for key in ("left_cl", "right_cl"):
+        chord = row.get(key)
+        if chord and len(chord) >= 2:
+            out.append(("CHORDS", chord[0][0], chord[0][1], chord[1][0], chord[1][1]))
+    xk = row.get("x_keepout_mm")
+    if xk:
+        out.append(("KEEPOUT", xl + xk, yt, xl + xk, yb))
+        out.append(("KEEPOUT", xr - xk, yt, xr - xk, yb))
+    return out
+
+def design_lines(parameters, rows):
+    """Deduplicated (layer, Segment) of a design, yielded ring by ring."""
+    width = parameters.get("circumference_mm")
+    length = parameters.get("length_mm")
+    if width and length:
+        border = sketch_writer.SketchWriter()
+        for x0, y0, x1, y1 in ((0, 0, width, 0), (width, 0, width, length),
+                               (width, length, 0, length), (0, length, 0, 0)):
+            border.line(x0, y0, x1, y1)
+        for s in border.segments():
+            yield "BORDER", s
+    writers = {layer: sketch_writer.SketchWriter() for layer in LAYERS}
+    # cells come ring-major, so neighbours sharing an edge are in the same group
+    for _, ring_rows in itertools.groupby(rows, key=lambda r: r["ring"]):
+        for row in ring_rows:
+            for layer, x0, y0, x1, y1 in cell_lines(row):
+                writers[layer].line(x0, y0, x1, y1)
+        for layer, writer in writers.items():
+            for s in writer.segments():
+                yield layer, s
+            writer.clear()
+
+# ---------- Writers ----------
+
+class DxfWriter:
+    """Minimal AutoCAD R12 ASCII DXF: one LINE entity per segment, written as it comes."""
+
+    def __init__(self, path, layers=LAYERS):
+        self.f = open(path, "w", newline="\n")
+        self.count = 0
+        w = self.f.write
+        w("0\nSECTION\n2\nHEADER\n9\n$ACADVER\n1\nAC1009\n9\n$INSUNITS\n70\n4\n0\nENDSEC\n")
+        w("0\nSECTION\n2\nTABLES\n")
+        w("0\nTABLE\n2\nLTYPE\n70\n1\n0\nLTYPE\n2\nCONTINUOUS\n70\n0\n3\nSolid line\n72\n65\n73\n0\n40\n0.0\n0\nENDTAB\n")
+        w(f"0\nTABLE\n2\nLAYER\n70\n{len(layers)}\n")
+        for name, (color, _) in layers.items():
+            w(f"0\nLAYER\n2\n{name}\n70\n0\n62\n{color}\n6\nCONTINUOUS\n")
+        w("0\nENDTAB\n0\nENDSEC\n0\nSECTION\n2\nENTITIES\n")
+
+    def line(self, layer, s, text):
+        """s: Segment (mm); text: its x0, y0, x1, y1 already formatted."""
+        self.f.write("0\nLINE\n8\n%s\n10\n%s\n20\n%s\n30\n0.0\n11\n%s\n21\n%s\n31\n0.0\n"
+                     % ((layer,) + text))
+        self.count += 1
+
+    def close(self):
+        self.f.write("0\nENDSEC\n0\nEOF\n")
+        self.f.close()
+
+    def abort(self):
+        self.f.close()
+
+class SvgWriter:
+    """SVG with one <g> per layer; layers are spooled until the bounds are known."""
+
+    def __init__(self, path, layers=LAYERS):
+        self.path = path
+        self.layers = layers
+        self.count = 0
+        self._spool = {name: tempfile.SpooledTemporaryFile(SPOOL_BYTES, mode="w+") for name in layers}
+        self._bounds = [float("inf"), float("inf"), float("-inf"), float("-inf")]
+
+    def line(self, layer, s, text):
+        b = self._bounds
+        b[0] = min(b[0], s.x0, s.x1); b[1] = min(b[1], s.y0, s.y1)
+        b[2] = max(b[2], s.x0, s.x1); b[3] = max(b[3], s.y0, s.y1)
+        self._spool[layer].write('<line x1="%s" y1="%s" x2="%s" y2="%s"/>\n' % text)
+        self.count += 1
+
+    def close(self):
+        x0, y0, x1, y1 = self._bounds if self.count else (0.0, 0.0, 0.0, 0.0)
+        pad = 10 * SVG_STROKE_MM
+        x0 -= pad; y0 -= pad; w = x1 - x0 + pad; h = y1 - y0 + pad
+        with open(self.path, "w") as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    f'<svg xmlns="http://www.w3.org/2000/svg" width="{_fmt(w)}mm" height="{_fmt(h)}mm" '
+                    # y up, like the sketch and the DXF
+                    f'viewBox="{_fmt(x0)} {_fmt(-(y0 + h))} {_fmt(w)} {_fmt(h)}">\n'
+                    f'<g transform="scale(1,-1)" fill="none" stroke-width="{SVG_STROKE_MM}">\n')
+            for name, (_, stroke) in self.layers.items():
+                spool = self._spool[name]
+                f.write(f'<g id="{name}" stroke="{stroke}">\n')
+                spool.seek(0)
+                shutil.copyfileobj(spool, f)
+                f.write("</g>\n")
+            f.write("</g>\n</svg>\n")
+        self.abort()
+
+    def abort(self):
+        for spool in self._spool.values():
+            spool.close()
+
+WRITERS = {"dxf": DxfWriter, "svg": SvgWriter}
+
+# ---------- Export ----------
+
+def output_paths(path, out_dir=None, formats=FORMATS, stem=None):
+    path = Path(path)
+    stem = stem or path.name.split(".")[0]
+    folder = Path(out_dir) if out_dir else path.parent
+    return {fmt: folder / f"{stem}.{fmt}" for fmt in formats}
+
+def unique_output_paths(paths, out_dir=None, formats=FORMATS):
+    """output_paths() of each input, with names that would collide made unique.
+
+    Colliding names (e.g. several derive-cache entries, all derived.json, exported
+    to one folder) are prefixed with their input's folder name; any still equal
+    (the same file given twice) get a _2, _3, ... suffix in input order.
+    """
+    paths = [Path(p) for p in paths]
+    folders = [os.path.normcase(os.path.abspath(out_dir or p.parent)) for p in paths]
+    stems = [p.name.split(".")[0] for p in paths]
+    targets = Counter((f, s.lower()) for f, s in zip(folders, stems))
+    stems = [f"{p.parent.name}_{s}" if targets[(f, s.lower())] > 1 and p.parent.name else s
+             for p, f, s in zip(paths, folders, stems)]
+    seen = Counter()
+    out = []
+    for p, f, s in zip(paths, folders, stems):
+        seen[(f, s.lower())] += 1
+        n = seen[(f, s.lower())]
+        out.append(output_paths(p, out_dir, formats, s if n == 1 else f"{s}_{n}"))
+    return out
+
+def export_flat_pattern(path, out_dir=None, formats=FORMATS, outputs=None):
+    """Write the flat pattern of one derived design; returns {format: path}.
+
+    outputs ({format: path}) overrides the names derived from path and out_dir.
+    """
+    paths = {fmt: Path(p) for fmt, p in outputs.items()} if outputs else output_paths(path, out_dir, formats)
+    parameters, rows = read_design(path)
+    for p in paths.values():
+        p.parent.mkdir(parents=True, exist_ok=True)
+    writers = []
+    try:
+        for fmt, p in paths.items():
+            writers.append(WRITERS[fmt](p))
+        for layer, s in design_lines(parameters, rows):
+            # coordinates formatted once for all writers
+            text = tuple(("%.6f %.6f %.6f %.6f" % s[:4]).split())
+            for writer in writers:
+                writer.line(layer, s, text)
+    except BaseException:
+        for writer in writers:
+            writer.abort()
+        for p in paths.values():
+            if p.exists():
+                p.unlink()
+        raise
+    finally:
+        if hasattr(rows, "close"):
+            rows.close()
+    for writer in writers:
+        writer.close()
+    return paths
+
+def _export_one(job):
+    path, outputs = job
+    try:
+        return path, {k: str(v) for k, v in export_flat_pattern(path, outputs=outputs).items()}, ""
+    except Exception as e:
+        return path, {}, f"{type(e).__name__}: {e}"
+
+def export_many(paths, out_dir=None, formats=FORMATS, workers=None):
+    """Export several designs, in parallel processes unless workers=0.
+
+    Yields (input path, {format: output path}, error) in input order; a failing
+    design is reported in its error string and does not stop the others. Designs
+    whose output names would collide are renamed (see unique_output_paths).
+    """
+    paths = [str(p) for p in paths]
+    jobs = list(zip(paths, unique_output_paths(paths, out_dir, formats)))
+    if workers == 0 or len(jobs) <= 1:
+        for job in jobs:
+            yield _export_one(job)
+        return
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_export_one, jobs)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export derived stent designs as DXF/SVG flat patterns.")
+    ap.add_argument("inputs", nargs="+", help="derived JSON (v1/v2, plain or gzip) or .dbin files")
+    ap.add_argument("-o", "--out-dir", default=None, help="output folder (default: next to each input)")
+    ap.add_argument("--format", default=",".join(FORMATS), help="comma-separated: dxf, svg")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: one per design, up to CPUs; 0 = in-process)")
+    args = ap.parse_args(argv)
+    formats = [f.strip().lower() for f in args.format.split(",") if f.strip()]
+    unknown = sorted(set(formats) - set(FORMATS))
+    if unknown:
+        ap.error(f"unknown format(s): {', '.join(unknown)}")
+    failed = 0
+    for path, outputs, error in export_many(args.inputs, args.out_dir, formats, args.workers):
+        if error:
+            failed += 1
+            print(f"{path}: {error}", file=sys.stderr)
+        else:
+            print(" ".join(outputs.values()))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
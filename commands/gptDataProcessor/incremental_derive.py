@@ -0,0 +1,171 @@
+"""
+incremental_derive.py
+---------------------
+Incremental re-derivation of a minimal-spec design after a small edit.
+
+Flipping one link only changes that column's gaps, scale, stack positions and
+cells; changing one ring's strut width only changes that ring's cells. rederive()
+takes a previous compute_from_min_spec result plus a spec delta
+  {"links":       [[interface, col, value], ...]   # 0-based interface (rings i+1/i+2) and col
+   "gaps_policy": {...partial policy...},
+   "parameters":  {...partial parameters...}}
+recomputes only the dirty columns / rings and patches a copy of the result.
+Any other parameter change (diameter, length, factors, ...) falls back to a
+full derivation. The patched result is identical to a full derivation, with
+"cells" as a lazy CellView: no per-cell dicts are built until the result is
+serialized (json.dump(..., default=cell_table.json_default)).
+"""
+import copy
+from datetime import datetime
+import numpy as np
+
+try:
+    from . import derive_from_linkmatrix as dfl
+except ImportError:
+    import derive_from_linkmatrix as dfl
+
+DELTA_KEYS = ("links", "gaps_policy", "parameters")
+# Parameters that can be patched ring by ring; anything else needs a full derivation
+RING_PARAMETERS = ("strut_width_mm_by_ring",)
+DERIVED_PARAMETERS = ("circumference_mm", "pitch_mm")
+
+def spec_from_derived(derived):
+    """Minimal spec (parameters, gaps_policy, links) a derived result was computed from."""
+    P = {k: v for k, v in derived["parameters"].items() if k not in DERIVED_PARAMETERS}
+    return copy.deepcopy({"parameters": P, "gaps_policy": derived["gaps_policy"], "links": derived["links"]})
+
+def apply_spec_delta(spec, delta):
+    """Copy of spec with a delta (see module docstring) applied."""
+    unknown = set(delta) - set(DELTA_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown spec delta key(s): {sorted(unknown)}")
+    spec = copy.deepcopy(spec)
+    if delta.get("links"):
+        matrix = [list(row) for row in spec["links"]["matrix"]]
+        for iface, col, value in delta["links"]:
+            matrix[iface][col] = int(value)
+        spec["links"] = {**spec["links"], "matrix": matrix}
+    spec["gaps_policy"] = {**spec["gaps_policy"], **delta.get("gaps_policy", {})}
+    spec["parameters"] = {**spec["parameters"], **copy.deepcopy(delta.get("parameters", {}))}
+    return spec
+
+def dirty_rings(old_widths, new_widths):
+    """0-based rings whose strut width changed."""
+    old = np.asarray(old_widths, dtype=float); new = np.asarray(new_widths, dtype=float)
+    return np.flatnonzero(old != new)
+
+def rederive(prev, delta, cache=None):
+    """New derived result for prev's spec with delta applied, recomputing only what changed.
+
+    prev must come from compute_from_min_spec in this process (its cell table carries
+    the unrounded stack arrays); a derived JSON loaded from disk is re-derived in full.
+    prev is left untouched. meta["incremental"] lists the recomputed columns / rings;
+    "cells" is a lazy view over the patched table (its .table).
+    """
+    old_spec = spec_from_derived(prev)
+    spec = apply_spec_delta(old_spec, delta)
+    P_old = old_spec["parameters"]; P = spec["parameters"]
+    changed = {k for k in set(P) | set(P_old) if P.get(k) != P_old.get(k)}
+    table_prev = getattr(prev["cells"], "table", None)
+    if (changed - set(RING_PARAMETERS)) or table_prev is None or table_prev.stack is None:
+        derived = dfl.derive_lazy(spec, cache=cache)
+        derived["meta"]["incremental"] = {"full": True, "dirty_cols": [], "dirty_rings": []}
+        return derived
+
+    num_rings = int(P["num_rings"]); C = int(P["crowns_per_ring"])
+    L = float(P["length_mm"]); R_factor = float(P["R_factor"])
+    xk_min = float(P.get("x_keepout_min_mm", 0.010))
+    w_by_ring = list(map(float, P["strut_width_mm_by_ring"]))
+    factors = list(map(float, P["height_factors"]))
+    assert len(w_by_ring) == num_rings
+    pitch = prev["parameters"]["pitch_mm"]
+    link_matrix = np.array(spec["links"]["matrix"], dtype=int)
+    assert link_matrix.shape == (num_rings-1, C)
+
+    table = table_prev.copy()
+    st = table.stack
+    gaps_new = dfl.gaps_from_policy(link_matrix, spec["gaps_policy"])
+    cols = np.flatnonzero((gaps_new != st["gaps"]).any(axis=0))
+    rings = dirty_rings(P_old["strut_width_mm_by_ring"], w_by_ring)
+    if cache is None:
+        cache = dfl.CrownSolveCache()
+    w_col = np.array(w_by_ring)[:, None]
+    solves = []
+
+    # 1) Dirty columns: gaps -> scale -> stack -> every ring of the column
+    if cols.size:
+        st["gaps"][:, cols] = gaps_new[:, cols]
+        # summed over the whole matrix: numpy's reduction order (and last bits) depends on layout
+        sum_gaps = st["gaps"].sum(axis=0)[cols]
+        st["scale_col"][cols] = (L - sum_gaps) / sum(factors)
+        H, y_top, y_bot = dfl.stack_positions(factors, st["scale_col"][cols], st["gaps"][:, cols])
+        st["H"][:, cols] = H; st["y_top"][:, cols] = y_top; st["y_bot"][:, cols] = y_bot
+        d, sol, stats = cache.solve(H, pitch, w_col, R_factor * w_col)
+        st["delta"][:, cols] = d
+        solves.append((sol, stats))
+        dfl.fill_cell_geometry(table, st["delta"], st["H"], st["y_top"], st["y_bot"], pitch, L,
+                               w_by_ring, R_factor, xk_min, cols=cols)
+    # 2) Dirty rings (strut width): remaining columns of those rings
+    rest = np.setdiff1d(np.arange(C), cols)
+    if rings.size and rest.size:
+        block = np.ix_(rings, rest)
+        d, sol, stats = cache.solve(st["H"][block], pitch, w_col[rings], R_factor * w_col[rings])
+        st["delta"][block] = d
+        solves.append((sol, stats))
+        dfl.fill_cell_geometry(table, st["delta"], st["H"], st["y_top"], st["y_bot"], pitch, L,
+                               w_by_ring, R_factor, xk_min, cols=rest, rings=rings)
+
+    derived = dict(prev)
+    derived["meta"] = {
+        **prev["meta"],
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "solver": merge_solver_stats([s for s, _ in solves]),
+        "solve_cache": merge_cache_stats([c for _, c in solves], cache),
+        "incremental": {"full": False, "dirty_cols": cols.tolist(), "dirty_rings": rings.tolist()},
+    }
+    derived["parameters"] = {**prev["parameters"], **P}
+    derived["links"] = spec["links"]
+    derived["gaps_policy"] = spec["gaps_policy"]
+    if cols.size:
+        patch_columns(derived, prev, st, cols, sum_gaps)
+    derived["cells"] = table.view()
+    return derived
+
+def patch_columns(derived, prev, st, cols, sum_gaps_cols):
+    """Copy of prev's per-column lists with the dirty columns replaced."""
+    gaps = [list(row) for row in prev["gaps_matrix"]]
+    heights = [list(row) for row in prev["ring_heights_mm"]]
+    sum_gaps = list(prev["sum_gaps_in_col_mm"])
+    scale = list(prev["scale_mm_per_factor_by_col"])
+    stack = list(prev["stack_positions_by_column"])
+    for k, c in enumerate(cols.tolist()):
+        for i, row in enumerate(gaps):
+            row[c] = float(st["gaps"][i, c])
+        for r, row in enumerate(heights):
+            row[c] = float(st["H"][r, c])
+        sum_gaps[c] = float(sum_gaps_cols[k])
+        scale[c] = float(st["scale_col"][c])
+        stack[c] = {
+            "col": c,
+            "ring_top_y_mm": st["y_top"][:, c].tolist(),
+            "ring_bottom_y_mm": st["y_bot"][:, c].tolist(),
+            "y_bottom_of_stent_mm": float(st["y_bot"][-1, c]),
+        }
+    derived.update({"gaps_matrix": gaps, "ring_heights_mm": heights, "sum_gaps_in_col_mm": sum_gaps,
+                    "scale_mm_per_factor_by_col": scale, "stack_positions_by_column": stack})
+
+def merge_solver_stats(sols):
+    """solver_stats over the solves of one re-derivation (None entries had no misses)."""
+    stats = [dfl.solver_stats(s) for s in sols if s is not None]
+    if not stats:
+        return dfl.solver_stats(None)
+    out = {"method": stats[0]["method"]}
+    for key in ("cells", "iterations_total", "evaluations_total", "unconverged_cells"):
+        out[key] = sum(s[key] for s in stats)
+    out["iterations_max"] = max(s["iterations_max"] for s in stats)
+    out["residual_max"] = max(s["residual_max"] for s in stats)
+    return out
+
+def merge_cache_stats(stats, cache):
+    return {"cells": sum(s["cells"] for s in stats), "hits": sum(s["hits"] for s in stats),
+            "misses": sum(s["misses"] for s in stats), "entries": len(cache), "quantum_mm": cache.quantum_mm}
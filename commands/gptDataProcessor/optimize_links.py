@@ -0,0 +1,220 @@
+"""
+optimize_links.py
+-----------------
+Search the links.matrix space of a minimal spec for the pattern that maximizes
+the minimum x_keepout_mm, keeping theta_deg / alpha_deg within bounds and the
+number of links on every interface within [min, max].
+
+A column's cells depend only on that column's link pattern (through its gaps,
+scale and stack) and on the column parity (crown phase), so every candidate
+column pattern is evaluated once, in one batch, with the deriver's own kernels
+(gaps_from_policy -> stack_positions -> CrownSolveCache -> fill_cell_geometry).
+The matrix is then assembled column by column with a beam search:
+  - states with the same per-interface link counts are merged (only the best
+    min-keepout survives, which is exact for the max-min objective),
+  - states that can no longer meet the link-count bounds are dropped,
+  - branch-and-bound: states already below the start matrix's score are cut.
+With a beam wide enough to never truncate, the result is optimal over the
+candidate patterns.
+
+Usage:
+  python optimize_links.py spec.json [-o optimized_spec.json] [--min-links 1] [--max-links 4]
+                           [--theta-max 120] [--alpha-abs-max 80] [--beam 512]
+"""
+import sys, json, copy, math, argparse, itertools
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+
+try:
+    from . import derive_from_linkmatrix as dfl
+    from .cell_table import CellTable
+except ImportError:
+    import derive_from_linkmatrix as dfl
+    from cell_table import CellTable
+
+MAX_PATTERNS = 4096
+
+def column_patterns(num_interfaces, max_links_per_col=None, max_patterns=MAX_PATTERNS):
+    """All 0/1 link patterns of one column (K, I), fewest links first."""
+    k_max = num_interfaces if max_links_per_col is None else min(num_interfaces, max_links_per_col)
+    if sum(math.comb(num_interfaces, k) for k in range(k_max + 1)) > max_patterns:
+        raise ValueError(f"Too many column patterns for {num_interfaces} interfaces; "
+                         f"limit max_links_per_col or pass explicit patterns")
+    rows = []
+    for k in range(k_max + 1):
+        for idx in itertools.combinations(range(num_interfaces), k):
+            row = [0] * num_interfaces
+            for i in idx:
+                row[i] = 1
+            rows.append(row)
+    return np.array(rows, dtype=int).reshape(-1, num_interfaces)
+
+def per_interface(value, num_interfaces, default):
+    if value is None:
+        value = default
+    arr = np.broadcast_to(np.asarray(value, dtype=int), (num_interfaces,))
+    return arr.copy()
+
+def evaluate_patterns(spec, patterns, cache=None, theta_bounds_deg=None, alpha_bounds_deg=None):
+    """Min keepout and feasibility of every pattern at both column parities.
+
+    Returns (score, feasible), each (2, K): row p is the pattern placed in a column
+    with parity p. Patterns are laid out twice side by side (even, odd column) in a
+    scratch (num_rings, 2K) table and run through the deriver's column kernels.
+    """
+    P = spec["parameters"]
+    L = float(P["length_mm"]); R_factor = float(P["R_factor"])
+    xk_min = float(P.get("x_keepout_min_mm", 0.010))
+    num_rings = int(P["num_rings"]); C = int(P["crowns_per_ring"])
+    w_by_ring = list(map(float, P["strut_width_mm_by_ring"]))
+    factors = list(map(float, P["height_factors"]))
+    pitch = np.pi * float(P["diameter_mm"]) / C
+    patterns = np.asarray(patterns, dtype=int)
+    K = len(patterns)
+
+    links = np.repeat(patterns.T, 2, axis=1)                   # (I, 2K): col 2k even, 2k+1 odd
+    gaps = dfl.gaps_from_policy(links, spec["gaps_policy"])
+    scale = (L - gaps.sum(axis=0)) / sum(factors)
+    H, y_top, y_bot = dfl.stack_positions(factors, scale, gaps)
+    if cache is None:
+        cache = dfl.CrownSolveCache()
+    w_col = np.array(w_by_ring)[:, None]
+    delta, _, _ = cache.solve(H, pitch, w_col, R_factor * w_col)
+    table = CellTable(num_rings, 2 * K)
+    dfl.fill_cell_geometry(table, delta, H, y_top, y_bot, pitch, L, w_by_ring, R_factor, xk_min)
+
+    feasible = np.ones((num_rings, 2 * K), dtype=bool)
+    for name, bounds in (("theta_deg", theta_bounds_deg), ("alpha_deg", alpha_bounds_deg)):
+        if bounds is not None:
+            lo, hi = bounds
+            v = table[name]
+            feasible &= (v >= (-np.inf if lo is None else lo)) & (v <= (np.inf if hi is None else hi))
+    score = table["x_keepout_mm"].min(axis=0).reshape(K, 2).T
+    return score, feasible.all(axis=0).reshape(K, 2).T
+
+def matrix_score(matrix, patterns, score, feasible):
+    """(min keepout, feasible) of a full matrix whose columns are all in patterns."""
+    index = {tuple(p): k for k, p in enumerate(patterns.tolist())}
+    cols = np.asarray(matrix, dtype=int).T.tolist()
+    ks = [index.get(tuple(col)) for col in cols]
+    if any(k is None for k in ks):
+        return None, False
+    vals = [score[c % 2, k] for c, k in enumerate(ks)]
+    ok = all(feasible[c % 2, k] for c, k in enumerate(ks))
+    return float(min(vals)), ok
+
+def optimize_links(spec, min_links=None, max_links=None, theta_bounds_deg=None, alpha_bounds_deg=None,
+                   beam_width=512, max_links_per_col=None, patterns=None, cache=None):
+    """Best link matrix for spec's parameters; returns a result dict.
+
+    min_links / max_links: per-interface link-count bounds (int or one per interface).
+    theta_bounds_deg / alpha_bounds_deg: (lo, hi) bounds on every cell (None = unbounded).
+    patterns: optional explicit candidate column patterns (K, I), else all patterns
+    with at most max_links_per_col links.
+
+    Result: {"matrix", "keepout_min_mm", "feasible", "exact", "derived", "stats"}.
+    "feasible" is False (and "matrix" None) when no matrix meets the constraints.
+    """
+    P = spec["parameters"]
+    C = int(P["crowns_per_ring"]); I = int(P["num_rings"]) - 1
+    if cache is None:
+        cache = dfl.CrownSolveCache()
+    pats = column_patterns(I, max_links_per_col) if patterns is None else np.asarray(patterns, dtype=int)
+    score, feasible = evaluate_patterns(spec, pats, cache, theta_bounds_deg, alpha_bounds_deg)
+    cmin = per_interface(min_links, I, 0); cmax = per_interface(max_links, I, C)
+
+    # Incumbent: the spec's own matrix, if it is a valid candidate
+    start = np.array(spec["links"]["matrix"], dtype=int)
+    incumbent, start_ok = matrix_score(start, pats, score, feasible)
+    counts_ok = ((start.sum(axis=1) >= cmin) & (start.sum(axis=1) <= cmax)).all()
+    bound = incumbent if (start_ok and counts_ok) else -np.inf
+
+    counts = np.zeros((1, I), dtype=int)
+    s_min = np.array([np.inf]); s_sum = np.array([0.0])
+    steps = []                                  # per column: (parent state, pattern index)
+    expanded = pruned = 0
+    exact = True
+    for c in range(C):
+        par = c % 2
+        remaining = C - c - 1
+        cand = counts[:, None, :] + pats[None, :, :]                        # (S, K, I)
+        ok = feasible[par][None, :] & (cand <= cmax).all(-1) & (cand + remaining >= cmin).all(-1)
+        mn = np.minimum(s_min[:, None], score[par][None, :])
+        ok &= mn >= bound
+        expanded += ok.size; pruned += ok.size - int(np.count_nonzero(ok))
+        parent, k = np.nonzero(ok)
+        if parent.size == 0:
+            return {"matrix": None, "keepout_min_mm": None, "feasible": False, "exact": exact,
+                    "derived": None, "stats": {"patterns": len(pats), "expanded": expanded, "pruned": pruned}}
+        mn = mn[parent, k]; sm = s_sum[parent] + score[par][k]
+        # best first (min keepout, then total keepout), then keep one state per count vector
+        order = np.lexsort((-sm, -mn))
+        parent, k, mn, sm = parent[order], k[order], mn[order], sm[order]
+        new_counts = counts[parent] + pats[k]
+        _, first = np.unique(new_counts, axis=0, return_index=True)
+        first = np.sort(first)
+        if first.size > beam_width:
+            exact = False
+            first = first[:beam_width]
+        parent, k = parent[first], k[first]
+        counts, s_min, s_sum = new_counts[first], mn[first], sm[first]
+        steps.append((parent, k))
+
+    # Backtrack the best final state (index 0 after the best-first ordering)
+    chosen = []
+    s = 0
+    for parent, k in reversed(steps):
+        chosen.append(int(k[s])); s = int(parent[s])
+    chosen.reverse()
+    matrix = pats[chosen].T.tolist()
+    best = copy.deepcopy(spec)
+    best["links"] = {**best["links"], "matrix": matrix}
+    derived = dfl.compute_from_min_spec(best, cache=cache)
+    return {
+        "matrix": matrix,
+        "keepout_min_mm": float(s_min[0]),
+        "feasible": True,
+        "exact": exact,
+        "derived": derived,
+        "stats": {"patterns": len(pats), "expanded": expanded, "pruned": pruned,
+                  "start_keepout_min_mm": incumbent},
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Optimize the link matrix of a minimal stent spec.")
+    ap.add_argument("spec", help="minimal spec JSON")
+    ap.add_argument("-o", "--output", help="optimized spec JSON (default: <spec>_optimized.json)")
+    ap.add_argument("--min-links", type=int, default=1, help="minimum links per interface")
+    ap.add_argument("--max-links", type=int, default=None, help="maximum links per interface")
+    ap.add_argument("--max-links-per-col", type=int, default=None)
+    ap.add_argument("--theta-min", type=float, default=None)
+    ap.add_argument("--theta-max", type=float, default=None)
+    ap.add_argument("--alpha-abs-max", type=float, default=None, help="bound on |alpha_deg|")
+    ap.add_argument("--beam", type=int, default=512, help="beam width")
+    args = ap.parse_args(argv)
+
+    spec_path = Path(args.spec).expanduser().resolve()
+    spec = dfl.load_spec(spec_path)
+    theta = None if args.theta_min is None and args.theta_max is None else (args.theta_min, args.theta_max)
+    alpha = None if args.alpha_abs_max is None else (-args.alpha_abs_max, args.alpha_abs_max)
+    result = optimize_links(spec, min_links=args.min_links, max_links=args.max_links,
+                            theta_bounds_deg=theta, alpha_bounds_deg=alpha, beam_width=args.beam,
+                            max_links_per_col=args.max_links_per_col)
+    if not result["feasible"]:
+        print("No link matrix satisfies the constraints", file=sys.stderr)
+        return 1
+    out = dict(spec)
+    out["meta"] = {**spec.get("meta", {}), "generated_at": datetime.now().isoformat(timespec="seconds"),
+                   "note": f"Link matrix optimized from {spec_path.name}",
+                   "optimizer": {"keepout_min_mm": result["keepout_min_mm"], "exact": result["exact"],
+                                 **result["stats"]}}
+    out["links"] = {**spec["links"], "matrix": result["matrix"]}
+    out_path = Path(args.output) if args.output else spec_path.with_name(spec_path.stem + "_optimized.json")
+    with open(out_path, "w") as f:
+        json.dump(out, f, indent=2)
+    print(str(out_path), f"min keepout {result['keepout_min_mm']:.6f} mm")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
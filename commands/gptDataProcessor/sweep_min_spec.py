@@ -0,0 +1,264 @@
+"""
+sweep_min_spec.py
+-----------------
+Design-space sweep over a minimal stent spec.
+
+Takes a base minimal spec (see stent_min_spec_*.json) plus value lists for any of
+  diameter_mm, length_mm, R_factor            - list of numbers, or {"start", "stop", "num"}
+  height_factors, strut_width_mm_by_ring      - list of per-ring lists
+  gaps_policy                                 - list of (partial) gap-policy dicts
+and derives every combination with derive_table (arrays only, no per-cell
+dicts) on a process pool.
+One summary row per variant (min/max theta, keep-out and |alpha| overall and per
+ring) is streamed to CSV (or JSON lines for a .jsonl output) as results arrive,
+so memory stays bounded regardless of the number of variants.
+Summary metrics are kept in the derive cache (derive_cache.py) keyed on each
+variant's spec, so re-running a sweep that overlaps an earlier one only derives
+the new variants.
+
+Usage:
+  python sweep_min_spec.py base_spec.json sweep.json -o sweep_results.csv [--workers N]
+                           [--cache-dir DIR | --no-cache]
+"""
+import os, sys, json, csv, argparse, copy, itertools
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+import numpy as np
+
+try:
+    from . import derive_from_linkmatrix as dfl
+    from . import derive_cache
+except ImportError:
+    import derive_from_linkmatrix as dfl
+    import derive_cache
+
+SWEEP_KEYS = ("diameter_mm", "length_mm", "height_factors", "strut_width_mm_by_ring", "R_factor", "gaps_policy")
+SCALAR_KEYS = ("diameter_mm", "length_mm", "R_factor")
+
+def expand_values(key, values):
+    """Value list for one sweep key; scalar keys also accept {"start", "stop", "num"}."""
+    if isinstance(values, dict) and key in SCALAR_KEYS:
+        return [float(v) for v in np.linspace(values["start"], values["stop"], int(values["num"]))]
+    if key in SCALAR_KEYS and not isinstance(values, (list, tuple)):
+        return [float(values)]
+    return list(values)
+
+def normalize_ranges(ranges):
+    unknown = set(ranges) - set(SWEEP_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameter(s): {sorted(unknown)}")
+    return {k: expand_values(k, ranges[k]) for k in SWEEP_KEYS if k in ranges}
+
+def count_variants(ranges):
+    n = 1
+    for values in normalize_ranges(ranges).values():
+        n *= len(values)
+    return n
+
+def iter_variants(ranges):
+    """Lazily yield (index, overrides) for every combination, last key varying fastest."""
+    ranges = normalize_ranges(ranges)
+    keys = list(ranges)
+    for i, combo in enumerate(itertools.product(*(ranges[k] for k in keys))):
+        yield i, dict(zip(keys, combo))
+
+def apply_variant(base_spec, overrides):
+    """Copy of base_spec with parameter / gap-policy overrides applied."""
+    spec = copy.deepcopy(base_spec)
+    for key, value in overrides.items():
+        if key == "gaps_policy":
+            spec["gaps_policy"] = {**spec["gaps_policy"], **value}
+        else:
+            spec["parameters"][key] = value
+    return spec
+
+SUMMARY_METRICS = ("theta_min_deg", "theta_max_deg", "keepout_min_mm", "keepout_max_mm",
+                   "alpha_abs_min_deg", "alpha_abs_max_deg", "unconverged_cells")
+RING_METRICS = ("theta_min_deg", "theta_max_deg", "keepout_min_mm", "alpha_abs_min_deg", "alpha_abs_max_deg")
+
+def summary_fields(num_rings, swept_keys=SWEEP_KEYS):
+    """Column order of summary rows."""
+    ring_cols = [f"{m}_r{r+1}" for r in range(num_rings) for m in RING_METRICS]
+    return ["variant", *[k for k in SWEEP_KEYS if k in swept_keys], *SUMMARY_METRICS, *ring_cols, "error"]
+
+def summarize_derived(derived, table=None):
+    """Flat summary metrics of a derived design (overall and per ring).
+
+    table: the design's CellTable (from derive_table); default derived["cells"].table.
+    """
+    if table is None:
+        table = derived["cells"].table
+    theta = table["theta_deg"]; keepout = table["x_keepout_mm"]; alpha = np.abs(table["alpha_deg"])
+    row = {
+        "theta_min_deg": float(theta.min()), "theta_max_deg": float(theta.max()),
+        "keepout_min_mm": float(keepout.min()), "keepout_max_mm": float(keepout.max()),
+        "alpha_abs_min_deg": float(alpha.min()), "alpha_abs_max_deg": float(alpha.max()),
+        "unconverged_cells": derived["meta"]["solver"].get("unconverged_cells", 0),
+    }
+    per_ring = {
+        "theta_min_deg": theta.min(axis=1), "theta_max_deg": theta.max(axis=1),
+        "keepout_min_mm": keepout.min(axis=1),
+        "alpha_abs_min_deg": alpha.min(axis=1), "alpha_abs_max_deg": alpha.max(axis=1),
+    }
+    for r in range(table.num_rings):
+        for m in RING_METRICS:
+            row[f"{m}_r{r+1}"] = float(per_ring[m][r])
+    return row
+
+SUMMARY_KIND = "sweep-summary"
+
+def summary_key(spec):
+    """derive-cache key of a variant's summary metrics (this module's code included)."""
+    version = derive_cache.code_version(derive_cache.CODE_FILES + (Path(__file__).resolve(),))
+    return derive_cache.spec_key(spec, SUMMARY_KIND, version)
+
+def evaluate_variant(base_spec, index, overrides, cache=None, disk_cache=None):
+    """Summary row for one variant; derivation errors are reported in the row, not raised.
+
+    disk_cache: optional derive_cache.DeriveCache holding summaries of earlier runs.
+    """
+    row = {"variant": index}
+    for key in SWEEP_KEYS:
+        if key in overrides:
+            value = overrides[key]
+            row[key] = value if key in SCALAR_KEYS else json.dumps(value)
+    try:
+        spec = apply_variant(base_spec, overrides)
+        key = summary_key(spec) if disk_cache is not None else None
+        summary = disk_cache.load_json(key) if key else None
+        if summary is None:
+            summary = summarize_derived(*dfl.derive_table(spec, cache=cache))
+            if key:
+                disk_cache.save_json(key, summary)
+        row.update(summary)
+        row["error"] = ""
+    except (AssertionError, ValueError, KeyError, ZeroDivisionError) as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+# ---------- Process-pool plumbing ----------
+
+_worker_spec = None
+_worker_cache = None
+_worker_disk_cache = None
+
+def _init_worker(base_spec, cache_entries, disk_cache_root=None):
+    global _worker_spec, _worker_cache, _worker_disk_cache
+    _worker_spec = base_spec
+    _worker_cache = dfl.CrownSolveCache(max_entries=cache_entries)
+    _worker_disk_cache = derive_cache.DeriveCache(disk_cache_root) if disk_cache_root is not None else None
+
+def _evaluate_batch(batch):
+    return [evaluate_variant(_worker_spec, i, ov, cache=_worker_cache, disk_cache=_worker_disk_cache)
+            for i, ov in batch]
+
+def _batches(variants, size):
+    it = iter(variants)
+    while True:
+        batch = list(itertools.islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+class SummaryWriter:
+    """Streams summary rows to CSV (fixed header) or JSON lines."""
+    def __init__(self, path, fieldnames):
+        self.path = Path(path)
+        self.jsonl = self.path.suffix.lower() == ".jsonl"
+        self._f = open(self.path, "w", newline="")
+        self._csv = None
+        if not self.jsonl:
+            self._csv = csv.DictWriter(self._f, fieldnames=fieldnames, extrasaction="ignore")
+            self._csv.writeheader()
+        self.rows = 0
+
+    def write(self, row):
+        if self.jsonl:
+            self._f.write(json.dumps(row) + "\n")
+        else:
+            self._csv.writerow(row)
+        self.rows += 1
+
+    def flush(self):
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def run_sweep(base_spec, ranges, out_path, workers=None, batch_size=32, max_in_flight=None,
+              cache_entries=100000, progress=None, disk_cache=None):
+    """Evaluate every variant and stream summary rows to out_path; returns the row count.
+
+    workers=0 runs in-process. At most max_in_flight batches (default 2 per worker)
+    are queued at once, so memory does not grow with the number of variants.
+    Rows are written in completion order; the "variant" column gives the combination index.
+    disk_cache (a derive_cache.DeriveCache) skips variants summarized by earlier runs.
+    """
+    variants = iter_variants(ranges)
+    total = count_variants(ranges)
+    fields = summary_fields(int(base_spec["parameters"]["num_rings"]), normalize_ranges(ranges))
+    with SummaryWriter(out_path, fields) as writer:
+        if workers == 0:
+            cache = dfl.CrownSolveCache(max_entries=cache_entries)
+            for i, ov in variants:
+                writer.write(evaluate_variant(base_spec, i, ov, cache=cache, disk_cache=disk_cache))
+                if progress and writer.rows % batch_size == 0:
+                    progress(writer.rows, total)
+            writer.flush()
+            return writer.rows
+        workers = workers or os.cpu_count() or 1
+        limit = max_in_flight or 2 * workers
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(base_spec, cache_entries,
+                                           str(disk_cache.root) if disk_cache is not None else None)) as pool:
+            batches = _batches(variants, batch_size)
+            pending = set()
+            while True:
+                for batch in itertools.islice(batches, max(0, limit - len(pending))):
+                    pending.add(pool.submit(_evaluate_batch, batch))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    for row in fut.result():
+                        writer.write(row)
+                writer.flush()
+                if progress:
+                    progress(writer.rows, total)
+        return writer.rows
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Sweep a minimal stent spec over parameter ranges.")
+    ap.add_argument("base_spec", help="minimal spec JSON")
+    ap.add_argument("sweep", help="sweep ranges JSON (keys: %s)" % ", ".join(SWEEP_KEYS))
+    ap.add_argument("-o", "--output", help="summary .csv or .jsonl (default: sweep_<base>.csv next to the spec)")
+    ap.add_argument("--workers", type=int, default=None, help="process count (0 = in-process)")
+    ap.add_argument("--batch-size", type=int, default=32)
+    ap.add_argument("--cache-dir", default=None, help="derive cache directory (default: $%s or ~/.cache/stent_derive)"
+                    % derive_cache.CACHE_ENV)
+    ap.add_argument("--no-cache", action="store_true", help="derive every variant, ignoring the derive cache")
+    args = ap.parse_args(argv)
+
+    base_path = Path(args.base_spec).expanduser().resolve()
+    base_spec = dfl.load_spec(base_path)
+    with open(Path(args.sweep).expanduser()) as f:
+        ranges = json.load(f)
+    out_path = Path(args.output) if args.output else base_path.parent / f"sweep_{base_path.stem}.csv"
+    total = count_variants(ranges)
+    print(f"{total} variants -> {out_path}")
+    def progress(done, total):
+        print(f"\r{done}/{total}", end="", file=sys.stderr, flush=True)
+    disk_cache = None if args.no_cache else derive_cache.DeriveCache(args.cache_dir)
+    rows = run_sweep(base_spec, ranges, out_path, workers=args.workers,
+                     batch_size=args.batch_size, progress=progress, disk_cache=disk_cache)
+    print(file=sys.stderr)
+    print(str(out_path), rows)
+
+if __name__ == "__main__":
+    main()
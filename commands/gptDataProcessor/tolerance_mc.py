@@ -0,0 +1,303 @@
+"""
+tolerance_mc.py
+---------------
+Monte Carlo manufacturing-tolerance analysis of a minimal stent spec.
+
+Strut widths (per ring), gaps (per interface × column), diameter and R_factor
+are perturbed around the spec's nominal values with additive distributions
+  {"strut_width_mm_by_ring": {"dist": "normal", "sigma": 0.002},
+   "gaps_mm":                {"dist": "uniform", "half_width": 0.005},
+   "diameter_mm":            {"dist": "triangular", "half_width": 0.01},
+   "R_factor":               {"dist": "normal", "sigma": 0.05, "mean": 0.0}}
+and every sample goes through the deriver's geometry (stack_positions ->
+tangency solve -> cell_geometry) as one (samples, rings, cols) batch per chunk.
+
+Per ring × column the report gives mean / std / min / max of x_keepout_mm,
+theta_deg, sagitta_center_mm and alpha_deg, plus failure probabilities against
+limits such as
+  {"x_keepout_mm": {"min": 0.012}, "theta_deg": {"max": 175.0},
+   "sagitta_center_mm": {"max": 0.12}, "alpha_deg": {"abs_max": 88.0}}
+(unconverged tangency solves always count as failures).
+
+Chunk i is always drawn from SeedSequence(seed, spawn_key=(i,)) and chunk
+statistics are merged in chunk order, so results do not depend on the number of
+worker processes. Only running statistics are kept (plus an optional per-sample
+summary CSV streamed chunk by chunk), so memory stays flat in the sample count.
+
+Usage:
+  python tolerance_mc.py spec.json tolerances.json [-n/--samples 100000] [--seed 0]
+                         [--workers N] [--chunk-size N] [-o report.json]
+                         [--samples-csv samples.csv]
+  -n/--samples is the sample count; --workers 0 runs in-process; --chunk-size is
+  samples per chunk (default: ~1M cells per chunk; results depend on it and the
+  seed); --samples-csv streams the per-sample summary CSV; -o defaults to
+  tolerance_<spec>.json next to the spec.
+  tolerances.json holds {"tolerances": {...}, "limits": {...}} as above.
+"""
+import os, sys, json, math, argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+
+try:
+    from . import derive_from_linkmatrix as dfl
+except ImportError:
+    import derive_from_linkmatrix as dfl
+crown_geometry = dfl.crown_geometry
+
+TOLERANCE_KEYS = ("strut_width_mm_by_ring", "gaps_mm", "diameter_mm", "R_factor")
+METRICS = ("x_keepout_mm", "theta_deg", "sagitta_center_mm", "alpha_deg")
+LIMIT_KINDS = ("min", "max", "abs_max")
+SAMPLE_FIELDS = ("sample", "diameter_mm", "R_factor", "keepout_min_mm", "theta_max_deg",
+                 "sagitta_max_mm", "alpha_abs_max_deg", "failed")
+CELLS_PER_CHUNK = 1_000_000
+
+def draw(rng, dist, size):
+    """Additive offsets for one tolerance entry."""
+    kind = dist.get("dist", "normal")
+    mean = float(dist.get("mean", 0.0))
+    if kind == "normal":
+        return rng.normal(mean, float(dist["sigma"]), size)
+    if kind == "uniform":
+        h = float(dist["half_width"])
+        return rng.uniform(mean - h, mean + h, size)
+    if kind == "triangular":
+        h = float(dist["half_width"])
+        return rng.triangular(mean - h, mean, mean + h, size)
+    raise ValueError(f"Unknown distribution '{kind}'")
+
+def check_tolerances(tolerances, limits):
+    unknown = set(tolerances) - set(TOLERANCE_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown tolerance key(s): {sorted(unknown)}")
+    for metric, lim in limits.items():
+        if metric not in METRICS or set(lim) - set(LIMIT_KINDS):
+            raise ValueError(f"Bad limit {metric}: {lim}")
+
+class Nominal:
+    """Nominal (unperturbed) inputs of a minimal spec."""
+    def __init__(self, spec):
+        P = spec["parameters"]
+        self.num_rings = int(P["num_rings"]); self.C = int(P["crowns_per_ring"])
+        self.D = float(P["diameter_mm"]); self.L = float(P["length_mm"])
+        self.R_factor = float(P["R_factor"])
+        self.xk_min = float(P.get("x_keepout_min_mm", 0.010))
+        self.w = np.array(P["strut_width_mm_by_ring"], dtype=float)
+        self.factors = np.array(P["height_factors"], dtype=float)
+        link_matrix = np.array(spec["links"]["matrix"], dtype=int)
+        assert link_matrix.shape == (self.num_rings - 1, self.C)
+        self.gaps = dfl.gaps_from_policy(link_matrix, spec["gaps_policy"])
+
+def sample_geometry(nom, tolerances, rng, n):
+    """Perturbed geometry of n samples: ({metric: (n, R, C)}, converged, D, R_factor)."""
+    R, C = nom.num_rings, nom.C
+    def offsets(key, size):
+        return draw(rng, tolerances[key], size) if key in tolerances else np.zeros(size)
+    # fixed draw order (widths, gaps, diameter, R_factor) keeps streams reproducible
+    w = nom.w[None, :] + offsets("strut_width_mm_by_ring", (n, R))
+    gaps = nom.gaps[None] + offsets("gaps_mm", (n, R - 1, C))
+    D = nom.D + offsets("diameter_mm", n)
+    Rf = nom.R_factor + offsets("R_factor", n)
+
+    pitch = (math.pi * D / C)[:, None, None]
+    scale = (nom.L - gaps.sum(axis=-2)) / nom.factors.sum()
+    H, y_top, y_bot = dfl.stack_positions(nom.factors, scale, gaps)
+    w3 = w[:, :, None]; Rc = Rf[:, None, None] * w3
+    sol = crown_geometry.solve_tangency_batch(0.5*H, 0.5*pitch, w3, Rc)
+    values = dfl.cell_geometry(sol.delta, H, y_top, y_bot, pitch, nom.L, w3, Rc, nom.xk_min,
+                               np.arange(R), np.arange(C))
+    shape = (n, R, C)
+    metrics = {m: np.broadcast_to(values[m], shape) for m in METRICS}
+    return metrics, np.broadcast_to(sol.converged, shape), D, Rf
+
+def failures(metrics, converged, limits):
+    """{metric: (n, R, C) bool} of limit violations, plus "solver" for unconverged cells."""
+    out = {}
+    for metric, lim in limits.items():
+        v = metrics[metric]
+        bad = np.zeros(v.shape, dtype=bool)
+        if "min" in lim:
+            bad |= v < lim["min"]
+        if "max" in lim:
+            bad |= v > lim["max"]
+        if "abs_max" in lim:
+            bad |= np.abs(v) > lim["abs_max"]
+        out[metric] = bad
+    out["solver"] = ~converged
+    return out
+
+class ChunkStats:
+    """Running per-cell moments, extrema and failure counts; merged with Chan's formula."""
+    def __init__(self, num_rings, C, fail_keys):
+        shape = (num_rings, C)
+        self.n = 0
+        self.mean = {m: np.zeros(shape) for m in METRICS}
+        self.m2 = {m: np.zeros(shape) for m in METRICS}
+        self.min = {m: np.full(shape, np.inf) for m in METRICS}
+        self.max = {m: np.full(shape, -np.inf) for m in METRICS}
+        self.fail_cells = {k: np.zeros(shape, dtype=np.int64) for k in fail_keys}
+        self.fail_rings = {k: np.zeros(num_rings, dtype=np.int64) for k in fail_keys}
+        self.fail_any = 0
+
+    @classmethod
+    def from_samples(cls, metrics, fails):
+        n, R, C = next(iter(metrics.values())).shape
+        st = cls(R, C, list(fails))
+        st.n = n
+        for m, v in metrics.items():
+            st.mean[m] = v.mean(axis=0)
+            st.m2[m] = ((v - st.mean[m])**2).sum(axis=0)
+            st.min[m] = v.min(axis=0); st.max[m] = v.max(axis=0)
+        any_fail = np.zeros(n, dtype=bool)
+        for k, bad in fails.items():
+            st.fail_cells[k] = bad.sum(axis=0)
+            st.fail_rings[k] = bad.any(axis=2).sum(axis=0)
+            any_fail |= bad.any(axis=(1, 2))
+        st.fail_any = int(any_fail.sum())
+        return st
+
+    def merge(self, other):
+        n = self.n + other.n
+        if other.n:
+            for m in METRICS:
+                d = other.mean[m] - self.mean[m]
+                self.mean[m] = self.mean[m] + d * (other.n / n)
+                self.m2[m] = self.m2[m] + other.m2[m] + d**2 * (self.n * other.n / n)
+                self.min[m] = np.minimum(self.min[m], other.min[m])
+                self.max[m] = np.maximum(self.max[m], other.max[m])
+            for k in self.fail_cells:
+                self.fail_cells[k] = self.fail_cells[k] + other.fail_cells[k]
+                self.fail_rings[k] = self.fail_rings[k] + other.fail_rings[k]
+            self.fail_any += other.fail_any
+        self.n = n
+        return self
+
+    def report(self):
+        n = max(self.n, 1)
+        out = {"samples": self.n, "failure_probability": self.fail_any / n, "metrics": {}, "failures": {}}
+        for m in METRICS:
+            std = np.sqrt(self.m2[m] / max(self.n - 1, 1))
+            out["metrics"][m] = {"mean": self.mean[m].tolist(), "std": std.tolist(),
+                                 "min": self.min[m].tolist(), "max": self.max[m].tolist()}
+        for k in self.fail_cells:
+            out["failures"][k] = {"probability_by_cell": (self.fail_cells[k] / n).tolist(),
+                                  "probability_by_ring": (self.fail_rings[k] / n).tolist()}
+        return out
+
+def sample_rows(start, metrics, fails, D, Rf):
+    """Per-sample summary (n, len(SAMPLE_FIELDS)) for the optional samples CSV."""
+    any_fail = np.zeros(D.shape[0], dtype=bool)
+    for bad in fails.values():
+        any_fail |= bad.any(axis=(1, 2))
+    return np.column_stack([
+        np.arange(start, start + D.shape[0]), D, Rf,
+        metrics["x_keepout_mm"].min(axis=(1, 2)), metrics["theta_deg"].max(axis=(1, 2)),
+        metrics["sagitta_center_mm"].max(axis=(1, 2)), np.abs(metrics["alpha_deg"]).max(axis=(1, 2)),
+        any_fail,
+    ])
+
+def run_chunk(spec, tolerances, limits, seed, index, start, n, want_rows=False):
+    """Statistics (and optionally per-sample rows) of chunk `index`."""
+    nom = Nominal(spec)
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+    metrics, converged, D, Rf = sample_geometry(nom, tolerances, rng, n)
+    fails = failures(metrics, converged, limits)
+    rows = sample_rows(start, metrics, fails, D, Rf) if want_rows else None
+    return ChunkStats.from_samples(metrics, fails), rows
+
+# ---------- Process-pool plumbing ----------
+
+_worker_args = None
+
+def _init_worker(spec, tolerances, limits, seed, want_rows):
+    global _worker_args
+    _worker_args = (spec, tolerances, limits, seed, want_rows)
+
+def _run_chunk(task):
+    spec, tolerances, limits, seed, want_rows = _worker_args
+    index, start, n = task
+    return run_chunk(spec, tolerances, limits, seed, index, start, n, want_rows)
+
+def chunk_tasks(samples, chunk_size):
+    for index, start in enumerate(range(0, samples, chunk_size)):
+        yield index, start, min(chunk_size, samples - start)
+
+def run_tolerance_analysis(spec, tolerances, samples, limits=None, seed=0, workers=None,
+                           chunk_size=None, samples_path=None, progress=None):
+    """Monte Carlo report dict for `samples` perturbed copies of spec (see module docstring).
+
+    workers=0 runs in-process. Results depend only on (seed, chunk_size), not on workers.
+    """
+    limits = limits or {}
+    check_tolerances(tolerances, limits)
+    nom = Nominal(spec)
+    chunk_size = chunk_size or max(1, CELLS_PER_CHUNK // (nom.num_rings * nom.C))
+    want_rows = samples_path is not None
+    total = ChunkStats(nom.num_rings, nom.C, [*limits, "solver"])
+    out = open(samples_path, "w") if want_rows else None
+    try:
+        if out:
+            out.write(",".join(SAMPLE_FIELDS) + "\n")
+
+        def consume(result):
+            stats, rows = result
+            total.merge(stats)
+            if out:
+                np.savetxt(out, rows, delimiter=",", fmt=["%d", "%.9g", "%.9g", "%.9g", "%.9g", "%.9g",
+                                                           "%.9g", "%d"])
+            if progress:
+                progress(total.n, samples)
+
+        tasks = chunk_tasks(samples, chunk_size)
+        if workers == 0:
+            for index, start, n in tasks:
+                consume(run_chunk(spec, tolerances, limits, seed, index, start, n, want_rows))
+        else:
+            workers = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(spec, tolerances, limits, seed, want_rows)) as pool:
+                # bounded, in-order window: deterministic merge order, flat memory
+                pending = deque()
+                for task in tasks:
+                    pending.append(pool.submit(_run_chunk, task))
+                    if len(pending) >= 2 * workers:
+                        consume(pending.popleft().result())
+                while pending:
+                    consume(pending.popleft().result())
+    finally:
+        if out:
+            out.close()
+    report = total.report()
+    report.update({"seed": seed, "chunk_size": chunk_size, "tolerances": tolerances, "limits": limits})
+    return report
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Monte Carlo tolerance analysis of a minimal stent spec.")
+    ap.add_argument("spec", help="minimal spec JSON")
+    ap.add_argument("tolerances", help='JSON {"tolerances": {...}, "limits": {...}}')
+    ap.add_argument("-n", "--samples", type=int, default=100000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=None, help="process count (0 = in-process)")
+    ap.add_argument("--chunk-size", type=int, default=None)
+    ap.add_argument("-o", "--output", help="report JSON (default: tolerance_<spec>.json next to the spec)")
+    ap.add_argument("--samples-csv", help="optional per-sample summary CSV")
+    args = ap.parse_args(argv)
+
+    spec_path = Path(args.spec).expanduser().resolve()
+    spec = dfl.load_spec(spec_path)
+    with open(Path(args.tolerances).expanduser()) as f:
+        cfg = json.load(f)
+    def progress(done, total):
+        print(f"\r{done}/{total}", end="", file=sys.stderr, flush=True)
+    report = run_tolerance_analysis(spec, cfg.get("tolerances", {}), args.samples, cfg.get("limits"),
+                                    seed=args.seed, workers=args.workers, chunk_size=args.chunk_size,
+                                    samples_path=args.samples_csv, progress=progress)
+    print(file=sys.stderr)
+    out_path = Path(args.output) if args.output else spec_path.parent / f"tolerance_{spec_path.stem}.json"
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(str(out_path), f"failure probability {report['failure_probability']:.6g}")
+
+if __name__ == "__main__":
+    main()
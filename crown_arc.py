@@ -1,49 +1,87 @@
 import math
+import sys
 from dataclasses import dataclass
 
 # ---------- Geometry helpers for a circular crown apex ----------
 
 
-def theta_from_sagitta(h_mm: float, Rc_um: float) -> float:
+def _is_array(*args) -> bool:
+    """True if any argument is array-like (NumPy array, list or tuple).
+
+    numpy is only imported by the array branches: if nothing has imported it
+    yet, no argument can be an ndarray.
+    """
+    np = sys.modules.get("numpy")
+    array_types = (list, tuple) if np is None else (np.ndarray, list, tuple)
+    return any(isinstance(a, array_types) for a in args)
+
+
+def theta_from_sagitta(h_mm, Rc_um):
     """Solve included angle θ (deg) from sagitta h (mm) and centerline radius Rc (µm)."""
+    if _is_array(h_mm, Rc_um):
+        import numpy as np
+        Rc = np.asarray(Rc_um, dtype=float) / 1000.0
+        c = np.clip(1.0 - np.asarray(h_mm, dtype=float)/(2.0*Rc), -1.0, 1.0)
+        return 2.0 * np.degrees(np.arccos(c))
     Rc = Rc_um / 1000.0
     # guard rounding
     c = max(-1.0, min(1.0, 1.0 - h_mm/(2.0*Rc)))
     return 2.0 * math.degrees(math.acos(c))
 
 
-def sagitta_from_theta(theta_deg: float, Rc_um: float) -> float:
+def sagitta_from_theta(theta_deg, Rc_um):
     """Sagitta h (mm) for included angle θ (deg) and centerline radius Rc (µm)."""
+    if _is_array(theta_deg, Rc_um):
+        import numpy as np
+        Rc = np.asarray(Rc_um, dtype=float) / 1000.0
+        return 2.0 * Rc * (1.0 - np.cos(np.radians(theta_deg)/2.0))
     Rc = Rc_um / 1000.0
     return 2.0 * Rc * (1.0 - math.cos(math.radians(theta_deg)/2.0))
 
 
-def chord_from_theta(theta_deg: float, Rc_um: float) -> float:
+def chord_from_theta(theta_deg, Rc_um):
     """Chord length (mm) for θ (deg) and Rc (µm)."""
+    if _is_array(theta_deg, Rc_um):
+        import numpy as np
+        Rc = np.asarray(Rc_um, dtype=float) / 1000.0
+        return 2.0 * Rc * np.sin(np.radians(theta_deg)/2.0)
     Rc = Rc_um / 1000.0
     return 2.0 * Rc * math.sin(math.radians(theta_deg)/2.0)
 
 
-def arc_len_from_theta(theta_deg: float, Rc_um: float) -> float:
+def arc_len_from_theta(theta_deg, Rc_um):
     """Arc length (mm) for θ (deg) and Rc (µm)."""
+    if _is_array(theta_deg, Rc_um):
+        import numpy as np
+        return np.radians(theta_deg) * (np.asarray(Rc_um, dtype=float) / 1000.0)
     Rc = Rc_um / 1000.0
     return math.radians(theta_deg) * Rc
 
 
-def Rc_from_theta_sagitta(theta_deg: float, h_mm: float) -> float:
+def Rc_from_theta_sagitta(theta_deg, h_mm):
     """Solve centerline radius Rc (µm) from θ (deg) and sagitta h (mm)."""
+    if _is_array(theta_deg, h_mm):
+        import numpy as np
+        theta = np.radians(theta_deg)
+        return np.asarray(h_mm, dtype=float) / (2.0 * (1.0 - np.cos(theta/2.0))) * 1000.0
     theta = math.radians(theta_deg)
     Rc_mm = h_mm / (2.0 * (1.0 - math.cos(theta/2.0)))
     return Rc_mm * 1000.0
 
 
-def curvature_from_Rc(Rc_um: float) -> float:
+def curvature_from_Rc(Rc_um):
     """Curvature κ = 1/R (1/mm) from centerline Rc (µm)."""
+    if _is_array(Rc_um):
+        import numpy as np
+        return 1.0 / (np.asarray(Rc_um, dtype=float) / 1000.0)
     return 1.0 / (Rc_um / 1000.0)
 
 
-def radius_to_width_ratio(Rc_um: float, w_um: float) -> float:
+def radius_to_width_ratio(Rc_um, w_um):
     """Rule‑of‑thumb check: Rc / strut width (dimensionless)."""
+    if _is_array(Rc_um, w_um):
+        import numpy as np
+        return np.asarray(Rc_um, dtype=float) / np.asarray(w_um, dtype=float)
     return Rc_um / w_um
 
 # (Optional) very rough in‑plane extreme‑fiber strain estimate if the arc curvature changes:
@@ -51,26 +89,50 @@ def radius_to_width_ratio(Rc_um: float, w_um: float) -> float:
 # For pure geometric sanity (no Δκ), you can look at (w/2)/Rc as a non‑dimensional index.
 
 
-def geometric_index_w_over_Rc(w_um: float, Rc_um: float) -> float:
+def geometric_index_w_over_Rc(w_um, Rc_um):
     """(w/2)/Rc (dimensionless). Lower is gentler curvature."""
+    if _is_array(w_um, Rc_um):
+        import numpy as np
+        return (0.5 * np.asarray(w_um, dtype=float)) / np.asarray(Rc_um, dtype=float)
     return (0.5 * w_um) / Rc_um
 
-# ---------- Convenience container ----------
+# ---------- Convenience containers ----------
+#
+# All helpers above accept floats (plain math, float result) or array-likes
+# (NumPy, broadcast, array result). numpy is imported on first array use, so
+# the scalar path works without it. CrownArc is the scalar container; it
+# caches derived values, so repeated queries cost an attribute read.
+# CrownArcBatch holds Rc/θ arrays for sweeps.
 
 
 @dataclass
 class CrownArc:
+    """Scalar crown arc (Rc in µm, included angle θ in deg); derived values are cached until a field changes."""
+    __slots__ = ("Rc_um", "theta_deg", "_sagitta", "_chord", "_arc_len")
     Rc_um: float
     theta_deg: float
 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in ("Rc_um", "theta_deg"):
+            object.__setattr__(self, "_sagitta", None)
+            object.__setattr__(self, "_chord", None)
+            object.__setattr__(self, "_arc_len", None)
+
     def sagitta_mm(self) -> float:
-        return sagitta_from_theta(self.theta_deg, self.Rc_um)
+        if self._sagitta is None:
+            self._sagitta = sagitta_from_theta(self.theta_deg, self.Rc_um)
+        return self._sagitta
 
     def chord_mm(self) -> float:
-        return chord_from_theta(self.theta_deg, self.Rc_um)
+        if self._chord is None:
+            self._chord = chord_from_theta(self.theta_deg, self.Rc_um)
+        return self._chord
 
     def arc_len_mm(self) -> float:
-        return arc_len_from_theta(self.theta_deg, self.Rc_um)
+        if self._arc_len is None:
+            self._arc_len = arc_len_from_theta(self.theta_deg, self.Rc_um)
+        return self._arc_len
 
     def curvature_mm_inv(self) -> float:
         return curvature_from_Rc(self.Rc_um)
@@ -80,3 +142,65 @@ class CrownArc:
 
     def geom_index(self, w_um: float) -> float:
         return geometric_index_w_over_Rc(w_um, self.Rc_um)
+
+
+class CrownArcBatch:
+    """Many crown arcs as broadcast Rc (µm) / θ (deg) arrays with vectorized derived values."""
+
+    def __init__(self, Rc_um, theta_deg):
+        import numpy as np
+        self.Rc_um, self.theta_deg = (np.array(a) for a in np.broadcast_arrays(
+            np.asarray(Rc_um, dtype=float), np.asarray(theta_deg, dtype=float)))
+
+    @classmethod
+    def from_arcs(cls, arcs):
+        arcs = list(arcs)
+        return cls([a.Rc_um for a in arcs], [a.theta_deg for a in arcs])
+
+    @classmethod
+    def from_sagitta(cls, h_mm, Rc_um):
+        """Arcs with the given sagittas (mm) and radii (µm)."""
+        import numpy as np
+        return cls(Rc_um, theta_from_sagitta(np.asarray(h_mm, dtype=float), Rc_um))
+
+    @property
+    def shape(self):
+        return self.Rc_um.shape
+
+    # As a sequence a batch is its arcs in C order, whatever its shape;
+    # the vectorized methods keep the shape.
+    def __len__(self):
+        return self.Rc_um.size
+
+    def __getitem__(self, index):
+        Rc, theta = self.Rc_um.ravel()[index], self.theta_deg.ravel()[index]
+        if Rc.ndim == 0:
+            return CrownArc(float(Rc), float(theta))
+        return CrownArcBatch(Rc, theta)
+
+    def __iter__(self):
+        for Rc, theta in zip(self.Rc_um.ravel().tolist(), self.theta_deg.ravel().tolist()):
+            yield CrownArc(Rc, theta)
+
+    def __repr__(self):
+        return f"CrownArcBatch(shape={self.shape})"
+
+    def sagitta_mm(self):
+        return sagitta_from_theta(self.theta_deg, self.Rc_um)
+
+    def chord_mm(self):
+        return chord_from_theta(self.theta_deg, self.Rc_um)
+
+    def arc_len_mm(self):
+        return arc_len_from_theta(self.theta_deg, self.Rc_um)
+
+    def curvature_mm_inv(self):
+        return curvature_from_Rc(self.Rc_um)
+
+    def r_over_w(self, w_um):
+        import numpy as np
+        return radius_to_width_ratio(self.Rc_um, np.asarray(w_um, dtype=float))
+
+    def geom_index(self, w_um):
+        import numpy as np
+        return geometric_index_w_over_Rc(np.asarray(w_um, dtype=float), self.Rc_um)
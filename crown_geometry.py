@@ -0,0 +1,224 @@
+import math
+from dataclasses import dataclass
+
+# ---------- Quarter-wave tangency kernel ----------
+#
+# Quarter-rectangle (Hq × Wq) crown construction with strut width w and
+# centerline radius R: the contact angle δ satisfies
+#
+#     F(δ) = tan δ - 2*(Hq - w/2 - R*(1 - cos δ)) / (Wq - 2 R sin δ) = 0
+#
+# Multiplying through by cos δ * (Wq - 2 R sin δ) gives
+#
+#     Wq sin δ - B cos δ = 2 R,   B = 2*(Hq - w/2 - R)
+#
+# i.e. ρ sin(δ - φ) = 2R with ρ = hypot(Wq, B), φ = atan2(B, Wq), which yields
+# the closed-form first guess δ0 = φ + asin(2R/ρ). A safeguarded Newton
+# iteration on F (bisection whenever a step leaves the bracket) then polishes
+# δ0 to machine precision, usually in 0-2 steps. Scalars stay on math (the
+# dialog loads without numpy); numpy is imported only for arrays.
+
+DELTA_MIN = math.radians(1e-6)   # same floor as the original bisection fallback
+DELTA_MAX = math.radians(89.9)
+
+
+@dataclass
+class TangencySolution:
+    """Solver output; fields are floats for scalar solves, arrays for batch solves."""
+    delta: float          # contact angle δ (rad)
+    iterations: int       # Newton/bisection steps taken
+    evaluations: int      # F(δ) evaluations
+    residual: float       # |F(δ)| at the returned δ
+    converged: bool
+
+
+def _is_scalar(*args) -> bool:
+    """True if every argument is a plain number (numpy scalars subclass float)."""
+    return all(isinstance(a, (int, float)) for a in args)
+
+
+def _clamp_denom(denom):
+    if abs(denom) < 1e-14:
+        return 1e-14 if denom >= 0 else -1e-14
+    return denom
+
+
+def tangency_residual(d, Hq, Wq, w, R):
+    """F(δ) for the quarter-rectangle tangency equation (works on floats or arrays)."""
+    A = Hq - 0.5 * w
+    if _is_scalar(d, Hq, Wq, w, R):
+        denom = _clamp_denom(Wq - 2.0 * R * math.sin(d))
+        return math.tan(d) - (2.0 * (A - R * (1.0 - math.cos(d)))) / denom
+    import numpy as np
+    denom = Wq - 2.0 * R * np.sin(d)
+    denom = np.where(np.abs(denom) < 1e-14, np.where(denom >= 0, 1e-14, -1e-14), denom)
+    return np.tan(d) - (2.0 * (A - R * (1.0 - np.cos(d)))) / denom
+
+
+def tangency_residual_derivative(d, Hq, Wq, w, R):
+    """Analytic dF/dδ."""
+    A = Hq - 0.5 * w
+    if _is_scalar(d, Hq, Wq, w, R):
+        s, c = math.sin(d), math.cos(d)
+        denom = _clamp_denom(Wq - 2.0 * R * s)
+    else:
+        import numpy as np
+        s, c = np.sin(d), np.cos(d)
+        denom = Wq - 2.0 * R * s
+        denom = np.where(np.abs(denom) < 1e-14, np.where(denom >= 0, 1e-14, -1e-14), denom)
+    num = 2.0 * (A - R * (1.0 - c))
+    # d/dδ [num/denom] = (num' * denom - num * denom') / denom², num' = -2R s, denom' = -2R c
+    return 1.0 / (c * c) - (-2.0 * R * s * denom + 2.0 * R * c * num) / (denom * denom)
+
+
+def tangency_initial_guess(Hq, Wq, w, R):
+    """Closed-form δ0 from ρ sin(δ - φ) = 2R; falls back to the R→0 angle atan(2A/Wq)."""
+    A = Hq - 0.5 * w
+    B = 2.0 * (A - R)
+    if _is_scalar(Hq, Wq, w, R):
+        rho = math.hypot(Wq, B)
+        ratio = 2.0 * R / rho if rho > 0 else math.inf
+        if abs(ratio) <= 1.0:
+            guess = math.atan2(B, Wq) + math.asin(ratio)
+        else:
+            guess = math.atan2(2.0 * A, Wq)
+        return min(max(guess, DELTA_MIN), DELTA_MAX)
+    import numpy as np
+    rho = np.hypot(Wq, B)
+    ratio = np.divide(2.0 * R, rho, out=np.full(np.shape(rho), np.inf), where=rho > 0)
+    exact = np.arctan2(B, Wq) + np.arcsin(np.clip(ratio, -1.0, 1.0))
+    fallback = np.arctan2(2.0 * A, Wq)
+    guess = np.where(np.abs(ratio) <= 1.0, exact, fallback)
+    return np.clip(guess, DELTA_MIN, DELTA_MAX)
+
+
+def _feasible_bracket(Wq, R):
+    """Bracket [lo, hi] for δ that stops short of the Wq = 2R sin δ pole."""
+    if _is_scalar(Wq, R):
+        ratio = Wq / (2.0 * R) if R > 0 else math.inf
+        pole = math.asin(min(max(ratio, 0.0), 1.0)) if ratio < 1.0 else math.inf
+        hi = min(DELTA_MAX, pole - 1e-9)
+        return min(DELTA_MIN, hi), hi
+    import numpy as np
+    ratio = np.divide(Wq, 2.0 * R, out=np.full(np.shape(Wq), np.inf), where=R > 0)
+    pole = np.where(ratio < 1.0, np.arcsin(np.clip(ratio, 0.0, 1.0)), np.inf)
+    hi = np.minimum(DELTA_MAX, pole - 1e-9)
+    lo = np.minimum(DELTA_MIN, hi)
+    return lo, hi
+
+
+def solve_tangency_batch(Hq, Wq, w, R, tol=1e-13, xtol=1e-13, max_iter=60):
+    """Solve δ for arrays of quarter-rectangle (Hq, Wq, w, R); inputs broadcast.
+
+    Stops when |F(δ)| < tol or the δ step falls below xtol (rad). Returns a
+    TangencySolution whose fields are arrays with the broadcast shape
+    (iterations/evaluations are per cell).
+    """
+    import numpy as np
+    Hq, Wq, w, R = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (Hq, Wq, w, R)))
+    shape = Hq.shape
+    Hq, Wq, w, R = (a.ravel() for a in (Hq, Wq, w, R))
+    n = Hq.size
+
+    lo, hi = _feasible_bracket(Wq, R)
+    f_lo = tangency_residual(lo, Hq, Wq, w, R)
+    f_hi = tangency_residual(hi, Hq, Wq, w, R)
+    bracketed = f_lo * f_hi <= 0.0
+    d = np.clip(tangency_initial_guess(Hq, Wq, w, R), lo, hi)
+    f = tangency_residual(d, Hq, Wq, w, R)
+    evaluations = np.full(n, 3, dtype=int)
+    iterations = np.zeros(n, dtype=int)
+    done = np.abs(f) < tol
+    step = np.full(n, np.inf)
+
+    for _ in range(max_iter):
+        active = ~done
+        if not active.any():
+            break
+        # shrink the bracket around the current iterate
+        left = bracketed & (f_lo * f > 0.0)
+        lo = np.where(active & left, d, lo)
+        f_lo = np.where(active & left, f, f_lo)
+        hi = np.where(active & bracketed & ~left, d, hi)
+        # Newton step, bisect when it leaves the bracket or the slope is useless
+        fp = tangency_residual_derivative(d, Hq, Wq, w, R)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d_newton = d - f / fp
+        # a sub-xtol Newton step is accepted even if rounding puts it on the bracket edge
+        outside = ~np.isfinite(d_newton) | (((d_newton <= lo) | (d_newton >= hi)) & ~(np.abs(d_newton - d) < xtol))
+        d_bisect = np.where(bracketed, 0.5 * (lo + hi), np.clip(d_newton, lo, hi))
+        d_next = np.where(outside, d_bisect, d_newton)
+        d_next = np.where(np.isfinite(d_next), d_next, d)
+        step = np.where(active, np.abs(d_next - d), step)
+        d = np.where(active, d_next, d)
+        f = np.where(active, tangency_residual(d, Hq, Wq, w, R), f)
+        evaluations += active
+        iterations += active
+        done |= (np.abs(f) < tol) | (step < xtol)
+
+    residual = np.abs(f)
+    converged = done & (bracketed | (residual < 1e-9))
+    return TangencySolution(
+        delta=d.reshape(shape),
+        iterations=iterations.reshape(shape),
+        evaluations=evaluations.reshape(shape),
+        residual=residual.reshape(shape),
+        converged=converged.reshape(shape),
+    )
+
+
+def solve_tangency(Hq: float, Wq: float, w: float, R: float,
+                   tol: float = 1e-13, xtol: float = 1e-13, max_iter: int = 60) -> TangencySolution:
+    """Scalar δ (rad) for one quarter-rectangle (Hq, Wq) with strut width w and radius R.
+
+    Same safeguarded Newton iteration as solve_tangency_batch, in plain math
+    so the dialog does not need numpy.
+    """
+    Hq, Wq, w, R = float(Hq), float(Wq), float(w), float(R)
+    lo, hi = _feasible_bracket(Wq, R)
+    f_lo = tangency_residual(lo, Hq, Wq, w, R)
+    f_hi = tangency_residual(hi, Hq, Wq, w, R)
+    bracketed = f_lo * f_hi <= 0.0
+    d = min(max(tangency_initial_guess(Hq, Wq, w, R), lo), hi)
+    f = tangency_residual(d, Hq, Wq, w, R)
+    evaluations, iterations = 3, 0
+    done = abs(f) < tol
+
+    for _ in range(max_iter):
+        if done:
+            break
+        if bracketed:
+            if f_lo * f > 0.0:
+                lo, f_lo = d, f
+            else:
+                hi = d
+        fp = tangency_residual_derivative(d, Hq, Wq, w, R)
+        d_newton = d - f / fp if fp != 0.0 else math.nan
+        outside = not math.isfinite(d_newton) or (
+            (d_newton <= lo or d_newton >= hi) and not abs(d_newton - d) < xtol)
+        if outside:
+            d_next = 0.5 * (lo + hi) if bracketed else min(max(d_newton, lo), hi)
+        else:
+            d_next = d_newton
+        if not math.isfinite(d_next):
+            d_next = d
+        step = abs(d_next - d)
+        d = d_next
+        f = tangency_residual(d, Hq, Wq, w, R)
+        evaluations += 1
+        iterations += 1
+        done = abs(f) < tol or step < xtol
+
+    residual = abs(f)
+    return TangencySolution(
+        delta=d,
+        iterations=iterations,
+        evaluations=evaluations,
+        residual=residual,
+        converged=done and (bracketed or residual < 1e-9),
+    )
+
+
+def solve_delta_full_wave(H_full: float, W_full: float, w: float, R: float) -> float:
+    """δ (rad) for a *full-wave* cell (H_full × W_full); halves to the quarter rectangle."""
+    return solve_tangency(0.5 * H_full, 0.5 * W_full, w, R).delta
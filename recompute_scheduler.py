@@ -0,0 +1,142 @@
+"""
+recompute_scheduler.py
+----------------------
+Debounced, dependency-driven recompute of derived dialog state (no Fusion imports).
+
+The dialog declares its derived tables and hidden configuration strings as
+Nodes, in run order:
+  Node(name, inputs, deps, action)
+    inputs  input ids (fnmatch patterns, e.g. 'height_ring_*_factor') whose
+            change makes the node dirty
+    deps    earlier nodes it is computed from: a dirty dep makes it dirty too
+    action  action(context), recomputes the node (context: the command inputs)
+
+changed(input_id) only marks nodes dirty and pushes the deadline back; once
+no change has arrived for debounce_s, poll() runs every dirty node once, in
+declaration order, so a burst of spinner clicks or keystrokes rebuilds each
+table at most once. Inputs written by the actions themselves fire change
+events too: those arriving while the scheduler is applying are ignored, the
+graph already says what they feed.
+
+wake(delay_s) must arrange for poll() to be called after delay_s seconds;
+the dialog fires a Fusion custom event from a timer thread, so poll() runs on
+the UI thread. At most one wake is outstanding at a time.
+"""
+from collections import Counter, namedtuple
+from fnmatch import fnmatchcase
+import time
+
+DEBOUNCE_S = 0.15
+
+Node = namedtuple("Node", "name inputs deps action")
+
+
+class RecomputeScheduler:
+    def __init__(self, nodes, wake=None, debounce_s=DEBOUNCE_S, clock=time.monotonic, on_error=None):
+        self.nodes = list(nodes)
+        self.wake = wake
+        self.debounce_s = debounce_s
+        self.clock = clock
+        self.on_error = on_error
+        self.runs = Counter()           # node name -> times recomputed
+        self.bursts = 0
+        self.ignored = 0                # change events fired by the actions themselves
+        self.applying = False
+        self._dirty = set()
+        self._deadline = None
+        self._armed = False
+        self._by_input = {}             # input id -> node names (memoized pattern matches)
+        self._order = {}
+        for i, node in enumerate(self.nodes):
+            if node.name in self._order:
+                raise ValueError(f"duplicate node {node.name!r}")
+            for dep in node.deps:
+                if dep not in self._order:
+                    raise ValueError(f"node {node.name!r} depends on {dep!r}, which is not declared before it")
+            self._order[node.name] = i
+        # node -> itself and everything computed from it
+        self._closure = {}
+        for node in reversed(self.nodes):
+            down = {node.name}
+            for other in self.nodes[self._order[node.name] + 1:]:
+                if node.name in other.deps:
+                    down |= self._closure[other.name]
+            self._closure[node.name] = frozenset(down)
+
+    @property
+    def pending(self):
+        """Dirty node names, in run order."""
+        return sorted(self._dirty, key=self._order.__getitem__)
+
+    def nodes_for(self, input_id):
+        names = self._by_input.get(input_id)
+        if names is None:
+            names = tuple(node.name for node in self.nodes
+                          if any(fnmatchcase(input_id, p) for p in node.inputs))
+            self._by_input[input_id] = names
+        return names
+
+    def changed(self, input_id):
+        """Note a changed input; returns True if it feeds any node."""
+        if self.applying:
+            self.ignored += 1
+            return False
+        names = self.nodes_for(input_id)
+        if names:
+            self.mark(*names)
+        return bool(names)
+
+    def mark(self, *names):
+        """Make nodes (and what depends on them) dirty and restart the debounce window."""
+        for name in names:
+            self._dirty |= self._closure[name]
+        self._deadline = self.clock() + self.debounce_s
+        if self.wake is not None and not self._armed:
+            self._armed = True
+            self.wake(self.debounce_s)
+
+    def poll(self, context):
+        """Wake-up: recompute if the burst is over, else wait for the rest of it.
+
+        Returns the names recomputed ([] if still waiting or nothing was dirty).
+        """
+        self._armed = False
+        if not self._dirty:
+            return []
+        remaining = self._deadline - self.clock()
+        if remaining > 0:
+            if self.wake is not None:
+                self._armed = True
+                self.wake(remaining)
+            return []
+        return self.flush(context)
+
+    def flush(self, context):
+        """Recompute every dirty node now (e.g. before execute reads the tables)."""
+        if self.applying or not self._dirty:
+            return []
+        dirty, self._dirty = self._dirty, set()
+        self._deadline = None
+        ran = []
+        self.applying = True
+        try:
+            for node in self.nodes:
+                if node.name not in dirty:
+                    continue
+                try:
+                    node.action(context)
+                except Exception as e:
+                    if self.on_error is None:
+                        raise
+                    self.on_error(node.name, e)
+                self.runs[node.name] += 1
+                ran.append(node.name)
+        finally:
+            self.applying = False
+        self.bursts += 1
+        return ran
+
+    def cancel(self):
+        """Drop pending work (dialog closed); a wake still in flight then finds nothing to do."""
+        self._dirty.clear()
+        self._deadline = None
@@ -0,0 +1,130 @@
+"""
+sketch_backend.py
+-----------------
+The sketch primitives the drawing code uses, behind one small interface.
+
+Lengths are in mm. FusionSketchBackend forwards to a Fusion sketch
+(sketchLines / sketchPoints / geometricConstraints, converting to cm);
+RecordingBackend keeps every primitive in flat arrays and counts the API
+calls a Fusion sketch would have received, so the drawing pipeline can be
+run, profiled and regression-tested without Fusion.
+
+Handles returned by add_line / add_point are opaque: sketch entities for
+Fusion, integer indices for the recorder.
+"""
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+
+MM_TO_CM = 0.1          # Fusion API lengths are in cm
+
+
+class SketchBackend:
+    def add_line(self, x0, y0, x1, y1, construction=False):
+        raise NotImplementedError
+
+    def add_point(self, x, y):
+        raise NotImplementedError
+
+    def add_coincident(self, point, curve):
+        raise NotImplementedError
+
+    @contextmanager
+    def deferred(self):
+        """Batch the enclosed calls (sketch compute deferred until the block exits)."""
+        yield
+
+
+class FusionSketchBackend(SketchBackend):
+    def __init__(self, sketch, point=None):
+        if point is None:
+            import adsk.core
+            point = adsk.core.Point3D.create
+        self.sketch = sketch
+        self._point = point
+        self._lines = sketch.sketchCurves.sketchLines
+        self._points = sketch.sketchPoints
+        self._constraints = sketch.geometricConstraints
+
+    def _p(self, x, y):
+        return self._point(x * MM_TO_CM, y * MM_TO_CM, 0)
+
+    def add_line(self, x0, y0, x1, y1, construction=False):
+        line = self._lines.addByTwoPoints(self._p(x0, y0), self._p(x1, y1))
+        if construction:
+            line.isConstruction = True
+        return line
+
+    def add_point(self, x, y):
+        return self._points.add(self._p(x, y))
+
+    def add_coincident(self, point, curve):
+        return self._constraints.addCoincident(point, curve)
+
+    @contextmanager
+    def deferred(self):
+        previous = self.sketch.isComputeDeferred
+        self.sketch.isComputeDeferred = True
+        try:
+            yield
+        finally:
+            self.sketch.isComputeDeferred = previous
+
+
+class RecordingBackend(SketchBackend):
+    """Pure-Python backend: primitives in arrays, Fusion API calls counted in .calls."""
+
+    def __init__(self):
+        self.lines = array('d')          # x0, y0, x1, y1 per line
+        self.construction = array('b')   # per line
+        self.points = array('d')         # x, y per point
+        self.coincident = array('q')     # point index, line index per constraint
+        self.calls = Counter()           # Fusion API name -> calls
+        self.undeferred_calls = 0        # calls made outside a deferred() block
+        self._depth = 0
+
+    def _call(self, name):
+        self.calls[name] += 1
+        if not self._depth:
+            self.undeferred_calls += 1
+
+    @property
+    def api_calls(self):
+        return sum(self.calls.values())
+
+    @property
+    def line_count(self):
+        return len(self.construction)
+
+    @property
+    def point_count(self):
+        return len(self.points) // 2
+
+    def add_line(self, x0, y0, x1, y1, construction=False):
+        self._call('sketchLines.addByTwoPoints')
+        if construction:
+            self._call('SketchLine.isConstruction')
+        self.lines.extend((x0, y0, x1, y1))
+        self.construction.append(bool(construction))
+        return self.line_count - 1
+
+    def add_point(self, x, y):
+        self._call('sketchPoints.add')
+        self.points.extend((x, y))
+        return self.point_count - 1
+
+    def add_coincident(self, point, curve):
+        self._call('geometricConstraints.addCoincident')
+        if not (0 <= point < self.point_count and 0 <= curve < self.line_count):
+            raise ValueError(f'no point {point} / line {curve}')
+        self.coincident.extend((point, curve))
+
+    @contextmanager
+    def deferred(self):
+        if not self._depth:
+            self.calls['Sketch.isComputeDeferred'] += 2     # set, then restore
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
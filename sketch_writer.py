@@ -0,0 +1,146 @@
+"""
+sketch_writer.py
+----------------
+Batch writer for sketch lines (no Fusion imports).
+
+Drawing code plans segments in mm with SketchWriter.line(); nothing touches
+the sketch until flush(). Before writing, endpoints are snapped to a tol_mm
+grid, exact duplicates (in either direction) are dropped and collinear
+segments that overlap or touch are merged, so e.g. the shared edge of two
+neighbouring cell frames, or a cell edge lying on a ring boundary, becomes a
+single sketchLines.addByTwoPoints call. flush() writes the remaining lines
+through a sketch_backend.SketchBackend inside one deferred() batch.
+
+Construction and profile lines are never merged with each other.
+"""
+from collections import namedtuple
+import math
+
+SNAP_MM = 1e-4          # 0.1 µm grid
+ANGLE_TOL = 1e-6        # direction bucket of oblique lines (unit-vector components)
+
+Segment = namedtuple("Segment", "x0 y0 x1 y1 construction")
+
+
+class SketchWriter:
+    def __init__(self, tol_mm=SNAP_MM):
+        self.tol = tol_mm
+        self.planned = 0
+        # line key -> [(t0, t1, (ix0, iy0), (ix1, iy1))], in first-seen order
+        self._lines = {}
+
+    def __len__(self):
+        return len(self.segments())
+
+    def _grid(self, v):
+        return round(v / self.tol)
+
+    def line(self, x0, y0, x1, y1, construction=True):
+        """Plan a segment from (x0, y0) to (x1, y1) in mm.
+
+        Zero-length segments and segments with missing (NaN) coordinates are dropped.
+        """
+        self.planned += 1
+        if not (math.isfinite(x0) and math.isfinite(y0) and math.isfinite(x1) and math.isfinite(y1)):
+            return
+        a = (self._grid(x0), self._grid(y0))
+        b = (self._grid(x1), self._grid(y1))
+        if a == b:
+            return
+        if b < a:
+            a, b = b, a
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        if dy == 0:
+            key, t0, t1 = ("h", a[1]), a[0], b[0]
+        elif dx == 0:
+            key, t0, t1 = ("v", a[0]), a[1], b[1]
+        else:
+            n = math.hypot(dx, dy)
+            ux, uy = dx / n, dy / n
+            offset = ux * a[1] - uy * a[0]
+            key = ("o", round(ux / ANGLE_TOL), round(uy / ANGLE_TOL), round(offset))
+            t0, t1 = ux * a[0] + uy * a[1], ux * b[0] + uy * b[1]
+        self._lines.setdefault(key + (bool(construction),), []).append((t0, t1, a, b))
+
+    def hline(self, y, x0, x1, construction=True):
+        self.line(x0, y, x1, y, construction)
+
+    def vline(self, x, y0, y1, construction=True):
+        self.line(x, y0, x, y1, construction)
+
+    def segments(self):
+        """Deduplicated, merged segments (mm) in the order their lines were first planned."""
+        tol = self.tol
+        out = []
+        for key, spans in self._lines.items():
+            construction = key[-1]
+            # grid units: exact for axis-aligned lines, within one step for oblique ones
+            slack = 0 if key[0] != "o" else 1.0
+            spans = sorted(spans, key=lambda s: s[0])
+            _, t1, a, b = spans[0]
+            for s in spans[1:]:
+                if s[0] <= t1 + slack:
+                    if s[1] > t1:
+                        t1, b = s[1], s[3]
+                    continue
+                out.append(Segment(a[0] * tol, a[1] * tol, b[0] * tol, b[1] * tol, construction))
+                _, t1, a, b = s
+            out.append(Segment(a[0] * tol, a[1] * tol, b[0] * tol, b[1] * tol, construction))
+        return out
+
+    def clear(self):
+        self._lines.clear()
+        self.planned = 0
+
+    def flush(self, backend):
+        """Write the planned lines through a sketch_backend; returns [(Segment, line)] and clears the plan."""
+        segments = self.segments()
+        created = []
+        with backend.deferred():
+            for s in segments:
+                created.append((s, backend.add_line(s.x0, s.y0, s.x1, s.y1, s.construction)))
+        self.clear()
+        return created
+
+
+class LineIndex:
+    """Written axis-aligned lines keyed by snapped y (horizontal) or x (vertical).
+
+    Built from flush() output, so finding the lines through a point costs a
+    dict lookup instead of a scan over sketch.sketchCurves.sketchLines.
+    """
+
+    def __init__(self, created=(), tol_mm=SNAP_MM):
+        self.tol = tol_mm
+        self._horizontal = {}   # grid y -> [(x min, x max, line)]
+        self._vertical = {}     # grid x -> [(y min, y max, line)]
+        for segment, line in created:
+            self.add(segment, line)
+
+    def _grid(self, v):
+        return round(v / self.tol)
+
+    def add(self, s, line):
+        if s.y0 == s.y1:
+            self._horizontal.setdefault(self._grid(s.y0), []).append(
+                (min(s.x0, s.x1), max(s.x0, s.x1), line))
+        elif s.x0 == s.x1:
+            self._vertical.setdefault(self._grid(s.x0), []).append(
+                (min(s.y0, s.y1), max(s.y0, s.y1), line))
+
+    def _find(self, table, at, along):
+        k = self._grid(at)
+        # neighbouring grid cells too: at may round the other way than the line did
+        for key in (k, k - 1, k + 1):
+            for t0, t1, line in table.get(key, ()):
+                if t0 - self.tol <= along <= t1 + self.tol:
+                    return line
+        return None
+
+    def horizontal_at(self, x, y):
+        """Horizontal line through (x, y) mm, or None."""
+        return self._find(self._horizontal, y, x)
+
+    def vertical_at(self, x, y):
+        """Vertical line through (x, y) mm, or None."""
+        return self._find(self._vertical, x, y)
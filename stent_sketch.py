@@ -0,0 +1,711 @@
+"""
+stent_sketch.py
+---------------
+Sketch geometry of the two drawing commands, independent of Fusion.
+
+draw_stent_frame (Stent Frame Designer) and draw_data_frame (Process Stent
+Data) plan their lines with a sketch_writer.SketchWriter and emit them, plus
+any points and coincident constraints, through a sketch_backend backend. The
+commands pass a FusionSketchBackend; tests and the benchmark below pass a
+RecordingBackend, which counts the API calls a Fusion sketch would receive.
+
+Usage (benchmark):
+  python stent_sketch.py [--rings N] [--crowns N] [--points] [--repeat N]
+"""
+import math
+import time
+
+try:
+    from . import crown_arc, sketch_backend, sketch_writer
+except ImportError:
+    import crown_arc
+    import sketch_backend
+    import sketch_writer
+
+
+def draw_stent_frame(backend, diameter_mm, length_mm, num_rings, crowns_per_ring,
+                     height_factors, gap_values, draw_border, draw_gap_centerlines, gap_centerlines_interior_only,
+                     draw_crown_peaks, draw_crown_waves, draw_crown_midlines, draw_crown_h_midlines, draw_crown_chord_lines,
+                     partial_crown_midlines, draw_crown_mids, partial_crown_mids, create_coincident_points,
+                     draw_fold_lock_limits, fold_lock_columns, per_ring_fold_lock_config,
+                     balloon_wall_um, chord_values=None, sagitta_values=None, log=print):
+    """Draw the designer's stent frame through backend; returns the layout and counts for the summary."""
+    # Calculate width from diameter (circumference)
+    width_mm = diameter_mm * math.pi
+
+    # Use height factors as proportional values (no base height needed)
+    ring_heights = height_factors  # Direct proportions
+
+    # Calculate with variable gap values and total length of length_mm
+    num_gaps = num_rings - 1
+    # Sum of actual gap values
+    total_gap_space = sum(gap_values[:num_gaps])
+    available_ring_space = length_mm - total_gap_space
+
+    # Scale ring heights to fit the available space
+    original_total_ring_height = sum(ring_heights)
+    ring_scale_factor = available_ring_space / original_total_ring_height
+    scaled_ring_heights = [h * ring_scale_factor for h in ring_heights]
+
+    # Calculate ring positions using variable gap values
+    ring_centers = []
+    # Start with half of first ring height
+    current_y = scaled_ring_heights[0] / 2
+    ring_centers.append(current_y)
+
+    for i in range(1, num_rings):
+        # Add half of previous ring + specific gap + half of current ring
+        gap_value = gap_values[i-1] if i - \
+            1 < len(gap_values) else gap_values[-1]
+        current_y += scaled_ring_heights[i-1] / \
+            2 + gap_value + scaled_ring_heights[i]/2
+        ring_centers.append(current_y)
+
+    # Calculate ring boundaries (crown start and end positions)
+    ring_start_lines = []  # Top of each ring
+    ring_end_lines = []    # Bottom of each ring
+
+    for i, center in enumerate(ring_centers):
+        ring_start = center - scaled_ring_heights[i]/2
+        ring_end = center + scaled_ring_heights[i]/2
+        ring_start_lines.append(ring_start)
+        ring_end_lines.append(ring_end)
+
+    # Calculate gap center positions (including first and last gaps)
+    gap_centers = []
+
+    # First gap: from Y=0 to start of first ring
+    first_gap_center = (0.0 + ring_start_lines[0]) / 2
+    gap_centers.append(first_gap_center)
+
+    # Middle gaps: between ring end and next ring start
+    for i in range(num_rings - 1):
+        gap_center_y = (ring_end_lines[i] + ring_start_lines[i+1]) / 2
+        gap_centers.append(gap_center_y)
+
+    # Last gap: from end of last ring to total length
+    last_gap_center = (ring_end_lines[-1] + length_mm) / 2
+    gap_centers.append(last_gap_center)
+
+    # Use the specified length as total length
+    total_length = length_mm
+
+    # Lines are planned in mm and written in one deferred batch below;
+    # overlapping horizontals (e.g. fold-lock limits on a ring boundary) are drawn once
+    writer = sketch_writer.SketchWriter()
+
+    # Draw border
+    if draw_border:
+        writer.vline(0.0, 0.0, total_length)        # Left border
+        writer.vline(width_mm, 0.0, total_length)   # Right border
+        writer.hline(total_length, 0.0, width_mm)   # Top border
+        writer.hline(0.0, 0.0, width_mm)            # Bottom border
+
+    # Draw ring start lines (crown tops) - only if inside the box
+    if draw_crown_peaks:
+        for ring_start in ring_start_lines:
+            if 0 < ring_start < total_length:  # Only draw if inside the box
+                writer.hline(ring_start, 0.0, width_mm)
+
+    # Draw ring end lines (crown bottoms) - only if inside the box
+    if draw_crown_peaks:
+        for ring_end in ring_end_lines:
+            if 0 < ring_end < total_length:  # Only draw if inside the box
+                writer.hline(ring_end, 0.0, width_mm)
+
+    # Draw gap center lines
+    if draw_gap_centerlines and num_rings > 1:
+        if gap_centerlines_interior_only and num_rings > 2:
+            # Only draw interior gap lines (skip first and last gaps)
+            # Skip gap_centers[0] (before first ring) and gap_centers[-1] (after last ring)
+            interior_gap_centers = gap_centers[1:-
+                                               1] if len(gap_centers) > 2 else []
+            for gap_center in interior_gap_centers:
+                writer.hline(gap_center, 0.0, width_mm)
+        else:
+            # Draw ALL gap lines (including first and last gaps)
+            for gap_center in gap_centers:
+                writer.hline(gap_center, 0.0, width_mm)
+
+    # Draw wave lines (vertical divisions at wave boundaries)
+    if draw_crown_waves:
+        waves = max(1, crowns_per_ring // 2)
+        wave_spacing = width_mm / waves
+        # Draw lines for each wave boundary (not at edges)
+        for i in range(1, waves):
+            writer.vline(i * wave_spacing, 0.0, total_length)
+
+    # Draw wave midlines (vertical lines at midpoint within each wave)
+    if draw_crown_midlines or partial_crown_midlines > 0:
+        waves = max(1, crowns_per_ring // 2)
+        wave_spacing = width_mm / waves
+        # Determine how many crowns to draw midlines for
+        if partial_crown_midlines > 0:
+            # Use partial count (limited from left)
+            midlines_count = min(partial_crown_midlines, waves)
+        else:
+            # Use full count if partial is 0 and main option is enabled
+            midlines_count = waves if draw_crown_midlines else 0
+
+        # Draw midlines for the specified number of crowns from left
+        for i in range(midlines_count):
+            # Midline at the center of each crown section
+            writer.vline(i * wave_spacing + wave_spacing / 2, 0.0, total_length)
+
+    # Draw crown horizontal midlines (horizontal lines at midpoint of each ring height)
+    if draw_crown_h_midlines:
+        # Draw horizontal midlines at each ring center
+        for center in ring_centers:
+            writer.hline(center, 0.0, width_mm)
+
+    # Removed drawing sagitta guide lines. Chord lines will indicate sagitta positions instead.
+
+    # Draw crown chord lines positioned at sagitta distance from crown tips
+    if draw_crown_chord_lines:
+        crown_spacing = width_mm / crowns_per_ring
+
+        # Precompute sagitta per ring (from table or fallback geometry)
+        ring_sagittas = []
+        for i in range(num_rings):
+            ring_height = scaled_ring_heights[i]
+            if sagitta_values and i < len(sagitta_values):
+                s_val = sagitta_values[i]
+                print(
+                    f"Ring {i+1}: Using user-defined sagitta={s_val:.3f}mm")
+            else:
+                crown_arc_radius_mm = 0.2  # Default crown arc radius
+                if crown_arc_radius_mm > 0 and ring_height > 0 and ring_height <= 2 * crown_arc_radius_mm:
+                    half_chord = ring_height / 2.0
+                    discriminant = crown_arc_radius_mm * crown_arc_radius_mm - half_chord * half_chord
+                    if discriminant >= 0:
+                        s_val = crown_arc_radius_mm - \
+                            math.sqrt(discriminant)
+                    else:
+                        s_val = ring_height / 16.4
+                else:
+                    s_val = ring_height / 16.4
+                print(
+                    f"Ring {i+1}: Using calculated sagitta={s_val:.3f}mm")
+            ring_sagittas.append(s_val)
+
+        # Draw chord lines for each ring
+        for i in range(num_rings):
+            ring_height = scaled_ring_heights[i]
+            ring_center = ring_centers[i]
+
+            # Use user-provided chord value if available, otherwise calculate
+            if chord_values and i < len(chord_values):
+                # Use user-edited chord value from table
+                chord_mm = chord_values[i]
+                print(
+                    f"Ring {i+1}: Using user-defined chord={chord_mm:.3f}mm")
+            else:
+                # Fallback: calculate chord using crown arc parameters
+                crown_arc_radius_mm = 0.2  # Default crown arc radius
+                crown_angle_deg = 72.0  # Default crown angle
+                crown_radius_um = crown_arc_radius_mm * 1000.0
+                chord_mm = crown_arc.chord_from_theta(crown_angle_deg, crown_radius_um)
+                print(
+                    f"Ring {i+1}: Using calculated chord={chord_mm:.3f}mm")
+
+            # Draw chord lines for each crown in this ring
+            for crown_index in range(crowns_per_ring):
+                # Calculate crown center position
+                crown_center_x = (crown_index + 0.5) * crown_spacing
+
+                # Calculate chord start and end positions (centered on crown)
+                chord_half_length = chord_mm / 2.0
+                chord_start_x = crown_center_x - chord_half_length
+                chord_end_x = crown_center_x + chord_half_length
+
+                # Place a single chord per crown:
+                # - First half of crowns are 'up' (near top tip)
+                # - Second half are 'down' (near bottom tip)
+                # - Alternate the pattern per ring index so adjacent rings are opposite
+                sagitta_mm = ring_sagittas[i]
+                chord_y_top = ring_center + ring_height/2 - sagitta_mm
+                chord_y_bottom = ring_center - ring_height/2 + sagitta_mm
+
+                # Orientation per wave: within each wave (2 crowns), first crown up, second down; flip per ring
+                wave_index = crown_index // 2
+                is_first_in_wave = (crown_index % 2 == 0)
+                # even rings: first in wave up; odd: first in wave down
+                up_first = (i % 2 == 0)
+                is_up = is_first_in_wave if up_first else (
+                    not is_first_in_wave)
+                chord_y = chord_y_top if is_up else chord_y_bottom
+                orientation = 'up' if is_up else 'down'
+
+                print(
+                    f"  Crown {crown_index+1} ({orientation}): chord x={chord_start_x:.3f}-{chord_end_x:.3f} at y={chord_y:.3f}mm")
+                writer.hline(chord_y, chord_start_x, chord_end_x)
+
+    # Draw crown mid lines (vertical lines at center of each crown - wave quarter lines)
+    if draw_crown_mids or partial_crown_mids > 0:
+        crown_spacing = width_mm / crowns_per_ring
+        # Determine how many crowns to draw mid lines for
+        if partial_crown_mids > 0:
+            # Use partial count (limited from left)
+            mids_count = min(partial_crown_mids, crowns_per_ring)
+        else:
+            # Use full count if partial is 0 and main option is enabled
+            mids_count = crowns_per_ring if draw_crown_mids else 0
+
+        # Draw mid lines for the specified number of crowns from left
+        for i in range(mids_count):
+            # Mid line at center position (wave quarter line)
+            x_mid = i * crown_spacing + crown_spacing / 2
+            writer.vline(x_mid, 0.0, total_length)
+
+    # Draw fold-lock limit lines in specified crown boxes
+    if draw_fold_lock_limits:
+        crown_spacing = width_mm / crowns_per_ring
+
+        # Always use per-ring configuration
+        try:
+            # Parse per-ring configuration: "ring:boxes:gap_mm;ring:boxes:gap_mm"
+            ring_configs = {}
+            for config_part in per_ring_fold_lock_config.split(';'):
+                if ':' in config_part:
+                    parts = config_part.strip().split(':')
+                    if len(parts) == 3:
+                        # Convert to 0-based
+                        ring_idx = int(parts[0].strip()) - 1
+                        boxes_str = parts[1].strip()
+                        # Now in mm, not fraction
+                        gap_width_mm = float(parts[2].strip())
+                        box_indices = [int(x.strip()) for x in boxes_str.split(
+                            ',') if x.strip().isdigit()]
+                        ring_configs[ring_idx] = {
+                            'boxes': box_indices, 'gap_mm': gap_width_mm}
+
+            # Draw fold-lock lines for each configured ring/gap
+            for gap_idx, gap_center_y in enumerate(gap_centers):
+                if gap_idx in ring_configs:
+                    config = ring_configs[gap_idx]
+                    fold_lock_indices = config['boxes']
+                    # Gap width in mm
+                    fold_lock_gap_mm = config['gap_mm']
+
+                    # Use half the gap width for vertical offset
+                    line_offset = fold_lock_gap_mm / 2
+
+                    # Draw lines for specified crown boxes
+                    for crown_idx in fold_lock_indices:
+                        if 0 <= crown_idx < crowns_per_ring:
+                            # Calculate crown box boundaries
+                            crown_left = crown_idx * crown_spacing
+                            crown_right = (
+                                crown_idx + 1) * crown_spacing
+
+                            # Horizontal fold-lock limit lines ABOVE and BELOW gap center
+                            writer.hline(gap_center_y - line_offset, crown_left, crown_right)
+                            writer.hline(gap_center_y + line_offset, crown_left, crown_right)
+
+        except (ValueError, IndexError):
+            # If per-ring config is invalid, don't draw fold-lock lines
+            pass
+
+    lines_planned = writer.planned
+    created_lines = writer.flush(backend)
+    log(f"Sketch lines: {len(created_lines)} drawn for {lines_planned} planned")
+
+    # Create coincident points at line intersections if requested
+    points = {'points_created': 0, 'constraints_created': 0,
+              'constraints_failed': 0, 'points_unhosted': 0}
+    if create_coincident_points:
+        try:
+            # Collect all horizontal line Y positions
+            horizontal_lines = []
+
+            # Add border lines
+            if draw_border:
+                horizontal_lines.extend([0.0, total_length])
+
+            # Add gap centerlines
+            if draw_gap_centerlines:
+                horizontal_lines.extend(gap_centers)
+
+            # Add crown peaks (ring start positions)
+            if draw_crown_peaks:
+                # Add both ring start and ring end lines (as drawn above)
+                for ring_start in ring_start_lines:
+                    if 0 < ring_start < total_length:  # Only add if inside the box
+                        horizontal_lines.append(ring_start)
+                for ring_end in ring_end_lines:
+                    if 0 < ring_end < total_length:  # Only add if inside the box
+                        horizontal_lines.append(ring_end)
+
+            # Add horizontal crown midlines (ring centers)
+            if draw_crown_h_midlines:
+                horizontal_lines.extend(ring_centers)
+
+            # Collect all vertical line X positions
+            vertical_lines = []
+
+            # Add border lines
+            if draw_border:
+                vertical_lines.extend([0.0, width_mm])
+
+            # Add wave boundary lines
+            if draw_crown_waves:
+                waves = max(1, crowns_per_ring // 2)
+                wave_width = width_mm / waves
+                # Only add lines that are actually drawn (between waves, not at borders)
+                for w in range(1, waves):
+                    vertical_lines.append(w * wave_width)
+
+            # Add wave midlines (full or partial)
+            if draw_crown_midlines or partial_crown_midlines > 0:
+                waves = max(1, crowns_per_ring // 2)
+                wave_width = width_mm / waves
+                midlines_to_draw = partial_crown_midlines if partial_crown_midlines > 0 else waves
+                for w in range(min(midlines_to_draw, waves)):
+                    vertical_lines.append((w + 0.5) * wave_width)
+
+            # Add crown mid lines (full or partial)
+            if draw_crown_mids or partial_crown_mids > 0:
+                crown_width = width_mm / crowns_per_ring
+                mids_to_draw = partial_crown_mids if partial_crown_mids > 0 else crowns_per_ring
+                for crown in range(min(mids_to_draw, crowns_per_ring)):
+                    vertical_lines.append((crown + 0.5) * crown_width)
+
+            log('\n'.join([
+                "Horizontal lines collected:",
+                f"  {[f'{y:.3f}' for y in horizontal_lines]}",
+                "Vertical lines collected:",
+                f"  {[f'{x:.3f}' for x in vertical_lines]}",
+            ]))
+
+            points = add_coincident_points(backend, created_lines, horizontal_lines, vertical_lines, log)
+
+        except Exception as e:
+            log(f'Error creating coincident points: {str(e)}')
+
+    # Counts for the summary
+    waves = max(1, crowns_per_ring // 2)
+    if partial_crown_midlines > 0:
+        midlines_count = min(partial_crown_midlines, waves)
+    else:
+        midlines_count = waves if draw_crown_midlines else 0
+    if partial_crown_mids > 0:
+        mids_count = min(partial_crown_mids, crowns_per_ring)
+    else:
+        mids_count = crowns_per_ring if draw_crown_mids else 0
+
+    return dict(
+        points,
+        width_mm=width_mm,
+        num_gaps=num_gaps,
+        scaled_ring_heights=scaled_ring_heights,
+        ring_scale_factor=ring_scale_factor,
+        waves=waves,
+        lines_inside_box=len([r for r in ring_start_lines if 0 < r < total_length]) +
+        len([r for r in ring_end_lines if 0 < r < total_length]) + len(gap_centers),
+        crown_waves_count=(waves - 1) if draw_crown_waves else 0,
+        midlines_count=midlines_count,
+        h_midlines_count=num_rings if draw_crown_h_midlines else 0,
+        mids_count=mids_count,
+        lines_planned=lines_planned,
+        lines_drawn=len(created_lines),
+    )
+
+
+def add_coincident_points(backend, created_lines, horizontal_lines, vertical_lines, log=print):
+    """Point at every horizontal x vertical intersection, constrained to its host lines.
+
+    Host lines come from the writer's output: one dict lookup per point instead of a
+    scan of every sketch line. Failures are counted, not raised.
+    """
+    line_index = sketch_writer.LineIndex(created_lines)
+    seen = set()
+    counts = {'points_created': 0, 'constraints_created': 0,
+              'constraints_failed': 0, 'points_unhosted': 0}
+    first_error = None
+    with backend.deferred():
+        for h_y in horizontal_lines:
+            for v_x in vertical_lines:
+                # Same intersection listed twice (e.g. a gap centre on a border)
+                key = (round(v_x / sketch_writer.SNAP_MM), round(h_y / sketch_writer.SNAP_MM))
+                if key in seen:
+                    continue
+                seen.add(key)
+
+                # On the snapped grid, exactly where the writer put the host lines
+                sketch_point = backend.add_point(key[0] * sketch_writer.SNAP_MM,
+                                                 key[1] * sketch_writer.SNAP_MM)
+                counts['points_created'] += 1
+
+                hosts = [line for line in (line_index.horizontal_at(v_x, h_y),
+                                           line_index.vertical_at(v_x, h_y))
+                         if line is not None]
+                if len(hosts) < 2:
+                    counts['points_unhosted'] += 1
+                for line in hosts:
+                    try:
+                        backend.add_coincident(sketch_point, line)
+                        counts['constraints_created'] += 1
+                    except Exception as constraint_error:
+                        counts['constraints_failed'] += 1
+                        first_error = first_error or constraint_error
+
+    if counts['constraints_failed']:
+        log(f"{counts['constraints_failed']} coincident constraints failed, first error: {first_error}")
+    if counts['points_unhosted']:
+        log(f"{counts['points_unhosted']} points are missing a horizontal or vertical host line")
+    return counts
+
+
+def draw_data_frame(backend, index, diameter_mm, length_mm=None, draw_construction=True,
+                    draw_chords=True, create_points=False):
+    """Draw a Process Stent Data frame from a data_io.RingIndex through backend.
+
+    Returns the frame size and line / point counts for the summary.
+    """
+    # Analyze data structure
+    rings = index.rings
+    last_ring = rings[-1]
+    data = index.rows
+
+    # Calculate stent dimensions
+    cols_per_ring = index.stats[rings[0]].count
+
+    # Calculate total length and ring positions from absolute Y positions
+    total_length_mm = 0
+    ring_positions = {}
+
+    # Check if we have absolute Y position data
+    has_absolute_positions = index.has_absolute_positions
+
+    if has_absolute_positions:
+        print("DEBUG: Using absolute Y positions from data")
+        # Use absolute Y positions from the data
+        for ring_num in rings:
+            stats = index.stats[ring_num]
+
+            # Min top and max bottom for this ring
+            if stats.top_min is not None and stats.bottom_max is not None:
+                start_y = stats.top_min
+                end_y = stats.bottom_max
+                ring_height = end_y - start_y
+
+                ring_positions[ring_num] = {
+                    'center_y': start_y + ring_height / 2,
+                    'start_y': start_y,
+                    'end_y': end_y,
+                    'height': ring_height
+                }
+
+                # Update total length
+                total_length_mm = max(total_length_mm, end_y)
+    else:
+        print("DEBUG: Calculating Y positions from wave heights and gaps")
+        # Fallback to calculated positions
+        current_y = 0
+        for ring_num in rings:
+            stats = index.stats[ring_num]
+            # CSV cells left empty are NaN: ignored by the index
+            ring_height = stats.height_max if stats.height_max is not None else 0.0
+
+            ring_positions[ring_num] = {
+                'center_y': current_y + ring_height / 2,
+                'start_y': current_y,
+                'end_y': current_y + ring_height,
+                'height': ring_height
+            }
+
+            current_y += ring_height
+
+            # Add gap after ring (except for last ring)
+            if ring_num < last_ring:
+                # Use gap_below from current ring data
+                gap_below = stats.gap_below_max if stats.gap_below_max is not None else 0
+                current_y += gap_below
+
+        total_length_mm = current_y
+
+    # Use provided length if available, otherwise use calculated length
+    if length_mm is not None:
+        print(
+            f"DEBUG: Using provided length: {length_mm} mm (calculated was: {total_length_mm:.3f} mm)")
+        total_length_mm = length_mm
+    else:
+        print(f"DEBUG: Using calculated length: {total_length_mm:.3f} mm")
+
+    # Calculate width from diameter
+    width_mm = diameter_mm * math.pi
+
+    # Lines are planned in mm and written in one deferred batch at the end:
+    # shared cell edges and edges lying on ring boundaries are drawn once
+    writer = sketch_writer.SketchWriter()
+
+    # Draw border
+    if draw_construction:
+        writer.vline(0, 0, total_length_mm)                 # Left border
+        writer.vline(width_mm, 0, total_length_mm)          # Right border
+        writer.hline(total_length_mm, 0, width_mm)          # Top border
+        writer.hline(0, 0, width_mm)                        # Bottom border
+
+    # Draw ring boundaries
+    if draw_construction:
+        for ring_num, ring_info in ring_positions.items():
+            writer.hline(ring_info['start_y'], 0, width_mm)     # Ring start line
+            writer.hline(ring_info['end_y'], 0, width_mm)       # Ring end line
+
+    # Draw column boundaries
+    if draw_construction:
+        col_spacing = width_mm / cols_per_ring
+        for col in range(1, cols_per_ring):
+            writer.vline(col * col_spacing, 0, total_length_mm)
+
+    # Draw chord lines based on Excel data
+    if draw_chords:
+        col_spacing = width_mm / cols_per_ring
+
+        for row in data:
+            ring_num = row['ring']
+            col_num = row['col']
+
+            # Check if this row has crown chord coordinate data (new format)
+            if 'chord_top_centerline' in row and 'chord_bottom_centerline' in row:
+                print(
+                    f"DEBUG: Drawing crown chords using coordinates for ring {ring_num}, col {col_num}")
+
+                # Top and bottom crown chords using centerline coordinates ([x, y] pairs)
+                for key in ('chord_top_centerline', 'chord_bottom_centerline'):
+                    chord = row.get(key, [])
+                    if len(chord) >= 2:
+                        writer.line(chord[0][0], chord[0][1], chord[1][0], chord[1][1])
+
+                # Optionally draw outer edge chords for keep-out zones
+                if 'chord_top_outer' in row and 'chord_bottom_outer' in row:
+                    for key in ('chord_top_outer', 'chord_bottom_outer'):
+                        chord = row.get(key, [])
+                        if len(chord) >= 2:
+                            writer.line(chord[0][0], chord[0][1], chord[1][0], chord[1][1])
+
+            # Fallback to old method if no crown chord coordinates available
+            elif ring_num in ring_positions:
+                ring_info = ring_positions[ring_num]
+
+                # Calculate column center position
+                col_center_x = (col_num + 0.5) * col_spacing
+
+                # Get chord and sagitta data
+                upper_chord = row.get('upper_chord_center_mm', 0)
+                upper_sagitta = row.get('upper_sagitta_center_mm', 0)
+                lower_chord = row.get('lower_chord_center_mm', 0)
+                lower_sagitta = row.get('lower_sagitta_center_mm', 0)
+
+                # Draw upper chord line
+                if upper_chord > 0:
+                    chord_half_length = upper_chord / 2
+                    chord_y = ring_info['center_y'] + \
+                        ring_info['height']/2 - upper_sagitta
+                    writer.hline(chord_y, col_center_x - chord_half_length,
+                                 col_center_x + chord_half_length)
+
+                # Draw lower chord line
+                if lower_chord > 0:
+                    chord_half_length = lower_chord / 2
+                    chord_y = ring_info['center_y'] - \
+                        ring_info['height']/2 + lower_sagitta
+                    writer.hline(chord_y, col_center_x - chord_half_length,
+                                 col_center_x + chord_half_length)
+
+    # Draw individual cell frames using absolute Y positions
+    if has_absolute_positions and draw_construction:
+        print("DEBUG: Drawing individual cell frames using absolute Y positions")
+        col_spacing = width_mm / cols_per_ring
+
+        for row in data:
+            col_num = row['col']
+
+            # Check if this row has absolute position data
+            if 'y_top_border_mm' in row and 'y_bottom_border_mm' in row:
+                y_top = row['y_top_border_mm']
+                y_bottom = row['y_bottom_border_mm']
+
+                # Calculate column boundaries
+                x_left = col_num * col_spacing
+                x_right = (col_num + 1) * col_spacing
+
+                # Cell frame rectangle: top, bottom, left, right borders
+                writer.hline(y_top, x_left, x_right)
+                writer.hline(y_bottom, x_left, x_right)
+                writer.vline(x_left, y_top, y_bottom)
+                writer.vline(x_right, y_top, y_bottom)
+
+    lines_planned = writer.planned
+    lines_drawn = len(writer.flush(backend))
+    print(f"DEBUG: Sketch lines: {lines_drawn} drawn for {lines_planned} planned")
+
+    # Create points at intersections if requested
+    points_created = 0
+    if create_points:
+        col_spacing = width_mm / cols_per_ring
+
+        with backend.deferred():
+            for ring_num, ring_info in ring_positions.items():
+                for col in range(cols_per_ring + 1):
+                    x_pos = col * col_spacing
+
+                    # Points at ring boundaries
+                    backend.add_point(x_pos, ring_info['start_y'])
+                    backend.add_point(x_pos, ring_info['end_y'])
+                    points_created += 2
+
+    return {
+        'total_length_mm': total_length_mm,
+        'width_mm': width_mm,
+        'ring_positions': ring_positions,
+        'lines_planned': lines_planned,
+        'lines_drawn': lines_drawn,
+        'points_created': points_created,
+    }
+
+
+# ---------- Benchmark ----------
+
+def benchmark_frame(num_rings=20, crowns_per_ring=32, coincident_points=True, length_mm=20.0):
+    """Draw a designer frame with every option on into a RecordingBackend; returns the backend."""
+    backend = sketch_backend.RecordingBackend()
+    factors = [1.0] * num_rings
+    gaps = [0.12] * (num_rings - 1)
+    config = ';'.join(f'{r}:0,2,4:0.05' for r in range(1, num_rings))
+    draw_stent_frame(backend, 1.8, length_mm, num_rings, crowns_per_ring, factors, gaps,
+                     draw_border=True, draw_gap_centerlines=True, gap_centerlines_interior_only=False,
+                     draw_crown_peaks=True, draw_crown_waves=True, draw_crown_midlines=True,
+                     draw_crown_h_midlines=True, draw_crown_chord_lines=True, partial_crown_midlines=0,
+                     draw_crown_mids=True, partial_crown_mids=0, create_coincident_points=coincident_points,
+                     draw_fold_lock_limits=True, fold_lock_columns='', per_ring_fold_lock_config=config,
+                     balloon_wall_um=16.0, log=lambda msg: None)
+    return backend
+
+
+def main():
+    import argparse
+    import contextlib
+    import io
+    ap = argparse.ArgumentParser(description="Count and time sketch API calls without Fusion")
+    ap.add_argument("--rings", type=int, default=20)
+    ap.add_argument("--crowns", type=int, default=32)
+    ap.add_argument("--points", action="store_true", help="create coincident points")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    best = float('inf')
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):     # per-crown chord prints
+            backend = benchmark_frame(args.rings, args.crowns, args.points)
+        best = min(best, time.perf_counter() - t0)
+    print(f"{args.rings} rings x {args.crowns} crowns: {backend.line_count} lines, "
+          f"{backend.point_count} points, {len(backend.coincident) // 2} constraints")
+    print(f"{backend.api_calls} API calls ({backend.undeferred_calls} outside deferred compute), "
+          f"best of {args.repeat}: {best * 1000:.1f} ms")
+    for name, n in sorted(backend.calls.items()):
+        print(f"  {name}: {n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Thread-safety tests for the background file parser (commands/gptDataProcessor/background_parse.py)
+
+The loader and the Fusion custom event are replaced by stubs: post() feeds a
+queue read by the test thread, which plays the role of Fusion's UI thread.
+"""
+
+import os
+import queue
+import sys
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(current_dir, 'commands', 'gptDataProcessor'))
+
+import background_parse as bp  # noqa: E402
+import data_io  # noqa: E402
+
+TIMEOUT = 5
+
+
+def stub_key(path):
+    return (path, 0, 0)
+
+
+def make_parser(loader, interval=0.0):
+    messages = queue.Queue()
+    parser = bp.BackgroundParser(loader, messages.put, key=stub_key, progress_interval=interval)
+    return parser, messages
+
+
+def wait_for(messages, job_id, state):
+    while True:
+        message = messages.get(timeout=TIMEOUT)
+        if message['job'] == job_id and message['state'] == state:
+            return message
+
+
+def rows_loader(n):
+    return lambda path: {'data': ({'ring': 1, 'col': i} for i in range(n)), 'parameters': {'p': path}}
+
+
+def test_done_with_progress():
+    parser, messages = make_parser(rows_loader(50))
+    job = parser.start('a.json')
+    done = wait_for(messages, job.id, 'done')
+    job.thread.join(TIMEOUT)
+    assert done['rows'] == 50
+    finished = parser.take(job.id)
+    assert finished is not None
+    _, result, error = finished
+    assert error is None and len(result['data']) == 50 and result['parameters'] == {'p': 'a.json'}
+    assert job.key == ('a.json', 0, 0)
+    assert parser.take(job.id) is None                  # handed over once
+    progress = []
+    while not messages.empty():
+        progress.append(messages.get())
+    assert all(m['state'] == 'progress' for m in progress)
+
+
+def test_preview_stops_after_the_preview_rows():
+    read = []
+
+    def rows():
+        for i in range(50):
+            read.append(i)
+            yield {'ring': i // 10 + 1, 'col': i % 10}
+
+    def loader(path):
+        return {'data': rows(), 'parameters': {'num_rings': 5, 'crowns_per_ring': 10}}
+
+    messages = queue.Queue()
+    parser = bp.BackgroundParser(loader, messages.put, key=stub_key, preview_rows=3)
+    job = parser.start('big.json')
+    assert wait_for(messages, job.id, 'done')['rows'] == 3
+    job.thread.join(TIMEOUT)
+    _, result, _ = parser.take(job.id)
+    assert read == [0, 1, 2] and 'index' not in result
+    # the rest is read on demand (e.g. at execute), through the same stream
+    cache = data_io.ParsedFileCache(loader)
+    cached = cache.put(stub_key('big.json'), result)
+    assert cached['data'] is result['data']
+    assert data_io.ring_index(cached).counts() == {r: 10 for r in range(1, 6)}
+    assert len(read) == 50
+
+
+def test_full_read_without_ring_counts():
+    parser, messages = make_parser(rows_loader(50))
+    parser.preview_rows = 3
+    job = parser.start('a.json')
+    assert wait_for(messages, job.id, 'done')['rows'] == 50
+
+
+def test_new_file_cancels_stale_parse():
+    release = threading.Event()
+    closed = threading.Event()
+
+    def blocking_rows():
+        try:
+            for i in range(1000):
+                if i == 10:
+                    release.wait(TIMEOUT)
+                yield {'ring': 1, 'col': i}
+        finally:
+            closed.set()
+
+    def loader(path):
+        if path == 'slow.json':
+            return {'data': blocking_rows()}
+        return rows_loader(3)(path)
+
+    parser, messages = make_parser(loader, interval=1e9)
+    slow = parser.start('slow.json')
+    fast = parser.start('fast.json')                    # user picked another file
+    assert slow.cancelled and parser.current is fast
+    wait_for(messages, fast.id, 'done')
+    release.set()
+    slow.thread.join(TIMEOUT)
+    assert closed.is_set()                              # stale stream closed early
+    assert parser.take(slow.id) is None
+    assert parser.take(fast.id)[1]['data'] == [{'ring': 1, 'col': i} for i in range(3)]
+    assert all(m['job'] != slow.id for m in list(messages.queue))
+
+
+def test_loader_error_is_reported():
+    def loader(path):
+        raise ValueError('bad file')
+
+    parser, messages = make_parser(loader)
+    job = parser.start('bad.json')
+    message = wait_for(messages, job.id, 'error')
+    assert message['error'] == 'bad file'
+    _, result, error = parser.take(job.id)
+    assert result is None and isinstance(error, ValueError)
+
+
+def test_cancel_discards_running_job():
+    release = threading.Event()
+
+    def loader(path):
+        release.wait(TIMEOUT)
+        return {'data': [1, 2]}
+
+    parser, messages = make_parser(loader)
+    job = parser.start('x.json')
+    assert parser.cancel() is job and parser.current is None
+    release.set()
+    job.thread.join(TIMEOUT)
+    assert messages.empty() and parser.take(job.id) is None
+
+
+def test_concurrent_starts_leave_one_live_job():
+    parser, messages = make_parser(rows_loader(20))
+    jobs = []
+    lock = threading.Lock()
+
+    def spam():
+        for i in range(25):
+            job = parser.start(f'f{i}.json')
+            with lock:
+                jobs.append(job)
+
+    threads = [threading.Thread(target=spam) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(TIMEOUT)
+    for job in jobs:
+        job.thread.join(TIMEOUT)
+    current = parser.current
+    assert len({job.id for job in jobs}) == 200
+    assert [job for job in jobs if not job.cancelled] == [current]
+    assert parser.take(current.id) is not None
+    assert all(parser.take(job.id) is None for job in jobs)
+
+
+if __name__ == '__main__':
+    test_done_with_progress()
+    test_preview_stops_after_the_preview_rows()
+    test_full_read_without_ring_counts()
+    test_new_file_cancels_stale_parse()
+    test_loader_error_is_reported()
+    test_cancel_discards_running_job()
+    test_concurrent_starts_leave_one_live_job()
+    print('ok')
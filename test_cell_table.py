@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Tests for the columnar derived-cell store (commands/gptDataProcessor/cell_table.py)"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+deriver_dir = os.path.join(current_dir, 'commands', 'gptDataProcessor')
+sys.path.insert(0, deriver_dir)
+
+import derive_from_linkmatrix as dfl  # noqa: E402
+from cell_table import CellTable, CellView  # noqa: E402
+
+SPEC_PATH = os.path.join(deriver_dir, 'stent_min_spec_20250907_170133.json')
+
+
+def derive_sample():
+    return dfl.compute_from_min_spec(dfl.load_spec(dfl.Path(SPEC_PATH)))
+
+
+def test_cells_stay_a_json_serializable_list():
+    derived = derive_sample()
+    assert isinstance(derived['cells'], list)
+    loaded = json.loads(json.dumps(derived))
+    assert loaded['cells'] == derived['cells'] == derived['cells'].table.to_records()
+
+
+def test_cells_are_lazy_view_over_arrays():
+    cells = derive_sample()['cells'].table.view()
+    assert isinstance(cells, CellView)
+    assert cells.table['x_keepout_mm'].shape == (6, 8)
+    assert len(cells) == 48
+    cell = cells[9]
+    assert (cell['ring'], cell['col']) == (2, 1)
+    assert cell == cells.table.cell(2, 1)
+    assert cells[-1]['ring'] == 6 and cells[-1]['col'] == 7
+    assert len(cells[:3]) == 3
+
+
+def test_view_iterates_one_ring_at_a_time():
+    table = derive_sample()['cells'].table
+    built = []
+    ring_cells = table.ring_cells
+    table.ring_cells = lambda ring: built.append(ring) or ring_cells(ring)
+    it = iter(table.view())
+    assert [next(it) for _ in range(9)][-1] == table.cell(2, 0)
+    assert built == [1, 2]
+    assert list(table.view()) == table.to_records()
+
+
+def test_records_match_per_cell_view():
+    table = derive_sample()['cells'].table
+    records = table.to_records()
+    assert records == [table.cell(r + 1, c) for r in range(6) for c in range(8)]
+    assert records[0]['left_cl'][0][1] == records[0]['left_cl'][1][1]
+
+
+def test_json_round_trip_rebuilds_table():
+    derived = derive_sample()
+    text = json.dumps(derived)
+    loaded = json.loads(text)
+    assert isinstance(loaded['cells'], list) and len(loaded['cells']) == 48
+    rebuilt = CellTable.from_cells(loaded['cells'])
+    original = derived['cells'].table
+    for name in ('y_top_edge_mm', 'alpha_deg', 'right_cl_x2'):
+        assert np.allclose(rebuilt[name], original[name], atol=1e-6)
+    assert (rebuilt['left_top'] == original['left_top']).all()
+
+
+def test_dataframe_has_cells_sheet_layout():
+    df = derive_sample()['cells'].table.to_dataframe()
+    assert len(df) == 48
+    assert list(df.columns[:8]) == ['ring', 'col', 'x_left_mm', 'x_right_mm',
+                                    'y_top_edge_mm', 'y_bottom_edge_mm', 'left_pos', 'right_pos']
+    assert df.loc[0, 'left_pos'] == 'bottom' and df.loc[0, 'right_pos'] == 'top'
+
+
+if __name__ == "__main__":
+    test_cells_are_lazy_view_over_arrays()
+    test_view_iterates_one_ring_at_a_time()
+    test_records_match_per_cell_view()
+    test_json_round_trip_rebuilds_table()
+    test_dataframe_has_cells_sheet_layout()
+    print("All cell_table tests passed")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Tests for the array-aware crown_arc helpers and CrownArc / CrownArcBatch"""
+
+import dataclasses
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import crown_arc  # noqa: E402
+from crown_arc import CrownArc, CrownArcBatch  # noqa: E402
+
+RC_UM = np.array([80.0, 100.0, 125.0, 150.0])
+THETA_DEG = np.array([120.0, 150.0, 170.0, 179.0])
+
+
+def test_helpers_broadcast_and_match_scalar():
+    pairs = [
+        (crown_arc.sagitta_from_theta, (THETA_DEG, RC_UM)),
+        (crown_arc.chord_from_theta, (THETA_DEG, RC_UM)),
+        (crown_arc.arc_len_from_theta, (THETA_DEG, RC_UM)),
+        (crown_arc.theta_from_sagitta, (np.array([0.01, 0.05, 0.1, 0.2]), RC_UM)),
+        (crown_arc.Rc_from_theta_sagitta, (THETA_DEG, np.array([0.01, 0.05, 0.1, 0.2]))),
+        (crown_arc.curvature_from_Rc, (RC_UM,)),
+        (crown_arc.radius_to_width_ratio, (RC_UM, 50.0)),
+        (crown_arc.geometric_index_w_over_Rc, (50.0, RC_UM)),
+    ]
+    for fn, args in pairs:
+        out = fn(*args)
+        assert isinstance(out, np.ndarray) and out.shape == (4,), fn.__name__
+        scalar = [fn(*(a[i] if np.ndim(a) else a for a in args)) for i in range(4)]
+        assert np.allclose(out, scalar, rtol=1e-14, atol=0), fn.__name__
+    # lists broadcast too; scalars stay plain floats
+    grid = crown_arc.sagitta_from_theta([[150.0], [170.0]], [100.0, 120.0, 140.0])
+    assert grid.shape == (2, 3)
+    assert isinstance(crown_arc.sagitta_from_theta(150.0, 100.0), float)
+
+
+def test_theta_from_sagitta_clips_like_scalar():
+    out = crown_arc.theta_from_sagitta(np.array([0.0, 0.2, 0.5]), 100.0)
+    assert out.tolist() == [0.0, 180.0, 360.0]
+    assert out[2] == crown_arc.theta_from_sagitta(0.5, 100.0)
+
+
+def test_crown_arc_caches_and_invalidates():
+    arc = CrownArc(100.0, 150.0)
+    assert not hasattr(arc, '__dict__')
+    s = arc.sagitta_mm()
+    assert s == crown_arc.sagitta_from_theta(150.0, 100.0)
+    assert arc.sagitta_mm() is s
+    arc.theta_deg = 120.0
+    assert math.isclose(arc.sagitta_mm(), crown_arc.sagitta_from_theta(120.0, 100.0))
+    assert arc == CrownArc(100.0, 120.0)
+    assert repr(arc) == 'CrownArc(Rc_um=100.0, theta_deg=120.0)'
+    assert dataclasses.asdict(arc) == {'Rc_um': 100.0, 'theta_deg': 120.0}
+    assert [f.name for f in dataclasses.fields(CrownArc)] == ['Rc_um', 'theta_deg']
+
+
+def test_batch_matches_per_arc():
+    batch = CrownArcBatch(RC_UM, THETA_DEG)
+    arcs = list(batch)
+    assert len(batch) == 4 and arcs[2] == batch[2] == CrownArc(125.0, 170.0)
+    for method in ('sagitta_mm', 'chord_mm', 'arc_len_mm', 'curvature_mm_inv'):
+        assert np.allclose(getattr(batch, method)(), [getattr(a, method)() for a in arcs], rtol=1e-14)
+    assert np.allclose(batch.geom_index(50.0), [a.geom_index(50.0) for a in arcs])
+    assert np.allclose(batch.r_over_w([40.0, 50.0, 60.0, 70.0]), RC_UM / [40.0, 50.0, 60.0, 70.0])
+    back = CrownArcBatch.from_sagitta(batch.sagitta_mm(), RC_UM)
+    assert np.allclose(back.theta_deg, THETA_DEG, atol=1e-9)
+    assert CrownArcBatch.from_arcs(arcs).shape == (4,)
+    assert CrownArcBatch(100.0, THETA_DEG).Rc_um.shape == (4,)
+
+
+def test_grid_batch_is_a_flat_sequence_of_arcs():
+    grid = CrownArcBatch([[80.0], [100.0]], [120.0, 150.0, 170.0])
+    arcs = list(grid)
+    assert grid.shape == (2, 3) and len(grid) == len(arcs) == 6
+    assert arcs[4] == grid[4] == CrownArc(100.0, 150.0)
+    assert [(a.Rc_um, a.theta_deg) for a in grid[2:4]] == [(80.0, 170.0), (100.0, 120.0)]
+    assert np.allclose(grid.sagitta_mm().ravel(), [a.sagitta_mm() for a in arcs])
+    assert len(CrownArcBatch(100.0, 150.0)) == 1
+
+
+if __name__ == "__main__":
+    test_helpers_broadcast_and_match_scalar()
+    test_theta_from_sagitta_clips_like_scalar()
+    test_crown_arc_caches_and_invalidates()
+    test_batch_matches_per_arc()
+    test_grid_batch_is_a_flat_sequence_of_arcs()
+    print("All crown_arc batch tests passed")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Tests for the shared quarter-wave tangency kernel (crown_geometry.py)"""
+
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import crown_geometry  # noqa: E402
+
+
+def legacy_scan_bisect(Hq, Wq, w, R):
+    """Reference: the original 0.05° scan + bisection solver."""
+    A = Hq - 0.5 * w
+
+    def F(d):
+        denom = Wq - 2.0 * R * math.sin(d)
+        return math.tan(d) - (2.0 * (A - R * (1.0 - math.cos(d)))) / denom
+
+    lo, step = math.radians(5.0), math.radians(0.05)
+    prev_d, prev_f = lo, F(lo)
+    d = lo + step
+    while d <= math.radians(89.9):
+        fd = F(d)
+        if prev_f * fd < 0.0:
+            lo, hi = prev_d, d
+            break
+        prev_d, prev_f = d, fd
+        d += step
+    flo = F(lo)
+    for _ in range(120):
+        mid = 0.5 * (lo + hi)
+        fm = F(mid)
+        if flo * fm < 0.0:
+            hi = mid
+        else:
+            lo, flo = mid, fm
+    return 0.5 * (lo + hi)
+
+
+def test_closed_form_guess_is_root():
+    """ρ sin(δ - φ) = 2R guess already satisfies F(δ) = 0 for a feasible crown"""
+    Hq, Wq, w = 0.68, 0.353, 0.06
+    R = 2.5 * w
+    d0 = float(crown_geometry.tangency_initial_guess(Hq, Wq, w, R))
+    assert abs(float(crown_geometry.tangency_residual(d0, Hq, Wq, w, R))) < 1e-10
+
+
+def test_derivative_matches_finite_difference():
+    Hq, Wq, w, R = 0.5, 0.4, 0.05, 0.125
+    for d in (0.3, 0.8, 1.2):
+        h = 1e-7
+        fd = (crown_geometry.tangency_residual(d + h, Hq, Wq, w, R)
+              - crown_geometry.tangency_residual(d - h, Hq, Wq, w, R)) / (2 * h)
+        exact = crown_geometry.tangency_residual_derivative(d, Hq, Wq, w, R)
+        assert math.isclose(float(fd), float(exact), rel_tol=1e-5)
+
+
+def test_solver_matches_legacy_and_converges_fast():
+    """Same δ as the old scan/bisect in a handful of iterations"""
+    cases = [(0.68, 0.353, 0.06, 0.15), (0.57, 0.353, 0.05, 0.125),
+             (0.9, 0.5, 0.05, 0.1), (0.4, 0.45, 0.08, 0.12)]
+    for Hq, Wq, w, R in cases:
+        sol = crown_geometry.solve_tangency(Hq, Wq, w, R)
+        assert sol.converged
+        assert sol.iterations <= 5
+        assert sol.residual < 1e-8
+        assert abs(sol.delta - legacy_scan_bisect(Hq, Wq, w, R)) < 1e-9
+
+
+def test_batch_reports_per_cell_statistics():
+    Hq = np.array([[0.68, 0.57], [0.9, 0.4]])
+    sol = crown_geometry.solve_tangency_batch(Hq, 0.353, 0.05, 0.125)
+    assert sol.delta.shape == sol.iterations.shape == sol.residual.shape == (2, 2)
+    assert sol.converged.all()
+    assert math.isclose(sol.delta[1, 0], crown_geometry.solve_tangency(0.9, 0.353, 0.05, 0.125).delta)
+
+
+def test_shallow_roots_below_5_degrees_are_found():
+    """The original fallback searched below 5°; roots there must not clamp to 5°"""
+    cases = [(0.0584457, 0.4790889, 0.0958496, 0.2169246, 2.5668),
+             (0.0723073, 0.8593769, 0.0851789, 0.2045011, 4.0234)]
+    for Hq, Wq, w, R, delta_deg in cases:
+        sol = crown_geometry.solve_tangency(Hq, Wq, w, R)
+        assert sol.converged and sol.residual < 1e-9
+        assert abs(math.degrees(sol.delta) - delta_deg) < 1e-3
+
+
+def test_infeasible_crown_is_flagged():
+    """Arc wider than the quarter rectangle: no root, solver says so"""
+    sol = crown_geometry.solve_tangency(0.3, 0.1, 0.06, 0.3)
+    assert not sol.converged
+
+
+if __name__ == "__main__":
+    test_closed_form_guess_is_root()
+    test_derivative_matches_finite_difference()
+    test_solver_matches_legacy_and_converges_fast()
+    test_batch_reports_per_cell_statistics()
+    test_shallow_roots_below_5_degrees_are_found()
+    test_infeasible_crown_is_flagged()
+    print("All crown_geometry tests passed")
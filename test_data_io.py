@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""Tests for the streaming data processor readers (commands/gptDataProcessor/data_io.py)"""
+
+import gzip
+import itertools
+import json
+import math
+import os
+import sys
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(current_dir, 'commands', 'gptDataProcessor'))
+
+import data_io  # noqa: E402
+
+DERIVED_PATH = os.path.join(current_dir, 'derived_20250907_121333.json')
+
+
+def test_stream_matches_json_load_at_any_chunk_size():
+    with open(DERIVED_PATH) as f:
+        doc = json.load(f)
+    for chunk_size in (1, 13, 4096, data_io.CHUNK_SIZE):
+        stream = data_io.JsonRowStream(DERIVED_PATH, chunk_size=chunk_size)
+        assert stream.key == 'cells'
+        assert stream.parameters == doc['parameters']
+        assert list(stream) == doc['cells']
+        # keys after the row array are read once the rows are exhausted
+        assert stream.header == {k: v for k, v in doc.items() if k != 'cells'}
+
+
+def test_preview_stops_early_and_closes_file():
+    stream = data_io.JsonRowStream(DERIVED_PATH)
+    rows = data_io.typed_rows(stream)
+    sample = list(itertools.islice(rows, 3))
+    assert [(r['ring'], r['col']) for r in sample] == [(1, 0), (1, 1), (1, 2)]
+    rows.close()
+    assert stream._file is None
+
+
+def test_typed_rows_and_gzip():
+    doc = {
+        'parameters': {'diameter_mm': 1.8},
+        'wave_inputs_by_column': [
+            {'ring': '1', 'col': 0, 'wave_height_mm': '1.25', 'gap_above_mm': None,
+             'chord_top_centerline': [[0, 1], [2, 1]], 'left_crown_pos': 'top'},
+            {'ring': 1, 'col': None, 'wave_height_mm': 'bad', 'gap_above_mm': 0.1,
+             'chord_top_centerline': [[3, 1], [4, 1]], 'left_crown_pos': 'bottom', 'extra': 2},
+        ],
+        'trailer': 1,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rows.json.gz')
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(doc, f)
+        stream = data_io.JsonRowStream(path)
+        assert stream.key == 'wave_inputs_by_column'
+        rows = list(data_io.typed_rows(stream))
+    assert rows[0] == {'ring': 1, 'col': 0, 'wave_height_mm': 1.25, 'gap_above_mm': 0.0,
+                       'chord_top_centerline': [[0, 1], [2, 1]], 'left_crown_pos': 'top'}
+    assert rows[1]['col'] == 0 and rows[1]['wave_height_mm'] == 0.0
+    assert rows[1]['left_crown_pos'] == 'bottom' and rows[1]['extra'] == 2.0
+    assert stream.header['trailer'] == 1
+
+
+def test_file_without_rows_reads_whole_header():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'v2.json')
+        with open(path, 'w') as f:
+            json.dump({'format': 'stent-derived', 'version': 2, 'cells': {'shape': [1, 1]}}, f)
+        stream = data_io.JsonRowStream(path)
+        assert stream.key is None
+        assert stream.header['cells'] == {'shape': [1, 1]}
+        assert list(stream) == []
+
+
+def write_wave_workbook(path, rows, sheet='WaveInputsByColumn'):
+    import openpyxl
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = sheet
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def test_xlsx_rows_typed_from_header():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'waves.xlsx')
+        write_wave_workbook(path, [
+            ['ring', 'col', 'wave_height_mm', None, 'gap_above_mm', 'note'],
+            [1, 0, 1.25, 'x', None, 'a'],
+            [None, 5, 9.0],                       # skipped: no ring
+            ['2', 1.0, '0.5', None, 0.1],         # short row, numeric strings
+        ])
+        rows = list(data_io.read_xlsx_rows(path))
+    assert rows == [
+        {'ring': 1, 'col': 0, 'wave_height_mm': 1.25, 'gap_above_mm': 0.0, 'note': 'a'},
+        {'ring': 2, 'col': 1, 'wave_height_mm': 0.5, 'gap_above_mm': 0.1, 'note': 0.0},
+    ]
+    assert isinstance(rows[1]['ring'], int)
+
+
+def test_xlsx_missing_sheet_raises_eagerly():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'other.xlsx')
+        write_wave_workbook(path, [['ring', 'col']], sheet='Cells')
+        try:
+            data_io.read_xlsx_rows(path)
+        except ValueError as e:
+            assert 'WaveInputsByColumn' in str(e)
+        else:
+            raise AssertionError('missing sheet not reported')
+
+
+def test_csv_columns_keep_missing_as_nan():
+    table = data_io.read_csv_columns(os.path.join(current_dir, 'sample_stent_data.csv'))
+    assert len(table) == 48
+    assert table.columns['ring'].typecode == 'q' and table.columns['wave_height_mm'].typecode == 'd'
+    row = table[0]
+    assert (row['ring'], row['col']) == (1, 0)
+    assert math.isnan(row['gap_above_mm']) and row['gap_below_mm'] == 0.16
+    assert [(r['ring'], r['col']) for r in table][5] == (table[5]['ring'], table[5]['col'])
+
+
+def test_csv_chunks_match_whole_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rows.csv')
+        with open(path, 'w', newline='') as f:
+            f.write('ring,col,wave_height_mm,gap_below_mm\n')
+            f.write('1,0,1.5,0.1\n')
+            f.write(',1,2.0,0.1\n')          # no ring: skipped
+            f.write('1,1,abc\n')             # ragged, non-numeric
+            f.write('\n')
+            f.write('2.0,0, 2.5 ,\n')
+        whole = data_io.read_csv_columns(path)
+        chunks = list(data_io.iter_csv_chunks(path, chunk_rows=2))
+    assert [len(c) for c in chunks] == [1, 1, 1]
+    assert [r['ring'] for r in whole] == [1, 1, 2]
+    assert math.isnan(whole[1]['wave_height_mm']) and math.isnan(whole[1]['gap_below_mm'])
+    assert whole[2]['wave_height_mm'] == 2.5 and math.isnan(whole[2]['gap_below_mm'])
+    assert [r['col'] for c in chunks for r in c] == [0, 1, 0]
+    assert data_io.finite([1.0, math.nan, 0.0]) == [1.0, 0.0]
+
+
+def test_parsed_file_cache_shares_one_parse():
+    calls = []
+
+    def loader(path):
+        calls.append(path)
+        stream = data_io.JsonRowStream(path)
+        return {'data': data_io.typed_rows(stream), 'parameters': stream.parameters}
+
+    cache = data_io.ParsedFileCache(loader, max_entries=2)
+    preview = cache.get(DERIVED_PATH)
+    sample = list(itertools.islice(preview['data'], 3))
+    assert not preview['data'].complete
+    full = cache.get(DERIVED_PATH)
+    rows = list(full['data'])
+    assert len(calls) == 1 and cache.hits == 1
+    assert rows[:3] == sample and len(rows) == 48 and full['data'].complete
+    assert list(full['data']) == rows
+
+
+def test_parsed_file_cache_invalidation():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f'{i}.csv') for i in range(3)]
+        for p in paths:
+            with open(p, 'w') as f:
+                f.write('ring,col\n1,0\n')
+        calls = []
+        cache = data_io.ParsedFileCache(
+            lambda p: calls.append(p) or {'data': data_io.read_csv_columns(p)}, max_entries=2)
+        for p in paths:
+            cache.get(p)
+        assert len(cache) == 2 and paths[0] not in cache        # LRU eviction
+        cache.get(paths[2])
+        assert len(calls) == 3
+        with open(paths[2], 'a') as f:                          # rewritten: new size
+            f.write('1,1\n')
+        assert len(cache.get(paths[2])['data']) == 2 and len(calls) == 4
+        cache.invalidate(paths[2])
+        assert paths[2] not in cache
+        cache.invalidate()
+        assert len(cache) == 0
+
+
+def test_released_stream_is_parsed_again():
+    calls = []
+
+    def loader(path):
+        calls.append(path)
+        return {'data': data_io.typed_rows(data_io.JsonRowStream(path))}
+
+    cache = data_io.ParsedFileCache(loader)
+    next(iter(cache.get(DERIVED_PATH)['data']))
+    cache.release()
+    assert DERIVED_PATH not in cache
+    assert len(list(cache.get(DERIVED_PATH)['data'])) == 48 and len(calls) == 2
+
+
+def test_ring_index_single_pass_aggregates():
+    table = data_io.read_csv_columns(os.path.join(current_dir, 'sample_stent_data.csv'))
+    rows = list(table)
+    index = data_io.RingIndex(rows)
+    assert index.rings == sorted({r['ring'] for r in rows}) and len(index) == len(rows)
+    for ring in index.rings:
+        ring_rows = [r for r in rows if r['ring'] == ring]
+        st = index.stats[ring]
+        assert st.count == len(ring_rows) == len(index.rows_by_ring[ring])
+        assert st.height_max == max(r['wave_height_mm'] for r in ring_rows)
+        gaps = data_io.finite(r['gap_below_mm'] for r in ring_rows)
+        assert st.gap_below_max == (max(gaps) if gaps else None)
+    assert index.cell(2, 3) == rows[[(r['ring'], r['col']) for r in rows].index((2, 3))]
+    assert not index.has_absolute_positions and not index.has_crown_chords
+    assert abs(index.mean_wave_width - sum(r['wave_width_mm'] for r in rows) / len(rows)) < 1e-12
+    assert index.rows == sorted(rows, key=lambda r: r['ring'])
+
+
+def test_ring_index_borders_skip_missing():
+    rows = [
+        {'ring': 2, 'col': 0, 'y_top_border_mm': 3.0, 'y_bottom_border_mm': 4.0},
+        {'ring': 1, 'col': 0, 'y_top_border_mm': 1.0, 'y_bottom_border_mm': math.nan},
+        {'ring': 1, 'col': 1, 'y_top_border_mm': 0.5, 'y_bottom_border_mm': 2.0},
+    ]
+    file_data = {'data': rows}
+    index = data_io.ring_index(file_data)
+    assert data_io.ring_index(file_data) is index           # built once
+    assert index.rings == [1, 2] and index.has_absolute_positions
+    assert (index.stats[1].top_min, index.stats[1].bottom_max) == (0.5, 2.0)
+    assert index.stats[1].height_max is None and index.stats[1].gap_below_max == 0
+
+
+if __name__ == '__main__':
+    test_stream_matches_json_load_at_any_chunk_size()
+    test_preview_stops_early_and_closes_file()
+    test_typed_rows_and_gzip()
+    test_file_without_rows_reads_whole_header()
+    test_xlsx_rows_typed_from_header()
+    test_xlsx_missing_sheet_raises_eagerly()
+    test_csv_columns_keep_missing_as_nan()
+    test_csv_chunks_match_whole_file()
+    test_parsed_file_cache_shares_one_parse()
+    test_parsed_file_cache_invalidation()
+    test_released_stream_is_parsed_again()
+    test_ring_index_single_pass_aggregates()
+    test_ring_index_borders_skip_missing()
+    print('ok')
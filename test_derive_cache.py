@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Tests for the content-addressed derive cache (commands/gptDataProcessor/derive_cache.py)"""
+
+import copy
+import json
+import os
+import sys
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+deriver_dir = os.path.join(current_dir, 'commands', 'gptDataProcessor')
+sys.path.insert(0, deriver_dir)
+
+import derive_cache  # noqa: E402
+import derive_from_linkmatrix as dfl  # noqa: E402
+import derived_json as dj  # noqa: E402
+import sweep_min_spec as sweep  # noqa: E402
+from cell_table import json_default  # noqa: E402
+
+SPEC_PATH = os.path.join(deriver_dir, 'stent_min_spec_20250907_170133.json')
+
+
+def load_spec():
+    return dfl.load_spec(dfl.Path(SPEC_PATH))
+
+
+def test_key_ignores_meta_and_key_order():
+    spec = load_spec()
+    other = json.loads(json.dumps(spec))
+    other['meta'] = {'created': 'elsewhere'}
+    other['parameters'] = dict(reversed(list(other['parameters'].items())))
+    key = derive_cache.spec_key(spec)
+    assert derive_cache.spec_key(other) == key
+    assert derive_cache.spec_key(spec, kind='x') != key
+    assert derive_cache.spec_key(spec, version='0' * 64) != key
+    changed = copy.deepcopy(spec)
+    changed['parameters']['diameter_mm'] += 0.1
+    assert derive_cache.spec_key(changed) != key
+
+
+def test_derive_cached_hits_second_time():
+    spec = load_spec()
+    expected = json.loads(json.dumps(dfl.compute_from_min_spec(spec), default=json_default))
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = derive_cache.DeriveCache(tmp)
+        paths, hit = dfl.derive_cached(spec, ('--v2',), cache=cache)
+        assert not hit and paths['json'].exists() and paths['xlsx'].exists()
+        again, hit = dfl.derive_cached(spec, ('--v2',), cache=cache)
+        assert hit and again == paths
+        assert dj.load_derived_json(str(again['json']))['cells'] == expected['cells']
+        # other output flags are a separate entry
+        _, hit = dfl.derive_cached(spec, ('--gzip',), cache=cache)
+        assert not hit and len(cache.entries()) == 2
+
+
+def test_lru_eviction_keeps_recent_entries():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = derive_cache.DeriveCache(tmp)
+        keys = [derive_cache.spec_key({'parameters': {'i': i}, 'gaps_policy': {}, 'links': []})
+                for i in range(4)]
+        for i, key in enumerate(keys):
+            cache.save_json(key, {'i': i, 'pad': 'x' * 1000})
+            os.utime(cache.entry_dir(key) / derive_cache.STAMP, (i, i))
+        cache.lookup(keys[0])                       # refreshed: now most recent
+        assert cache.evict(max_bytes=2500) == 2
+        assert cache.load_json(keys[0]) == {'i': 0, 'pad': 'x' * 1000}
+        assert cache.lookup(keys[1]) is None and cache.lookup(keys[2]) is None
+        assert cache.load_json(keys[3])['i'] == 3
+        cache.clear()
+        assert cache.entries() == []
+
+
+def test_entry_larger_than_the_cache_is_still_returned():
+    spec = load_spec()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = derive_cache.DeriveCache(tmp, max_bytes=1000)
+        paths, hit = dfl.derive_cached(spec, (), cache=cache)
+        assert not hit and all(p.exists() for p in paths.values())
+        # the next store evicts it, but not the entry it writes itself
+        other, _ = dfl.derive_cached(spec, ('--gzip',), cache=cache)
+        assert all(p.exists() for p in other.values())
+        assert not paths['json'].exists()
+        # a hit whose files went missing is derived again
+        again, hit = dfl.derive_cached(spec, ('--gzip',), cache=cache)
+        assert hit and again == other
+        other['xlsx'].unlink()
+        again, hit = dfl.derive_cached(spec, ('--gzip',), cache=cache)
+        assert not hit and all(p.exists() for p in again.values())
+
+
+def test_every_store_over_the_limit_evicts():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = derive_cache.DeriveCache(tmp, max_bytes=1500)
+        for i in range(10):
+            key = derive_cache.spec_key({'parameters': {'i': i}, 'gaps_policy': {}, 'links': []})
+            cache.save_json(key, {'i': i, 'pad': 'x' * 1000})
+            os.utime(cache.entry_dir(key) / derive_cache.STAMP, (i, i))
+            sizes = [size for _, size, _ in cache.entries()]
+            assert sum(sizes) <= 1500 and len(sizes) == 1
+            assert cache.load_json(key)['i'] == i
+
+
+def test_cli_cache_dir_with_space():
+    with tempfile.TemporaryDirectory() as tmp:
+        spec_path = os.path.join(tmp, 'spec.json')
+        with open(spec_path, 'w') as f:
+            json.dump(load_spec(), f)
+        cache_dir = os.path.join(tmp, 'cache')
+        paths = dfl.main([spec_path, '--v2', '--cache-dir', cache_dir])
+        assert paths['json'].parent == dfl.Path(tmp).resolve() and paths['json'].exists()
+        assert len(derive_cache.DeriveCache(cache_dir).entries()) == 1
+        assert sorted(os.listdir(tmp)) == sorted(['cache', 'spec.json', paths['json'].name, paths['xlsx'].name])
+
+
+def test_sweep_rows_identical_with_disk_cache():
+    base = load_spec()
+    ranges = {'diameter_mm': [1.6, 1.8], 'R_factor': [2.0, 2.5]}
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = derive_cache.DeriveCache(os.path.join(tmp, 'cache'))
+        runs = []
+        for n, disk_cache in enumerate((None, cache, cache)):
+            out = os.path.join(tmp, f'sweep{n}.jsonl')
+            sweep.run_sweep(base, ranges, out, workers=0, disk_cache=disk_cache)
+            with open(out) as f:
+                runs.append([json.loads(line) for line in f])
+        assert runs[0] == runs[1] == runs[2]
+        assert cache.hits == 4 and cache.misses == 4
+
+
+if __name__ == '__main__':
+    test_key_ignores_meta_and_key_order()
+    test_derive_cached_hits_second_time()
+    test_lru_eviction_keeps_recent_entries()
+    test_entry_larger_than_the_cache_is_still_returned()
+    test_every_store_over_the_limit_evicts()
+    test_cli_cache_dir_with_space()
+    test_sweep_rows_identical_with_disk_cache()
+    print('ok')
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Tests for the minimal-spec deriver (commands/gptDataProcessor/derive_from_linkmatrix.py)"""
+
+import math
+import os
+import sys
+import tempfile
+
+import numpy as np
+from openpyxl import load_workbook
+
+# The deriver is a standalone script; import it from its own folder
+current_dir = os.path.dirname(os.path.abspath(__file__))
+deriver_dir = os.path.join(current_dir, 'commands', 'gptDataProcessor')
+sys.path.insert(0, deriver_dir)
+
+import derive_from_linkmatrix as dfl  # noqa: E402
+
+SPEC_PATH = os.path.join(deriver_dir, 'stent_min_spec_20250907_170133.json')
+
+
+def load_sample_spec():
+    return dfl.load_spec(dfl.Path(SPEC_PATH))
+
+
+def make_spec(num_rings, crowns_per_ring, link_density=0.3, seed=0):
+    """Sample spec scaled to a long stent with a random link matrix"""
+    spec = load_sample_spec()
+    P = spec['parameters']
+    P.update(num_rings=num_rings, crowns_per_ring=crowns_per_ring,
+             diameter_mm=0.45 * crowns_per_ring, length_mm=1.4 * num_rings,
+             height_factors=[1.2] + [1.0] * (num_rings - 2) + [1.1],
+             strut_width_mm_by_ring=[0.06] + [0.05] * (num_rings - 2) + [0.06])
+    rng = np.random.default_rng(seed)
+    spec['links'] = {
+        'interfaces': [f'{i + 1}-{i + 2}' for i in range(num_rings - 1)],
+        'matrix_cols': list(range(crowns_per_ring)),
+        'matrix': (rng.random((num_rings - 1, crowns_per_ring)) < link_density).astype(int).tolist(),
+    }
+    return spec
+
+
+def test_batch_solver_matches_scalar():
+    """Batch solver agrees with the per-cell solver on random crowns"""
+    rng = np.random.default_rng(7)
+    H = rng.uniform(0.5, 2.0, 200)
+    W = rng.uniform(0.3, 1.2, 200)
+    w = rng.uniform(0.04, 0.08, 200)
+    batch = dfl.solve_delta_quarter_batch(H, W, w, 2.5 * w)
+    scalar = [dfl.solve_delta_quarter(*args) for args in zip(H, W, w, 2.5 * w)]
+    assert batch.shape == (200,)
+    assert np.max(np.abs(batch - np.array(scalar))) < 1e-9
+
+
+def test_batch_solver_broadcasts():
+    """Per-ring strut widths broadcast across a (ring, col) height matrix"""
+    H = np.full((3, 4), 1.3)
+    w = np.array([0.06, 0.05, 0.06])[:, None]
+    delta = dfl.solve_delta_quarter_batch(H, 0.7, w, 2.5 * w)
+    assert delta.shape == (3, 4)
+    assert math.isclose(delta[1, 2], dfl.solve_delta_quarter(1.3, 0.7, 0.05, 0.125), abs_tol=1e-9)
+
+
+def test_compute_from_min_spec_sample():
+    """Sample spec derives one cell per ring × column with closed chords"""
+    derived = dfl.compute_from_min_spec(load_sample_spec())
+    P = derived['parameters']
+    assert len(derived['cells']) == P['num_rings'] * P['crowns_per_ring']
+    for col in derived['stack_positions_by_column']:
+        assert math.isclose(col['y_bottom_of_stent_mm'], P['length_mm'], abs_tol=1e-9)
+    assert derived['meta']['solver']['unconverged_cells'] == 0
+    cell = derived['cells'][0]
+    assert cell['ring'] == 1 and cell['col'] == 0
+    assert math.isclose(cell['delta_deg'], 86.977021, abs_tol=1e-6)
+    assert math.isclose(cell['x_keepout_mm'], 0.017835, abs_tol=1e-6)
+
+
+def test_derive_table_and_lazy_build_no_cell_dicts():
+    """Only compute_from_min_spec (the legacy list) builds per-cell dicts during derivation"""
+    records = dfl.CellTable._records
+    dfl.CellTable._records = None               # any dict building now raises TypeError
+    try:
+        derived, table = dfl.derive_table(load_sample_spec())
+        assert 'cells' not in derived and table.shape == (6, 8)
+        lazy = dfl.derive_lazy(load_sample_spec())
+        assert len(lazy['cells']) == 48 and lazy['cells'].table.shape == (6, 8)
+    finally:
+        dfl.CellTable._records = records
+    assert list(lazy['cells']) == dfl.compute_from_min_spec(load_sample_spec())['cells']
+
+
+def test_solve_cache_dedupes_cells():
+    """Sample spec has 3 column scales × 4 (factor, width) ring kinds = 12 distinct crowns"""
+    cache = dfl.CrownSolveCache()
+    derived = dfl.compute_from_min_spec(load_sample_spec(), cache=cache)
+    stats = derived['meta']['solve_cache']
+    assert stats['cells'] == 48
+    assert stats['misses'] == 12 and stats['hits'] == 36
+    # a second derivation through the same cache solves nothing
+    again = dfl.compute_from_min_spec(load_sample_spec(), cache=cache)
+    assert again['meta']['solve_cache']['misses'] == 0
+    assert again['cells'] == derived['cells']
+
+
+def test_solve_cache_bounded():
+    cache = dfl.CrownSolveCache(max_entries=2)
+    delta, _, stats = cache.solve(np.array([1.0, 1.1, 1.2, 1.0]), 0.7, 0.05, 0.125)
+    assert stats['misses'] == 3 and stats['hits'] == 1
+    assert len(cache) == 2
+    assert delta[0] == delta[3]
+
+
+def test_gaps_from_policy_six_rings():
+    """End interfaces use end gaps (prox/dist), interior ones body gaps"""
+    spec = load_sample_spec()
+    gp = spec['gaps_policy']
+    gaps = dfl.gaps_from_policy(np.array(spec['links']['matrix']), gp)
+    assert gaps.shape == (5, 8)
+    assert gaps[0, 0] == gp['end_linked_mm'] and gaps[0, 1] == gp['end_unlinked_prox_mm']
+    assert gaps[4, 0] == gp['end_linked_mm'] and gaps[4, 1] == gp['end_unlinked_dist_mm']
+    assert gaps[1, 1] == gp['body_linked_mm'] and gaps[1, 0] == gp['body_unlinked_mm']
+
+
+def test_long_stent_any_ring_count():
+    """40-ring × 32-crown spec: every column closes the stent length"""
+    spec = make_spec(40, 32)
+    derived = dfl.compute_from_min_spec(spec)
+    gaps = np.array(derived['gaps_matrix'])
+    assert gaps.shape == (39, 32)
+    gp = spec['gaps_policy']
+    assert set(np.unique(gaps[1:-1])) <= {gp['body_linked_mm'], gp['body_unlinked_mm']}
+    H, y_top, y_bot = dfl.stack_positions(spec['parameters']['height_factors'],
+                                          derived['scale_mm_per_factor_by_col'], gaps)
+    assert np.allclose(y_bot[-1], spec['parameters']['length_mm'])
+    assert np.allclose(y_top[1:] - y_bot[:-1], gaps)
+    assert len(derived['cells']) == 40 * 32
+    assert derived['meta']['solver']['unconverged_cells'] == 0
+
+
+def test_export_excel_single_pass():
+    """Write-only export: all sheets, widths & freeze panes, Cells from the arrays"""
+    derived = dfl.compute_from_min_spec(load_sample_spec())
+    with tempfile.TemporaryDirectory() as tmp:
+        out = dfl.Path(tmp) / 'derived.xlsx'
+        dfl.export_excel(derived, out)
+        wb = load_workbook(out)
+        assert wb.sheetnames == ['KEY', 'Parameters', 'LinkMatrix', 'GapsMatrix',
+                                 'ColumnScale', 'RingHeights', 'Cells']
+        ws = wb['Cells']
+        assert ws.freeze_panes == 'A2' and ws.column_dimensions['C'].width == 14
+        rows = list(ws.iter_rows(values_only=True))
+        sheet = derived['cells'].table.sheet_columns()
+        assert rows[0] == tuple(sheet)
+        assert len(rows) == 49
+        assert rows[10] == tuple(v[9].item() for v in sheet.values())
+        assert list(wb['GapsMatrix'].iter_rows(min_row=2, max_row=2, values_only=True))[0][1:] \
+            == tuple(derived['gaps_matrix'][0])
+        # header rows styled like the original pandas export
+        for name in wb.sheetnames:
+            head, body = wb[name]['B1'], wb[name]['B2']
+            assert head.font.b and head.border.left.style == head.border.bottom.style == 'thin'
+            assert (head.alignment.horizontal, head.alignment.vertical) == ('center', 'top')
+            assert not body.font.b and body.border.left.style is None
+
+
+if __name__ == "__main__":
+    test_batch_solver_matches_scalar()
+    test_batch_solver_broadcasts()
+    test_compute_from_min_spec_sample()
+    test_derive_table_and_lazy_build_no_cell_dicts()
+    test_solve_cache_dedupes_cells()
+    test_solve_cache_bounded()
+    test_gaps_from_policy_six_rings()
+    test_long_stent_any_ring_count()
+    test_export_excel_single_pass()
+    print("All deriver tests passed")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Tests for the memory-mappable derived binary format (commands/gptDataProcessor/derived_binary.py)"""
+
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+deriver_dir = os.path.join(current_dir, 'commands', 'gptDataProcessor')
+sys.path.insert(0, deriver_dir)
+
+import derive_from_linkmatrix as dfl  # noqa: E402
+import derived_binary as db  # noqa: E402
+from cell_table import json_default  # noqa: E402
+
+SPEC_PATH = os.path.join(deriver_dir, 'stent_min_spec_20250907_170133.json')
+
+
+def derive_sample():
+    return dfl.compute_from_min_spec(dfl.load_spec(dfl.Path(SPEC_PATH)))
+
+
+def test_round_trip_memory_maps_arrays():
+    derived = derive_sample()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'derived.dbin')
+        db.write_derived_binary(derived, path)
+        loaded = db.read_derived_binary(path)
+        table = loaded['cells'].table
+        assert isinstance(table['x_keepout_mm'], np.memmap)
+        assert not table['x_keepout_mm'].flags.writeable
+        # unrounded values survive exactly
+        for name, values in derived['cells'].table.columns.items():
+            assert (table[name] == values).all(), name
+        assert loaded['cells'] == derived['cells']
+        assert loaded['parameters'] == derived['parameters']
+        assert loaded['links'] == derived['links']
+        assert (loaded['gaps_matrix'] == np.array(derived['gaps_matrix'])).all()
+        assert loaded['ring_top_y_mm'].shape == (6, 8)
+        assert loaded['ring_bottom_y_mm'][:, 3].tolist() == \
+            derived['stack_positions_by_column'][3]['ring_bottom_y_mm']
+        del loaded, table
+
+
+def test_from_loaded_json_and_copy_mode():
+    derived = json.loads(json.dumps(derive_sample(), default=json_default))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'derived.dbin')
+        db.write_derived_binary(derived, path)
+        loaded = db.read_derived_binary(path, mmap=False)
+        assert not isinstance(loaded['cells'].table['alpha_deg'], np.memmap)
+        assert list(loaded['cells']) == derived['cells']
+
+
+def test_rejects_other_files():
+    with tempfile.NamedTemporaryFile(suffix='.dbin', delete=False) as f:
+        f.write(b'{"cells": []}')
+    try:
+        db.read_derived_binary(f.name)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('expected ValueError')
+    finally:
+        os.unlink(f.name)
+
+
+if __name__ == "__main__":
+    test_round_trip_memory_maps_arrays()
+    test_from_loaded_json_and_copy_mode()
+    test_rejects_other_files()
+    print("All derived binary tests passed")
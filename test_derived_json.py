@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Tests for the compact v2 derived JSON layout (commands/gptDataProcessor/derived_json.py)"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+deriver_dir = os.path.join(current_dir, 'commands', 'gptDataProcessor')
+sys.path.insert(0, deriver_dir)
+
+import derive_from_linkmatrix as dfl  # noqa: E402
+import derived_json as dj  # noqa: E402
+from cell_table import json_default  # noqa: E402
+from data_io import is_gzip  # noqa: E402
+
+SPEC_PATH = os.path.join(deriver_dir, 'stent_min_spec_20250907_170133.json')
+
+
+def derive_sample():
+    return dfl.compute_from_min_spec(dfl.load_spec(dfl.Path(SPEC_PATH)))
+
+
+def test_v2_round_trip_matches_v1():
+    derived = derive_sample()
+    v1 = json.loads(json.dumps(derived, default=json_default))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ('derived.v2.json', 'derived.v2.json.gz'):
+            path = os.path.join(tmp, name)
+            dj.write_derived_v2(derived, path)
+            assert is_gzip(path) == name.endswith('.gz')
+            loaded = dj.load_derived_json(path)
+            assert loaded['cells'] == v1['cells']
+            for key in v1:
+                if key != 'cells':
+                    assert loaded[key] == v1[key], key
+
+
+def test_v2_groups_constant_fields():
+    derived = derive_sample()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'derived.json')
+        dj.write_derived_v2(derived, path)
+        with open(path) as f:
+            doc = json.load(f)
+        cells = doc['cells']
+        R, C = cells['shape']
+        assert 'Rc_mm' in cells['per_ring'] and len(cells['per_ring']['Rc_mm']) == R
+        assert 'x_left_mm' in cells['per_col'] and len(cells['per_col']['x_left_mm']) == C
+        assert len(cells['per_cell']['theta_deg']) == R * C
+        # smaller than the indented v1 dump
+        v1_size = len(json.dumps(derived, indent=2, default=json_default))
+        assert os.path.getsize(path) < v1_size / 2
+
+
+def test_load_v1_plain_and_gzip():
+    derived = derive_sample()
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = os.path.join(tmp, 'derived.json')
+        packed = os.path.join(tmp, 'derived.json.gz')
+        with open(plain, 'w') as f:
+            json.dump(derived, f, default=json_default)
+        with gzip.open(packed, 'wt', encoding='utf-8') as f:
+            json.dump(derived, f, default=json_default)
+        a = dj.load_derived_json(plain)
+        b = dj.load_derived_json(packed)
+        assert dj.json_version(a) == 1
+        assert a == b
+        assert a['cells'] == derived['cells']
+
+
+if __name__ == '__main__':
+    test_v2_round_trip_matches_v1()
+    test_v2_groups_constant_fields()
+    test_load_v1_plain_and_gzip()
+    print('ok')
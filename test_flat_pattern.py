@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Tests for the DXF/SVG flat-pattern exporter (commands/gptDataProcessor/flat_pattern.py)"""
+
+import json
+import os
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+from collections import Counter
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+deriver_dir = os.path.join(current_dir, 'commands', 'gptDataProcessor')
+sys.path.insert(0, deriver_dir)
+
+import derive_from_linkmatrix as dfl  # noqa: E402
+import derived_binary  # noqa: E402
+import derived_json  # noqa: E402
+import flat_pattern  # noqa: E402
+
+DERIVED_PATH = os.path.join(current_dir, 'derived_20250907_121333.json')
+SVG_NS = '{http://www.w3.org/2000/svg}'
+
+
+def dxf_lines(path):
+    """[(layer, x0, y0, x1, y1)] of the LINE entities of a DXF file."""
+    with open(path) as f:
+        tokens = [line.strip() for line in f]
+    pairs = list(zip(tokens[0::2], tokens[1::2]))
+    assert pairs[-1] == ('0', 'EOF')
+    out = []
+    for i, (code, value) in enumerate(pairs):
+        if code == '0' and value == 'LINE':
+            fields = {}
+            for c, v in pairs[i + 1:]:
+                if c == '0':
+                    break
+                fields[c] = v
+            out.append((fields['8'],) + tuple(float(fields[k]) for k in ('10', '20', '11', '21')))
+    return out
+
+
+def svg_lines(path):
+    root = ET.parse(path).getroot()
+    out = []
+    for group in root.iter(SVG_NS + 'g'):
+        for line in group.findall(SVG_NS + 'line'):
+            out.append((group.get('id'),) + tuple(float(line.get(k)) for k in ('x1', 'y1', 'x2', 'y2')))
+    return out
+
+
+def test_dxf_and_svg_layers_match():
+    with open(DERIVED_PATH) as f:
+        cells = json.load(f)['cells']
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = flat_pattern.export_flat_pattern(DERIVED_PATH, tmp)
+        dxf = dxf_lines(paths['dxf'])
+        svg = svg_lines(paths['svg'])
+    assert sorted(dxf) == sorted(svg)
+    layers = Counter(layer for layer, *_ in dxf)
+    assert layers['BORDER'] == 4
+    assert layers['CHORDS'] == 2 * len(cells)
+    assert layers['KEEPOUT'] == 2 * len(cells)
+    # shared vertical edges of neighbouring cells are cut once
+    assert layers['FRAME'] < 4 * len(cells)
+    assert len(set(dxf)) == len(dxf)
+    frame = [l for l in dxf if l[0] == 'FRAME']
+    x0 = min(min(l[1], l[3]) for l in frame)
+    assert abs(x0 - min(c['x_left_mm'] for c in cells)) < 1e-4
+
+
+def test_v2_and_binary_designs_export_the_same_lines():
+    derived = dfl.compute_from_min_spec(dfl.load_spec(dfl.Path(
+        os.path.join(deriver_dir, 'stent_min_spec_20250907_170133.json'))))
+    with tempfile.TemporaryDirectory() as tmp:
+        v1 = os.path.join(tmp, 'a.json')
+        with open(v1, 'w') as f:
+            json.dump(derived, f)
+        v2 = os.path.join(tmp, 'b.json.gz')
+        derived_json.write_derived_v2(derived, v2)
+        dbin = os.path.join(tmp, 'c' + derived_binary.SUFFIX)
+        derived_binary.write_derived_binary(derived, dbin)
+        to_records = derived_binary.CellTable.to_records
+        derived_binary.CellTable.to_records = None  # compact designs are read ring by ring
+        try:
+            results = {path: (outputs, error) for path, outputs, error in
+                       flat_pattern.export_many([v1, v2, dbin], os.path.join(tmp, 'out'), ['dxf'], workers=0)}
+        finally:
+            derived_binary.CellTable.to_records = to_records
+        assert [error for _, error in results.values()] == ['', '', '']
+        results = {path: outputs for path, (outputs, _) in results.items()}
+        assert len(results) == 3
+        lines = [sorted(dxf_lines(results[p]['dxf'])) for p in (v1, v2, dbin)]
+    # v2 stores rounded cell values: compare to 1 µm
+    rounded = [[(l[0],) + tuple(round(v, 3) for v in l[1:]) for l in ls] for ls in lines]
+    assert rounded[0] == rounded[1] == rounded[2]
+
+
+def test_export_many_reports_bad_design_in_parallel():
+    with tempfile.TemporaryDirectory() as tmp:
+        bad = os.path.join(tmp, 'bad.json')
+        with open(bad, 'w') as f:
+            json.dump({'parameters': {}, 'wave_inputs_by_column': []}, f)
+        results = {os.path.basename(p): (outputs, error) for p, outputs, error in
+                   flat_pattern.export_many([DERIVED_PATH, bad], tmp, ['svg'], workers=2)}
+        assert results['bad.json'][1].startswith('ValueError') and not results['bad.json'][0]
+        assert os.path.exists(results['derived_20250907_121333.json'][0]['svg'])
+        assert not os.path.exists(os.path.join(tmp, 'bad.svg'))
+
+
+def test_same_named_designs_do_not_overwrite_each_other():
+    with open(DERIVED_PATH) as f:
+        derived = json.load(f)
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = []
+        for entry in ('ab12', 'cd34'):          # like derive cache entries
+            os.makedirs(os.path.join(tmp, entry))
+            inputs.append(os.path.join(tmp, entry, 'derived.json'))
+            with open(inputs[-1], 'w') as f:
+                json.dump(derived, f)
+        broken = json.loads(json.dumps(derived))
+        broken['cells'][3]['left_cl'] = [[0.0], [1.0]]  # malformed chord: IndexError
+        inputs.append(os.path.join(tmp, 'broken.json'))
+        with open(inputs[-1], 'w') as f:
+            json.dump(broken, f)
+        out = os.path.join(tmp, 'out')
+        results = list(flat_pattern.export_many(inputs + inputs[:1], out, ['svg'], workers=0))
+        assert [p for p, _, _ in results] == inputs + inputs[:1]  # input order
+        names = [os.path.basename(outputs['svg']) for _, outputs, error in results if not error]
+        assert names == ['ab12_derived.svg', 'cd34_derived.svg', 'ab12_derived_2.svg']
+        assert results[2][2].startswith('IndexError')
+        assert sorted(os.listdir(out)) == sorted(names)
+
+
+if __name__ == '__main__':
+    test_dxf_and_svg_layers_match()
+    test_v2_and_binary_designs_export_the_same_lines()
+    test_export_many_reports_bad_design_in_parallel()
+    test_same_named_designs_do_not_overwrite_each_other()
+    print('ok')
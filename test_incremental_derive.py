@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Tests for incremental re-derivation (commands/gptDataProcessor/incremental_derive.py)"""
+
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+deriver_dir = os.path.join(current_dir, 'commands', 'gptDataProcessor')
+sys.path.insert(0, current_dir)
+sys.path.insert(0, deriver_dir)
+
+import derive_from_linkmatrix as dfl  # noqa: E402
+import incremental_derive as inc  # noqa: E402
+from test_derive_from_linkmatrix import load_sample_spec, make_spec  # noqa: E402
+
+PATCHED_KEYS = ('parameters', 'links', 'gaps_policy', 'gaps_matrix', 'sum_gaps_in_col_mm',
+                'scale_mm_per_factor_by_col', 'ring_heights_mm', 'stack_positions_by_column')
+
+
+def assert_same_as_full(derived, spec):
+    full = dfl.compute_from_min_spec(spec)
+    for key in PATCHED_KEYS:
+        assert derived[key] == full[key], key
+    table, ref = derived['cells'].table, full['cells'].table
+    for name, values in ref.columns.items():
+        assert (table[name] == values).all(), name
+
+
+def test_link_flip_recomputes_one_column():
+    spec = load_sample_spec()
+    prev = dfl.compute_from_min_spec(spec)
+    old = spec['links']['matrix'][2][5]
+    delta = {'links': [[2, 5, 1 - old]]}
+    derived = inc.rederive(prev, delta)
+    assert derived['meta']['incremental'] == {'full': False, 'dirty_cols': [5], 'dirty_rings': []}
+    assert derived['meta']['solve_cache']['cells'] == 6
+    assert_same_as_full(derived, inc.apply_spec_delta(spec, delta))
+    # previous result untouched
+    assert prev['links']['matrix'][2][5] == old
+    assert prev['cells'] == dfl.compute_from_min_spec(spec)['cells']
+
+
+def test_rederive_builds_no_cell_dicts():
+    spec = make_spec(12, 16)
+    derived = dfl.derive_lazy(spec)
+    records = dfl.CellTable._records
+    dfl.CellTable._records = None               # any dict building now raises TypeError
+    try:
+        for delta in ({'links': [[2, 5, 1]]}, {'parameters': {'diameter_mm': 1.9}}):
+            derived = inc.rederive(derived, delta)
+    finally:
+        dfl.CellTable._records = records
+    assert len(derived['cells']) == 12 * 16
+
+
+def test_width_change_recomputes_one_ring():
+    spec = make_spec(12, 16)
+    prev = dfl.compute_from_min_spec(spec)
+    widths = list(spec['parameters']['strut_width_mm_by_ring'])
+    widths[4] = 0.055
+    delta = {'parameters': {'strut_width_mm_by_ring': widths}, 'links': [[0, 3, 1], [7, 3, 0], [9, 11, 1]]}
+    derived = inc.rederive(prev, delta)
+    info = derived['meta']['incremental']
+    assert info['dirty_rings'] == [4] and set(info['dirty_cols']) <= {3, 11}
+    assert_same_as_full(derived, inc.apply_spec_delta(spec, delta))
+
+
+def test_gap_policy_change_and_chaining():
+    spec = make_spec(8, 12, seed=3)
+    derived = dfl.compute_from_min_spec(spec)
+    for delta in ({'gaps_policy': {'body_linked_mm': 0.2}}, {'links': [[3, 0, 1]]}, {'links': [[3, 0, 0]]}):
+        spec = inc.apply_spec_delta(spec, delta)
+        derived = inc.rederive(derived, delta)
+        assert_same_as_full(derived, spec)
+
+
+def test_other_parameters_fall_back_to_full():
+    spec = load_sample_spec()
+    delta = {'parameters': {'diameter_mm': 1.9}}
+    derived = inc.rederive(dfl.compute_from_min_spec(spec), delta)
+    assert derived['meta']['incremental']['full'] is True
+    assert_same_as_full(derived, inc.apply_spec_delta(spec, delta))
+
+
+if __name__ == "__main__":
+    test_link_flip_recomputes_one_column()
+    test_rederive_builds_no_cell_dicts()
+    test_width_change_recomputes_one_ring()
+    test_gap_policy_change_and_chaining()
+    test_other_parameters_fall_back_to_full()
+    print("All incremental derivation tests passed")
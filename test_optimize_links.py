@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Tests for the link-matrix optimizer (commands/gptDataProcessor/optimize_links.py)"""
+
+import copy
+import itertools
+import os
+import sys
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+deriver_dir = os.path.join(current_dir, 'commands', 'gptDataProcessor')
+sys.path.insert(0, current_dir)
+sys.path.insert(0, deriver_dir)
+
+import derive_from_linkmatrix as dfl  # noqa: E402
+import optimize_links as ol  # noqa: E402
+from test_derive_from_linkmatrix import load_sample_spec  # noqa: E402
+
+
+def small_spec():
+    """3 rings × 4 columns: 2^8 link matrices, small enough to brute force"""
+    spec = load_sample_spec()
+    spec['parameters'].update(num_rings=3, crowns_per_ring=4, diameter_mm=1.0, length_mm=4.0,
+                              height_factors=[1.2, 1.0, 1.1], strut_width_mm_by_ring=[0.06, 0.05, 0.06])
+    spec['links'] = {'interfaces': ['1-2', '2-3'], 'matrix_cols': [0, 1, 2, 3], 'matrix': [[1, 0, 1, 0]] * 2}
+    return spec
+
+
+def brute_force(spec, min_links, max_links, alpha_abs_max=None):
+    best = None
+    for bits in itertools.product([0, 1], repeat=8):
+        m = np.array(bits).reshape(2, 4)
+        if not ((m.sum(axis=1) >= min_links) & (m.sum(axis=1) <= max_links)).all():
+            continue
+        trial = copy.deepcopy(spec)
+        trial['links']['matrix'] = m.tolist()
+        table = dfl.compute_from_min_spec(trial)['cells'].table
+        if alpha_abs_max is not None and (np.abs(table['alpha_deg']) > alpha_abs_max).any():
+            continue
+        score = table['x_keepout_mm'].min()
+        best = score if best is None else max(best, score)
+    return best
+
+
+def test_column_patterns():
+    pats = ol.column_patterns(3)
+    assert pats.shape == (8, 3) and pats[0].sum() == 0
+    assert ol.column_patterns(5, max_links_per_col=1).shape == (6, 5)
+
+
+def test_matches_brute_force():
+    spec = small_spec()
+    result = ol.optimize_links(spec, min_links=1, max_links=2)
+    assert result['exact']
+    assert result['keepout_min_mm'] == brute_force(spec, 1, 2)
+    counts = np.array(result['matrix']).sum(axis=1)
+    assert ((counts >= 1) & (counts <= 2)).all()
+    assert result['derived']['cells'].table['x_keepout_mm'].min() == result['keepout_min_mm']
+
+
+def test_alpha_bound_respected():
+    spec = small_spec()
+    free = ol.optimize_links(spec, min_links=1, max_links=3)
+    # just below the unconstrained optimum's steepest strut: that matrix is excluded
+    limit = float(np.abs(free['derived']['cells'].table['alpha_deg']).max()) - 1e-6
+    result = ol.optimize_links(spec, min_links=1, max_links=3, alpha_bounds_deg=(-limit, limit))
+    assert result['feasible']
+    assert (np.abs(result['derived']['cells'].table['alpha_deg']) <= limit).all()
+    assert result['keepout_min_mm'] == brute_force(spec, 1, 3, limit) <= free['keepout_min_mm']
+
+
+def test_infeasible_constraints():
+    result = ol.optimize_links(small_spec(), min_links=1, alpha_bounds_deg=(0, 0))
+    assert not result['feasible'] and result['matrix'] is None
+
+
+def test_sample_improves_on_start_matrix():
+    result = ol.optimize_links(load_sample_spec(), min_links=2, max_links=4, beam_width=64)
+    assert result['keepout_min_mm'] >= result['stats']['start_keepout_min_mm']
+    counts = np.array(result['matrix']).sum(axis=1)
+    assert ((counts >= 2) & (counts <= 4)).all()
+
+
+if __name__ == "__main__":
+    test_column_patterns()
+    test_matches_brute_force()
+    test_alpha_bound_respected()
+    test_infeasible_constraints()
+    test_sample_improves_on_start_matrix()
+    print("All link optimizer tests passed")
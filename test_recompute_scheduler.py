@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Tests for the debounced dialog recompute scheduler (recompute_scheduler.py)
+
+The Fusion timer / custom event is replaced by a list of requested wake-ups
+and the clock by a counter the test advances.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from recompute_scheduler import Node, RecomputeScheduler  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+def dialog_like(log, scheduler_ref=None):
+    """A small copy of the Stent Frame Designer graph; actions append their name to log."""
+    def action(name):
+        def run(context):
+            log.append(name)
+            if scheduler_ref:
+                # rebuilding a table writes inputs, which fires change events
+                scheduler_ref[0].changed('height_ring_1_factor')
+        return run
+    return [
+        Node('height_factors_config', ('height_ring_*_factor',), (), action('height_factors_config')),
+        Node('gap_config', ('gap_*_value',), (), action('gap_config')),
+        Node('fold_lock_table', ('num_rings', 'crowns_per_ring'), (), action('fold_lock_table')),
+        Node('height_factors_table', ('num_rings',), (), action('height_factors_table')),
+        Node('average_ring_height', ('length',), ('height_factors_config', 'height_factors_table'),
+             action('average_ring_height')),
+        Node('sagitta_values', ('length', 'crown_arc_radius'), ('height_factors_config', 'gap_config'),
+             action('sagitta_values')),
+        Node('crown_arc', ('crown_arc_radius', 'crown_arc_height'), ('average_ring_height',),
+             action('crown_arc')),
+    ]
+
+
+def make(log, debounce_s=0.15, scheduler_ref=None, **kwargs):
+    clock, wakes = Clock(), []
+    scheduler = RecomputeScheduler(dialog_like(log, scheduler_ref), wake=wakes.append,
+                                   debounce_s=debounce_s, clock=clock, **kwargs)
+    if scheduler_ref is not None:
+        scheduler_ref.append(scheduler)
+    return scheduler, clock, wakes
+
+
+def test_spinner_burst_recomputes_each_table_once():
+    log = []
+    scheduler, clock, wakes = make(log)
+    for _ in range(10):                     # num_rings spun 10 steps, 50 ms apart
+        assert scheduler.changed('num_rings')
+        clock.t += 0.05
+    assert log == [] and wakes == [0.15]    # one timer for the whole burst
+    assert scheduler.pending == ['fold_lock_table', 'height_factors_table', 'average_ring_height', 'crown_arc']
+
+    # wake-up: the last change was only 0.05 s ago, wait for the rest of the window
+    assert scheduler.poll('inputs') == []
+    assert wakes == [0.15, pytest.approx(0.1)]
+    clock.t += 0.11
+    assert scheduler.poll('inputs') == log == [
+        'fold_lock_table', 'height_factors_table', 'average_ring_height', 'crown_arc']
+    assert scheduler.bursts == 1 and max(scheduler.runs.values()) == 1
+    assert scheduler.poll('inputs') == [] and scheduler.pending == []
+
+
+def test_dependencies_are_followed_in_declaration_order():
+    log = []
+    scheduler, clock, _ = make(log)
+    assert not scheduler.changed('balloon_wall_um')            # feeds nothing
+    scheduler.changed('crown_arc_radius')
+    scheduler.changed('height_ring_3_factor')
+    scheduler.changed('gap_2_value')
+    clock.t += 1
+    assert scheduler.poll(None) == ['height_factors_config', 'gap_config',
+                                    'average_ring_height', 'sagitta_values', 'crown_arc']
+    assert scheduler.nodes_for('height_ring_3_factor') == ('height_factors_config',)
+    assert scheduler.nodes_for('length') == ('average_ring_height', 'sagitta_values')
+
+
+def test_changes_fired_by_actions_are_ignored():
+    log, ref = [], []
+    scheduler, clock, wakes = make(log, scheduler_ref=ref)
+    scheduler.changed('num_rings')
+    clock.t += 1
+    scheduler.poll(None)
+    assert scheduler.ignored == 4 and scheduler.pending == [] and len(wakes) == 1
+
+
+def test_flush_and_cancel():
+    log = []
+    scheduler, clock, wakes = make(log)
+    scheduler.changed('crown_arc_height')
+    assert scheduler.flush('inputs') == ['crown_arc']          # execute does not wait
+    assert scheduler.flush('inputs') == []
+    scheduler.changed('num_rings')
+    scheduler.cancel()                                        # dialog closed
+    clock.t += 1
+    assert scheduler.poll('inputs') == [] and log == ['crown_arc']
+
+
+def test_failing_node_is_reported_and_others_still_run():
+    errors = []
+
+    def boom(context):
+        raise RuntimeError('table gone')
+
+    nodes = [Node('a', ('x',), (), boom), Node('b', ('x',), (), lambda c: None)]
+    scheduler = RecomputeScheduler(nodes, on_error=lambda name, e: errors.append((name, str(e))))
+    scheduler.changed('x')
+    assert scheduler.flush(None) == ['a', 'b'] and errors == [('a', 'table gone')]
+    assert not scheduler.applying
+
+
+def test_graph_must_be_declared_in_dependency_order():
+    with pytest.raises(ValueError):
+        RecomputeScheduler([Node('b', (), ('a',), None), Node('a', (), (), None)])
+    with pytest.raises(ValueError):
+        RecomputeScheduler([Node('a', (), (), None), Node('a', (), (), None)])
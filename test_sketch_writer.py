@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Tests for the batched sketch line writer (sketch_writer.py)"""
+
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import sketch_writer  # noqa: E402
+
+
+def rounded(segments):
+    return sorted((round(s.x0, 6), round(s.y0, 6), round(s.x1, 6), round(s.y1, 6), s.construction)
+                  for s in segments)
+
+
+def test_duplicates_and_reversed_segments_collapse():
+    w = sketch_writer.SketchWriter()
+    w.hline(1.0, 0.0, 2.0)
+    w.hline(1.0, 2.0, 0.0)                  # reversed
+    w.hline(1.0 + 1e-7, 0.0, 2.0 - 1e-7)    # within the snap grid
+    w.line(3.0, 3.0, 3.0, 3.0)              # zero length
+    w.vline(0.5, math.nan, 1.0)             # missing coordinate
+    assert w.planned == 5
+    assert rounded(w.segments()) == [(0.0, 1.0, 2.0, 1.0, True)]
+
+
+def test_collinear_overlapping_and_touching_segments_merge():
+    w = sketch_writer.SketchWriter()
+    # three cell tops along one ring boundary, plus the full-width ring line
+    for col in range(3):
+        w.hline(0.4, col * 1.5, (col + 1) * 1.5)
+    w.hline(0.4, 0.0, 4.5)
+    w.hline(0.4, 5.0, 6.0)                  # gap: stays separate
+    w.vline(1.5, 0.0, 1.0)
+    w.vline(1.5, 0.5, 2.0)                  # overlaps the previous one
+    w.hline(0.4, 0.0, 4.5, construction=False)
+    assert rounded(w.segments()) == [
+        (0.0, 0.4, 4.5, 0.4, False),
+        (0.0, 0.4, 4.5, 0.4, True),
+        (1.5, 0.0, 1.5, 2.0, True),
+        (5.0, 0.4, 6.0, 0.4, True),
+    ]
+
+
+def test_oblique_segments():
+    w = sketch_writer.SketchWriter()
+    w.line(0.0, 0.0, 1.0, 1.0)
+    w.line(1.0, 1.0, 2.0, 2.0)              # collinear continuation
+    w.line(2.0, 2.0, 0.0, 0.0)              # covered
+    w.line(0.0, 1.0, 1.0, 2.0)              # parallel, different offset
+    assert rounded(w.segments()) == [(0.0, 0.0, 2.0, 2.0, True), (0.0, 1.0, 1.0, 2.0, True)]
+
+
+def test_cell_grid_needs_one_line_per_grid_line():
+    w = sketch_writer.SketchWriter()
+    rings, cols, width, height = 4, 6, 1.0, 0.8
+    for r in range(rings):
+        for c in range(cols):
+            x0, x1, y0, y1 = c * width, (c + 1) * width, r * height, (r + 1) * height
+            w.hline(y0, x0, x1)
+            w.hline(y1, x0, x1)
+            w.vline(x0, y0, y1)
+            w.vline(x1, y0, y1)
+    assert w.planned == 4 * rings * cols
+    assert len(w) == (rings + 1) + (cols + 1)
+
+
+def test_line_index_finds_host_lines_by_coordinate():
+    w = sketch_writer.SketchWriter()
+    w.hline(0.4, 0.0, 3.0)
+    w.hline(0.4, 1.0, 2.0)                  # merged into the line above
+    w.hline(0.4, 5.0, 6.0)                  # same y, disjoint span
+    w.vline(1.5, 0.0, 1.0)
+    w.line(0.0, 0.0, 1.0, 1.0)              # oblique: not indexed
+    segments = w.segments()
+    index = sketch_writer.LineIndex((s, i) for i, s in enumerate(segments))
+    assert index.horizontal_at(1.5, 0.4) == 0
+    assert index.horizontal_at(5.5, 0.4 + 3e-5) == 1     # rounds to a neighbouring grid cell
+    assert index.horizontal_at(4.0, 0.4) is None
+    assert index.vertical_at(1.5, 0.4) == 2
+    assert index.vertical_at(1.5, 1.5) is None and index.vertical_at(0.5, 0.5) is None
+
+
+if __name__ == '__main__':
+    test_duplicates_and_reversed_segments_collapse()
+    test_collinear_overlapping_and_touching_segments_merge()
+    test_oblique_segments()
+    test_cell_grid_needs_one_line_per_grid_line()
+    test_line_index_finds_host_lines_by_coordinate()
+    print('ok')
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Headless tests of the drawing commands' geometry (stent_sketch.py) on a RecordingBackend"""
+
+import os
+import subprocess
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'commands', 'gptDataProcessor'))
+
+import data_io  # noqa: E402
+import sketch_backend  # noqa: E402
+import stent_sketch  # noqa: E402
+
+
+def draw_default_frame(backend):
+    """Stent Frame Designer defaults with most drawing options on."""
+    return stent_sketch.draw_stent_frame(
+        backend, 1.8, 8.0, 6, 8, [1.2, 1.0, 1.0, 1.0, 1.0, 1.1], [0.095, 0.16, 0.16, 0.16, 0.1],
+        draw_border=True, draw_gap_centerlines=True, gap_centerlines_interior_only=True,
+        draw_crown_peaks=True, draw_crown_waves=True, draw_crown_midlines=True,
+        draw_crown_h_midlines=True, draw_crown_chord_lines=True, partial_crown_midlines=0,
+        draw_crown_mids=False, partial_crown_mids=0, create_coincident_points=True,
+        draw_fold_lock_limits=True, fold_lock_columns='', per_ring_fold_lock_config='1:0,2:0.05;5:1,3:0.05',
+        balloon_wall_um=16.0, log=lambda msg: None)
+
+
+def test_default_frame_api_calls():
+    backend = sketch_backend.RecordingBackend()
+    frame = draw_default_frame(backend)
+    assert (frame['lines_planned'], frame['lines_drawn']) == (89, 88)
+    assert (frame['points_created'], frame['constraints_created']) == (207, 414)
+    assert frame['constraints_failed'] == 0 and frame['points_unhosted'] == 0
+    assert backend.line_count == 88 and backend.point_count == 207
+    assert backend.calls['sketchLines.addByTwoPoints'] == 88
+    assert backend.api_calls == 801
+    assert backend.undeferred_calls == 0
+
+
+def test_coincident_points_lie_on_their_lines():
+    backend = sketch_backend.RecordingBackend()
+    draw_default_frame(backend)
+    pairs = backend.coincident
+    for i in range(0, len(pairs), 2):
+        point, line = pairs[i], pairs[i + 1]
+        x, y = backend.points[2 * point], backend.points[2 * point + 1]
+        x0, y0, x1, y1 = backend.lines[4 * line:4 * line + 4]
+        assert abs((x1 - x0) * (y - y0) - (y1 - y0) * (x - x0)) < 1e-9
+        assert min(x0, x1) - 1e-6 <= x <= max(x0, x1) + 1e-6
+        assert min(y0, y1) - 1e-6 <= y <= max(y0, y1) + 1e-6
+
+
+def test_large_frame_cost_is_linear_in_primitives():
+    backend = stent_sketch.benchmark_frame(num_rings=20, crowns_per_ring=32)
+    points, constraints = backend.point_count, len(backend.coincident) // 2
+    assert constraints == 2 * points
+    # one call per primitive (+ isConstruction per line) and one deferral per batch:
+    # no per-point scans of the sketch's lines
+    assert backend.api_calls == 2 * backend.line_count + points + constraints + 4
+    assert backend.undeferred_calls == 0
+
+
+def test_data_frame_draws_shared_cell_edges_once():
+    rows = []
+    for ring in range(1, 21):
+        top = (ring - 1) * 0.9
+        for col in range(32):
+            rows.append({'ring': ring, 'col': col, 'wave_height_mm': 0.8,
+                         'y_top_border_mm': top, 'y_bottom_border_mm': top + 0.8})
+    backend = sketch_backend.RecordingBackend()
+    frame = stent_sketch.draw_data_frame(backend, data_io.RingIndex(rows), 1.8,
+                                         draw_chords=False, create_points=True)
+    # border, 40 ring lines, 31 column lines and 4 edges per cell
+    assert frame['lines_planned'] == 4 + 40 + 31 + 4 * 20 * 32
+    assert frame['lines_drawn'] == backend.line_count == 40 + 33
+    assert frame['points_created'] == backend.point_count == 20 * 33 * 2
+    assert backend.undeferred_calls == 0
+
+
+def test_data_frame_from_csv():
+    index = data_io.ring_index({'data': list(data_io.read_csv_columns(
+        os.path.join(current_dir, 'sample_stent_data.csv')))})
+    backend = sketch_backend.RecordingBackend()
+    frame = stent_sketch.draw_data_frame(backend, index, 1.8)
+    assert frame['lines_drawn'] == backend.line_count <= frame['lines_planned']
+    assert abs(frame['total_length_mm'] - 8.124998) < 1e-9
+    assert set(frame['ring_positions']) == set(index.rings)
+
+
+NO_NUMPY_SCRIPT = """
+import sys
+sys.modules['numpy'] = None             # any 'import numpy' now raises ImportError
+sys.path.insert(0, sys.argv[1])
+import crown_arc, crown_geometry, sketch_backend, stent_sketch
+assert crown_geometry.solve_tangency(0.68, 0.353, 0.06, 0.15).converged
+assert crown_arc.CrownArc(200.0, 150.0).chord_mm() > 0
+backend = sketch_backend.RecordingBackend()
+stent_sketch.draw_stent_frame(
+    backend, 1.8, 8.0, 2, 4, [1.0, 1.0], [0.1], True, True, True, True, True, True, True, True,
+    0, False, 0, True, True, '', '', 16.0, log=lambda msg: None)
+assert backend.line_count > 0
+"""
+
+
+def test_imports_and_draws_without_numpy():
+    """Fusion's bundled Python may lack numpy: both commands' geometry must not need it"""
+    result = subprocess.run([sys.executable, '-c', NO_NUMPY_SCRIPT, current_dir],
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+if __name__ == '__main__':
+    test_default_frame_api_calls()
+    test_coincident_points_lie_on_their_lines()
+    test_large_frame_cost_is_linear_in_primitives()
+    test_data_frame_draws_shared_cell_edges_once()
+    test_data_frame_from_csv()
+    test_imports_and_draws_without_numpy()
+    print('ok')
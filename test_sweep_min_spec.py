@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Tests for the minimal-spec design sweep (commands/gptDataProcessor/sweep_min_spec.py)"""
+
+import csv
+import json
+import os
+import sys
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+deriver_dir = os.path.join(current_dir, 'commands', 'gptDataProcessor')
+sys.path.insert(0, deriver_dir)
+
+import derive_from_linkmatrix as dfl  # noqa: E402
+import sweep_min_spec as sweep  # noqa: E402
+
+SPEC_PATH = os.path.join(deriver_dir, 'stent_min_spec_20250907_170133.json')
+
+RANGES = {
+    'diameter_mm': {'start': 1.6, 'stop': 2.0, 'num': 3},
+    'R_factor': [2.0, 2.5],
+    'gaps_policy': [{}, {'body_linked_mm': 0.18}],
+}
+
+
+def test_variants_enumerate_lazily():
+    assert sweep.count_variants(RANGES) == 12
+    variants = list(sweep.iter_variants(RANGES))
+    assert [i for i, _ in variants] == list(range(12))
+    assert variants[0][1] == {'diameter_mm': 1.6, 'R_factor': 2.0, 'gaps_policy': {}}
+    assert variants[-1][1]['diameter_mm'] == 2.0
+
+
+def test_apply_variant_merges_gap_policy():
+    base = dfl.load_spec(dfl.Path(SPEC_PATH))
+    spec = sweep.apply_variant(base, {'R_factor': 3.0, 'gaps_policy': {'body_linked_mm': 0.2}})
+    assert spec['parameters']['R_factor'] == 3.0
+    assert spec['gaps_policy']['body_linked_mm'] == 0.2
+    assert spec['gaps_policy']['end_linked_mm'] == base['gaps_policy']['end_linked_mm']
+    assert base['parameters']['R_factor'] == 2.5
+
+
+def test_unchanged_variant_matches_direct_derivation():
+    base = dfl.load_spec(dfl.Path(SPEC_PATH))
+    records = dfl.CellTable._records
+    dfl.CellTable._records = None               # variants must not build per-cell dicts
+    try:
+        row = sweep.evaluate_variant(base, 0, {})
+    finally:
+        dfl.CellTable._records = records
+    table = dfl.compute_from_min_spec(base)['cells'].table
+    assert row['error'] == ''
+    assert row['keepout_min_mm'] == float(table['x_keepout_mm'].min())
+    assert row['theta_max_deg_r3'] == float(table['theta_deg'][2].max())
+
+
+def test_bad_variant_reports_error_row():
+    base = dfl.load_spec(dfl.Path(SPEC_PATH))
+    row = sweep.evaluate_variant(base, 5, {'height_factors': [1.0, 1.0]})
+    assert row['variant'] == 5
+    assert row['error'].startswith('AssertionError')
+
+
+def run_to_rows(workers, suffix):
+    base = dfl.load_spec(dfl.Path(SPEC_PATH))
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, 'sweep' + suffix)
+        n = sweep.run_sweep(base, RANGES, out, workers=workers, batch_size=4)
+        with open(out) as f:
+            if suffix == '.jsonl':
+                rows = [json.loads(line) for line in f]
+            else:
+                rows = list(csv.DictReader(f))
+    assert n == len(rows) == 12
+    return sorted(rows, key=lambda r: int(r['variant']))
+
+
+def test_run_sweep_in_process_jsonl():
+    rows = run_to_rows(0, '.jsonl')
+    assert all(r['error'] == '' for r in rows)
+    assert rows[0]['diameter_mm'] == 1.6
+
+
+def test_run_sweep_process_pool_csv():
+    rows = run_to_rows(2, '.csv')
+    serial = run_to_rows(0, '.jsonl')
+    assert [int(r['variant']) for r in rows] == list(range(12))
+    for a, b in zip(rows, serial):
+        assert float(a['keepout_min_mm']) == b['keepout_min_mm']
+
+
+if __name__ == "__main__":
+    test_variants_enumerate_lazily()
+    test_apply_variant_merges_gap_policy()
+    test_unchanged_variant_matches_direct_derivation()
+    test_bad_variant_reports_error_row()
+    test_run_sweep_in_process_jsonl()
+    test_run_sweep_process_pool_csv()
+    print("All sweep tests passed")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Tests for the Monte Carlo tolerance analysis (commands/gptDataProcessor/tolerance_mc.py)"""
+
+import csv
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+deriver_dir = os.path.join(current_dir, 'commands', 'gptDataProcessor')
+sys.path.insert(0, deriver_dir)
+
+import derive_from_linkmatrix as dfl  # noqa: E402
+import tolerance_mc as mc  # noqa: E402
+
+SPEC_PATH = os.path.join(deriver_dir, 'stent_min_spec_20250907_170133.json')
+
+TOLERANCES = {
+    'strut_width_mm_by_ring': {'dist': 'normal', 'sigma': 0.002},
+    'gaps_mm': {'dist': 'uniform', 'half_width': 0.005},
+    'diameter_mm': {'dist': 'triangular', 'half_width': 0.01},
+    'R_factor': {'dist': 'normal', 'sigma': 0.05},
+}
+LIMITS = {'x_keepout_mm': {'min': 0.017}, 'alpha_deg': {'abs_max': 87.0}}
+
+
+def load_spec():
+    return dfl.load_spec(dfl.Path(SPEC_PATH))
+
+
+def test_zero_tolerance_reproduces_nominal():
+    report = mc.run_tolerance_analysis(load_spec(), {}, 10, workers=0)
+    table = dfl.compute_from_min_spec(load_spec())['cells'].table
+    for metric in ('x_keepout_mm', 'theta_deg', 'sagitta_center_mm', 'alpha_deg'):
+        assert np.allclose(report['metrics'][metric]['mean'], table[metric], atol=1e-9)
+        assert np.max(report['metrics'][metric]['std']) < 1e-9
+    assert report['failure_probability'] == 0.0
+
+
+def test_chunked_stats_match_single_batch():
+    """Merged chunk moments equal the moments of all samples drawn at once"""
+    spec = load_spec()
+    nom = mc.Nominal(spec)
+    parts = [mc.run_chunk(spec, TOLERANCES, LIMITS, 3, i, 0, 500)[0] for i in range(3)]
+    merged = parts[0].merge(parts[1]).merge(parts[2])
+    samples = []
+    for i in range(3):
+        rng = np.random.default_rng(np.random.SeedSequence(3, spawn_key=(i,)))
+        samples.append(mc.sample_geometry(nom, TOLERANCES, rng, 500)[0]['x_keepout_mm'])
+    allv = np.concatenate(samples)
+    assert merged.n == 1500
+    assert np.allclose(merged.mean['x_keepout_mm'], allv.mean(axis=0), rtol=0, atol=1e-12)
+    assert np.allclose(merged.m2['x_keepout_mm'], ((allv - allv.mean(axis=0))**2).sum(axis=0), atol=1e-12)
+    assert (merged.min['x_keepout_mm'] == allv.min(axis=0)).all()
+    assert merged.fail_cells['x_keepout_mm'].sum() == (allv < 0.017).sum()
+
+
+def test_deterministic_across_workers_and_streams_samples():
+    spec = load_spec()
+    serial = mc.run_tolerance_analysis(spec, TOLERANCES, 3000, LIMITS, seed=11, workers=0, chunk_size=700)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'samples.csv')
+        pooled = mc.run_tolerance_analysis(spec, TOLERANCES, 3000, LIMITS, seed=11, workers=2,
+                                           chunk_size=700, samples_path=path)
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+    assert serial == pooled
+    assert len(rows) == 3000 and [int(r['sample']) for r in rows] == list(range(3000))
+    failed = sum(int(r['failed']) for r in rows)
+    assert failed == round(serial['failure_probability'] * 3000)
+    assert 0.0 < serial['failure_probability'] < 1.0
+    assert len(serial['failures']['alpha_deg']['probability_by_ring']) == 6
+
+
+def test_rejects_unknown_keys():
+    for tol, lim in (({'width': {}}, {}), ({}, {'x_keepout_mm': {'lo': 0.0}})):
+        try:
+            mc.run_tolerance_analysis(load_spec(), tol, 10, lim, workers=0)
+        except ValueError:
+            continue
+        raise AssertionError('expected ValueError')
+
+
+if __name__ == "__main__":
+    test_zero_tolerance_reproduces_nominal()
+    test_chunked_stats_match_single_batch()
+    test_deterministic_across_workers_and_streams_samples()
+    test_rejects_unknown_keys()
+    print("All tolerance analysis tests passed")